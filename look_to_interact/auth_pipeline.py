@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Per-factor outcome; cancelled means another factor failed first and this one was stopped
+FactorResult = namedtuple("FactorResult", ["passed", "score", "seconds", "cancelled", "error"])
+
+# user: whose templates matched (the identified user when no user name was given)
+AuthResult = namedtuple("AuthResult", [
+    "success", "gaze_score", "voice_score",
+    "gaze_seconds", "voice_seconds", "seconds", "failed_factor", "user",
+], defaults=(None,))
+
+
+def rejected(failed_factor, gaze_score=0.0, voice_score=0.0):
+    """An AuthResult for checks that fail before any factor runs."""
+    return AuthResult(False, gaze_score, voice_score, 0.0, 0.0, 0.0, failed_factor)
+
+
+def _run_factor(name, fn, cancel):
+    start = time.perf_counter()
+    try:
+        passed, score = fn(cancel)
+        error = None
+    except Exception as e:
+        print(f"❌ Error during {name} check: {e}")
+        passed, score, error = False, 0.0, e
+    return FactorResult(bool(passed), float(score or 0.0), time.perf_counter() - start, False, error)
+
+
+def run_factors(factors):
+    """Runs every factor at once; the first failure cancels the rest.
+
+    `factors` maps a name to fn(cancel_event) -> (passed, score). Each fn
+    must poll the event and return promptly once it is set. Returns
+    ({name: FactorResult}, first_failed_name_or_None, elapsed_seconds).
+    """
+    cancel = threading.Event()
+    start = time.perf_counter()
+    results = {}
+    failed = None
+
+    with ThreadPoolExecutor(max_workers=len(factors), thread_name_prefix="auth") as pool:
+        pending = {pool.submit(_run_factor, name, fn, cancel): name for name, fn in factors.items()}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                result = future.result()
+                if failed is not None and not result.passed:
+                    result = result._replace(cancelled=True)
+                results[name] = result
+                if not result.passed and failed is None:
+                    failed = name
+                    cancel.set()
+
+    return results, failed, time.perf_counter() - start
+
+
+def authenticate_concurrently(gaze_fn, voice_fn):
+    """Scores gaze and voice in parallel, so a decision takes max(gaze, voice) time."""
+    results, failed, elapsed = run_factors({"gaze": gaze_fn, "voice": voice_fn})
+    gaze, voice = results["gaze"], results["voice"]
+    return AuthResult(
+        success=failed is None,
+        gaze_score=gaze.score,
+        voice_score=voice.score,
+        gaze_seconds=gaze.seconds,
+        voice_seconds=voice.seconds,
+        seconds=elapsed,
+        failed_factor=failed,
+    )
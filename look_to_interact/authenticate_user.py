@@ -2,14 +2,16 @@ import os
 import sys
 import numpy as np
 import wavio
-import cv2
-import mediapipe as mp
-import time
-import subprocess
-import sounddevice as sd
-from scipy.io.wavfile import read as read_wav
-from scipy.spatial.distance import cosine
-import glob
+import controller_session
+import vad_recorder
+import landmark_engine
+import face_landmarks
+import gaze_burst
+import frame_sources
+import voice_features
+import auth_pipeline
+import credential_store
+import identification_index
 
 # 📁 Path resolution (for .py or .exe)
 if getattr(sys, 'frozen', False):
@@ -18,127 +20,197 @@ else:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 CREDENTIALS_DIR = os.path.join(BASE_DIR, "credentials")
-GAZE_VECTOR_FILE = os.path.join(CREDENTIALS_DIR, "gaze_vector.txt")
-VOICE_SAMPLE_GLOB = os.path.join(CREDENTIALS_DIR, "voice_sample_*.wav")
 VOICE_INPUT_FILE = os.path.join(CREDENTIALS_DIR, "voice_input.wav")
 
+# Also write each login recording to VOICE_INPUT_FILE (audit only; scoring stays in memory)
+AUDIT_VOICE_INPUT = False
+
 def initialize_credentials():
     if not os.path.exists(CREDENTIALS_DIR):
         os.makedirs(CREDENTIALS_DIR)
         print("📁 'credentials' folder created.")
-
-    if not os.path.exists(GAZE_VECTOR_FILE):
-        with open(GAZE_VECTOR_FILE, "w") as f:
-            f.write("0.5 " * 4)  # dummy gaze vector
-        print("👁️ Dummy gaze vector created.")
-
-    if not glob.glob(VOICE_SAMPLE_GLOB):
-        dummy_audio = np.zeros((44100 * 3, 1), dtype='int16')
-        wavio.write(os.path.join(CREDENTIALS_DIR, "voice_sample_1.wav"), dummy_audio, 44100, sampwidth=2)
-        print("🎙️ Dummy voice sample created.")
-
-initialize_credentials()
+    # Opening the store migrates gaze_vector.txt / voice_sample_*.wav from older versions
+    return credential_store.get_store()
 
 def extract_gaze_vector_from_frame(frame):
-    mp_face_mesh = mp.solutions.face_mesh
-    with mp_face_mesh.FaceMesh(static_image_mode=True, refine_landmarks=True) as face_mesh:
-        results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        if results.multi_face_landmarks:
-            landmarks = results.multi_face_landmarks[0].landmark
+    face_mesh = landmark_engine.get_engine(static_image_mode=True)
+    points = face_landmarks.from_results(face_mesh.process_bgr(frame))
+    if points is None:
+        return None
+    return face_landmarks.gaze_vector(points)
 
-            left_eye_indices = [468, 469, 470, 471, 472]
-            right_eye_indices = [473, 474, 475, 476, 477]
+def record_voice(output_file=None, duration=3, samplerate=44100, cancel=None):
+    """Records the passphrase and returns (recording, samplerate); output_file is optional.
 
-            left_iris = np.mean([[landmarks[i].x, landmarks[i].y] for i in left_eye_indices], axis=0)
-            right_iris = np.mean([[landmarks[i].x, landmarks[i].y] for i in right_eye_indices], axis=0)
-
-            gaze_vector = np.concatenate((left_iris, right_iris))
-            return gaze_vector
-    return None
-
-def record_voice(output_file, duration=3, samplerate=44100):
+    recording is None when no speech was heard.
+    """
     print("🎙️ Recording voice now. Please say your phrase...")
-    recording = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='int16')
-    sd.wait()
-    wavio.write(output_file, recording, samplerate, sampwidth=2)
-    print("✅ Voice recorded.")
+    utterance = vad_recorder.record_utterance(samplerate, max_duration=duration, cancel=cancel)
+    if output_file:
+        wavio.write(output_file, utterance.recording, samplerate, sampwidth=2)
+    if utterance.speech_found:
+        print(f"✅ Voice recorded in {utterance.elapsed:.2f}s.")
+    else:
+        print("❌ No speech detected.")
+        return None, samplerate
+    return utterance.recording, samplerate
 
 def compare_gaze_vectors(vector1, vector2):
     if vector1 is None or vector2 is None:
         return 0
+    from scipy.spatial.distance import cosine
     similarity = 1 - cosine(vector1, vector2)
     return similarity
 
-def compare_voice(reference_path, input_path):
+def verify_gaze(registered_gaze, source=None, cancel=None, score_fn=compare_gaze_vectors,
+                extract_fn=extract_gaze_vector_from_frame):
+    # Score frames from the moment the camera opens instead of sleeping first
+    cap = frame_sources.open_source(source)
     try:
-        sr1, ref_data = read_wav(reference_path)
-        sr2, input_data = read_wav(input_path)
-
-        min_len = min(len(ref_data), len(input_data))
-        ref_data = ref_data[:min_len]
-        input_data = input_data[:min_len]
-
-        similarity = 1 - cosine(ref_data.flatten(), input_data.flatten())
-        return similarity
-    except Exception as e:
-        print(f"❌ Error comparing voice: {e}")
-        return 0
-
-def authenticate():
-    print("🔐 Starting authentication...")
-    print("🧿 Please look in the same direction as during enrollment...")
-
-    cap = cv2.VideoCapture(0)
-    time.sleep(2)
-    ret, frame = cap.read()
-    cap.release()
+        burst = gaze_burst.stream_gaze_match(cap, extract_fn, score_fn, registered_gaze, cancel=cancel)
+    finally:
+        cap.release()
 
-    if not ret:
+    if burst.frames == 0:
         print("❌ Failed to capture frame.")
-        return False, 0, 0
-
-    current_gaze_vector = extract_gaze_vector_from_frame(frame)
-    if current_gaze_vector is None:
+    elif burst.faces == 0:
         print("❌ Failed to extract gaze vector.")
-        return False, 0, 0
-
-    with open(GAZE_VECTOR_FILE, "r") as f:
-        registered_gaze = np.array(list(map(float, f.read().strip().split())))
-
-    gaze_similarity = compare_gaze_vectors(registered_gaze, current_gaze_vector)
-    print(f"🧠 Gaze similarity: {gaze_similarity:.2f}")
-
-    if gaze_similarity < 0.85:
-        print("❌ Gaze does not match. Access denied.")
-        return False, gaze_similarity, 0
-
-    record_voice(VOICE_INPUT_FILE)
-
-    # ➕ Match against multiple samples
-    voice_samples = glob.glob(VOICE_SAMPLE_GLOB)
-    voice_match_found = False
-    best_voice_similarity = 0
-
-    for sample in voice_samples:
-        similarity = compare_voice(sample, VOICE_INPUT_FILE)
-        print(f"🔎 Compared with {os.path.basename(sample)} → similarity: {similarity:.2f}")
-        if similarity > best_voice_similarity:
-            best_voice_similarity = similarity
-        if similarity >= 0.85:
-            voice_match_found = True
-            break
+    else:
+        print(f"🧠 Gaze similarity: {burst.score:.2f} ({burst.faces}/{burst.frames} frames, {burst.elapsed:.2f}s)")
+        if not burst.matched:
+            print("❌ Gaze does not match.")
+    return burst.matched, burst.score
+
+def capture_voice_embedding(cancel=None):
+    """Records the passphrase and returns its embedding, or None if cancelled or nothing was said."""
+    recording, samplerate = record_voice(VOICE_INPUT_FILE if AUDIT_VOICE_INPUT else None, cancel=cancel)
+    if recording is None or (cancel is not None and cancel.is_set()):
+        return None
+    return voice_features.compute_embedding(recording, samplerate)
+
+def verify_voice(voice_templates, cancel=None):
+    input_embedding = capture_voice_embedding(cancel)
+    if input_embedding is None:
+        return False, 0
+
+    # ➕ Match against every enrolled sample in one vectorized pass
+    similarities = voice_features.score_templates(voice_templates, input_embedding)
+    for number, similarity in enumerate(similarities, 1):
+        print(f"🔎 Compared with voice sample {number} → similarity: {similarity:.2f}")
+
+    best_voice_similarity = float(similarities.max()) if len(similarities) else 0
+    if best_voice_similarity < 0.85:
+        print("❌ Voice does not match any sample.")
+    return best_voice_similarity >= 0.85, best_voice_similarity
+
+def identify(store, source=None):
+    """1:N mode: the face picks the user, who must also pass gaze and voice.
+
+    Returns an AuthResult whose `user` is the identified user.
+    """
+    try:
+        gallery = identification_index.get_gallery(store)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read the credential store: {e}")
+        return auth_pipeline.rejected("gaze")
+    if not gallery.has_face.any():
+        print("❌ No face templates enrolled. Identification needs them; enroll with look_to_interact.py.")
+        return auth_pipeline.rejected("face")
+
+    # Per-user gaze scores of the frames in the current agreeing streak, the
+    # last frame of that streak (for the face), and the spoken phrase's scores
+    streak = []
+    streak_frame = [None]
+    voice_best = np.full(len(gallery), -1.0, dtype=np.float32)
+
+    def extract_gaze(frame):
+        gaze = extract_gaze_vector_from_frame(frame)
+        if gaze is not None:
+            streak_frame[0] = frame
+        return gaze
+
+    def score_gaze(_, gaze):
+        scores = gallery.gaze_scores(gaze)
+        best = float(scores.max())
+        # Mirrors gaze_burst's streak: a frame below the threshold starts it over
+        if best >= identification_index.GAZE_THRESHOLD:
+            streak.append(scores)
+        else:
+            streak.clear()
+        return best
+
+    def identify_voice(cancel):
+        input_embedding = capture_voice_embedding(cancel)
+        if input_embedding is None:
+            return False, 0
+        voice_best[:] = gallery.voice_scores(input_embedding)
+        best = float(voice_best.max())
+        if best < identification_index.VOICE_THRESHOLD:
+            print("❌ Voice does not match any enrolled user.")
+        return best >= identification_index.VOICE_THRESHOLD, best
+
+    result = auth_pipeline.authenticate_concurrently(
+        lambda cancel: verify_gaze(None, source, cancel, score_fn=score_gaze, extract_fn=extract_gaze),
+        identify_voice,
+    )
+    if not result.success:
+        return result
+
+    import face_recognition  # Loads dlib and its models; only needed once both factors passed
+
+    encodings = face_recognition.face_encodings(streak_frame[0])
+    if not encodings:
+        print("❌ No face detected! Try again.")
+        return result._replace(success=False, failed_factor="face")
+    match = gallery.identify(gallery.face_distances(encodings[0]), np.mean(streak, axis=0), voice_best)
+    if match is None:
+        # Face, gaze and voice did not all point at the same enrolled user
+        return result._replace(success=False, failed_factor="identity")
+    print(f"👤 Identified {match.user} (face {match.face_distance:.2f}, "
+          f"gaze {match.gaze_score:.2f}, voice {match.voice_score:.2f})")
+    return result._replace(user=match.user, gaze_score=match.gaze_score, voice_score=match.voice_score)
+
+def authenticate(source=None, launch_controller=True, user=credential_store.DEFAULT_USER):
+    """Verifies gaze and voice at the same time and returns an auth_pipeline.AuthResult.
+
+    Checks `user`'s templates; user=None identifies the person among all
+    enrolled users instead (see identify). On success the gaze/voice
+    controller is started in this process unless `launch_controller` is False.
+    """
+    store = initialize_credentials()
+    print("🔐 Starting authentication...")
+    print("🧿 Look in the same direction as during enrollment and say your phrase...")
 
-    if voice_match_found:
-        print("✅ Authentication successful! Access granted.")
-        print("🚀 Launching EyeVox...")
+    if user is None:
+        result = identify(store, source)
+    else:
         try:
-            subprocess.Popen(["python", "voice_commands.py"])
-        except Exception as e:
-            print(f"❌ Failed to launch EyeVox: {e}")
-        return True, gaze_similarity, best_voice_similarity
+            credentials = store.get(user)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read the credential store: {e}")
+            return auth_pipeline.rejected("gaze")
+        if credentials is None or credentials.gaze is None:
+            print(f"❌ No gaze template enrolled for '{user}'. Run enroll_user.py first.")
+            return auth_pipeline.rejected("gaze")
+
+        result = auth_pipeline.authenticate_concurrently(
+            lambda cancel: verify_gaze(credentials.gaze, source, cancel),
+            lambda cancel: verify_voice(credentials.voice, cancel),
+        )._replace(user=user)
+    print(f"⏱️ Decision in {result.seconds:.2f}s (gaze {result.gaze_seconds:.2f}s, voice {result.voice_seconds:.2f}s)")
+
+    if result.success:
+        print("✅ Authentication successful! Access granted.")
+        if launch_controller:
+            print("🚀 Launching EyeVox...")
+            # Same process: the warm FaceMesh engines and speech models are reused
+            controller_session.start_controller(source)
     else:
-        print("❌ Voice does not match any sample. Access denied.")
-        return False, gaze_similarity, best_voice_similarity
+        print(f"❌ {result.failed_factor.capitalize()} check failed. Access denied.")
+    return result
 
 if __name__ == "__main__":
-    authenticate()
+    # Optional argument: the enrolled user name, or --identify to find the user among all enrolled
+    arg = sys.argv[1] if len(sys.argv) > 1 else credential_store.DEFAULT_USER
+    if authenticate(user=None if arg == "--identify" else arg).success:
+        controller_session.get_session().wait()
@@ -0,0 +1,224 @@
+"""Per-stage benchmark for the gaze-tracking hot path.
+
+Replays recorded frames through the dlib pipeline (gaze_controller) or the
+MediaPipe pipeline (voice_commands) and prints per-stage p50/p95/p99
+latencies and FPS as JSON. pyautogui is replaced by a stub so the benchmark
+runs headless and never moves the real cursor.
+
+    python benchmark_gaze.py --pipeline mediapipe --source recordings/session.mp4
+    python benchmark_gaze.py --pipeline dlib --source frames/ --predictor shape_predictor_68_face_landmarks.dat
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import types
+from contextlib import contextmanager
+
+
+# ------------------------- pyautogui stub -------------------------
+def install_pyautogui_stub(screen_size=(1920, 1080)):
+    stub = types.ModuleType("pyautogui")
+    stub.calls = {"moveTo": 0, "click": 0}
+    stub.FailSafeException = type("FailSafeException", (Exception,), {})
+    stub.PAUSE = 0
+
+    def moveTo(*args, **kwargs):
+        stub.calls["moveTo"] += 1
+
+    def click(*args, **kwargs):
+        stub.calls["click"] += 1
+
+    stub.moveTo = moveTo
+    stub.click = click
+    stub.size = lambda: screen_size
+    sys.modules["pyautogui"] = stub
+    return stub
+
+
+pyautogui_stub = install_pyautogui_stub()
+
+import numpy as np
+import cv2
+import frame_sources
+
+
+# ------------------------- Timing -------------------------
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.active = True
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.active:
+                self.samples.setdefault(name, []).append(time.perf_counter() - start)
+
+    def summary(self):
+        return {name: _percentiles(values) for name, values in self.samples.items()}
+
+
+def _percentiles(values):
+    ms = np.asarray(values) * 1000.0
+    return {"count": int(ms.size),
+            "mean_ms": round(float(ms.mean()), 4),
+            "p50_ms": round(float(np.percentile(ms, 50)), 4),
+            "p95_ms": round(float(np.percentile(ms, 95)), 4),
+            "p99_ms": round(float(np.percentile(ms, 99)), 4)}
+
+
+# ------------------------- Pipelines -------------------------
+class MediaPipePipeline:
+    """voice_commands.process_frame; without eye crops the full mesh runs on every frame."""
+
+    def __init__(self, screen_size, use_iris_crops=False):
+        import landmark_engine
+        import voice_commands
+        from cursor_actuator import CursorActuator
+        from iris_tracker import IrisTracker
+
+        self.step = voice_commands.process_frame
+        self.engine = landmark_engine.get_engine(static_image_mode=False, max_num_faces=1)
+        self.engine.warm()
+        self.irises = IrisTracker(self.engine,
+                                  refresh_every=voice_commands.MESH_REFRESH_EVERY if use_iris_crops else 0)
+        self.cursor = CursorActuator(voice_commands.CURSOR_FILTER).start()
+        self.screen_size = screen_size
+
+    def process(self, frame, captured_at, timer):
+        self.step(frame, captured_at, self.irises, self.cursor, self.screen_size, stage=timer.stage)
+
+    def close(self):
+        self.cursor.stop()
+
+    def extra_stats(self):
+        return {"cursor_moves": self.cursor.moves, "iris": self.irises.stats()}
+
+
+class DlibPipeline:
+    """gaze_controller.process_frame; tracking mode "none" detects the face on every frame."""
+
+    def __init__(self, screen_size, predictor_path, tracking_mode="landmarks"):
+        import blink_detector
+        import gaze_controller
+        from cursor_actuator import CursorActuator
+        from face_tracker import FaceTracker
+
+        self.step = gaze_controller.process_frame
+        gaze_controller.predictor_path = predictor_path
+        detector, self.predictor = gaze_controller.load_models()
+        if tracking_mode == "none":
+            self.tracker = FaceTracker(detector, redetect_every=0)
+        else:
+            self.tracker = FaceTracker(detector, mode=tracking_mode, redetect_every=gaze_controller.REDETECT_EVERY)
+        self.blink = blink_detector.BlinkDetector(on_click=lambda: pyautogui_stub.click())
+        self.cursor = CursorActuator(gaze_controller.CURSOR_FILTER).start()
+        self.screen_size = screen_size
+
+    def process(self, frame, captured_at, timer):
+        self.step(frame, captured_at, self.tracker, self.predictor, self.blink, self.cursor,
+                  self.screen_size, stage=timer.stage)
+
+    def close(self):
+        self.cursor.stop()
+
+    def extra_stats(self):
+        return {"cursor_moves": self.cursor.moves, "clicks": self.blink.clicks,
+                "tracking": self.tracker.stats()}
+
+
+# ------------------------- Runner -------------------------
+def run_benchmark(pipeline, source, max_frames=None, warmup=10, show=False):
+    timer = StageTimer()
+    frames = 0
+    timer.active = False
+    start = None
+
+    while max_frames is None or frames < max_frames + warmup:
+        with timer.stage("capture"):
+            ret, frame = source.read()
+        if not ret:
+            if frame_sources.is_exhausted(source):
+                break
+            continue
+        captured_at = time.perf_counter()
+        frames += 1
+        if frames == warmup + 1:
+            timer.active = True
+            start = time.perf_counter()
+
+        frame_start = time.perf_counter()
+        pipeline.process(frame, captured_at, timer)
+        if show:
+            with timer.stage("imshow"):
+                cv2.imshow("Benchmark", frame)
+                cv2.waitKey(1)
+        if timer.active:
+            timer.samples.setdefault("total", []).append(time.perf_counter() - frame_start)
+
+    wall = time.perf_counter() - start if start is not None else 0.0
+    measured = max(frames - warmup, 0)
+    pipeline.close()
+    if show:
+        cv2.destroyAllWindows()
+    return {
+        "frames": measured,
+        "warmup_frames": min(frames, warmup),
+        "wall_s": round(wall, 4),
+        "fps": round(measured / wall, 2) if wall > 0 else 0.0,
+        "stages": timer.summary(),
+        "pyautogui_calls": dict(pyautogui_stub.calls),
+        "pipeline_stats": pipeline.extra_stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage gaze pipeline benchmark")
+    parser.add_argument("--pipeline", choices=["mediapipe", "mediapipe-crops", "dlib"], default="mediapipe")
+    parser.add_argument("--source", default="synthetic",
+                        help="video file, image directory, camera index or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many measured frames")
+    parser.add_argument("--warmup", type=int, default=10, help="frames excluded from the statistics")
+    parser.add_argument("--realtime", action="store_true", help="pace replay at the source fps")
+    parser.add_argument("--show", action="store_true", help="include cv2.imshow in the loop")
+    parser.add_argument("--predictor", default="shape_predictor_68_face_landmarks.dat")
+    parser.add_argument("--tracking", choices=["landmarks", "correlation", "none"], default="landmarks")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    screen_size = pyautogui_stub.size()
+    if args.pipeline == "dlib":
+        pipeline = DlibPipeline(screen_size, args.predictor, tracking_mode=args.tracking)
+    else:
+        pipeline = MediaPipePipeline(screen_size, use_iris_crops=args.pipeline == "mediapipe-crops")
+
+    source = frame_sources.open_source(args.source, realtime=args.realtime)
+    try:
+        report = run_benchmark(pipeline, source, args.frames, args.warmup, args.show)
+    finally:
+        source.release()
+
+    report.update({
+        "pipeline": args.pipeline,
+        "source": str(args.source),
+        "realtime": args.realtime,
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+    })
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Query-latency benchmark for 1:N identification (identification_index).
+
+Builds synthetic galleries of increasing size and measures how long face
+and voice queries take with the exact scan and with the approximate IVF
+index, one query at a time (a user walking up) and in batches. Recall@1 of
+the approximate index is measured against the exact answer, and update_s is
+the time to refresh a gallery after one user re-enrolls. Prints JSON.
+
+    python benchmark_identification.py
+    python benchmark_identification.py --sizes 1000 10000 100000 --queries 500
+    python benchmark_identification.py --modality face --no-approximate
+"""
+import argparse
+import json
+import platform
+import time
+import numpy as np
+import credential_store
+from identification_index import Gallery, FACE_APPROXIMATE_MIN_USERS, VOICE_APPROXIMATE_MIN_USERS
+
+
+def _percentiles(values):
+    ms = np.asarray(values) * 1000.0
+    return {"count": int(ms.size),
+            "mean_ms": round(float(ms.mean()), 4),
+            "p50_ms": round(float(np.percentile(ms, 50)), 4),
+            "p95_ms": round(float(np.percentile(ms, 95)), 4),
+            "p99_ms": round(float(np.percentile(ms, 99)), 4)}
+
+
+def synthetic_gallery(size, voice_samples, rng):
+    """Random templates shaped like the real ones: faces ~0.1 apart per dimension, unit-ish voices."""
+    face = rng.normal(scale=0.1, size=(size, credential_store.FACE_DIM)).astype(np.float32)
+    gaze = rng.random((size, credential_store.GAZE_DIM)).astype(np.float32)
+    voice = rng.normal(size=(size, voice_samples, credential_store.VOICE_DIM)).astype(np.float32)
+    return face, gaze, voice
+
+
+def make_queries(face, voice, count, noise, rng):
+    """Noisy copies of random enrolled templates, with the row each one came from."""
+    rows = rng.integers(0, len(face), size=count)
+    faces = face[rows] + rng.normal(scale=noise * 0.1, size=(count, face.shape[1])).astype(np.float32)
+    voices = voice[rows, 0] + rng.normal(scale=noise, size=(count, voice.shape[2])).astype(np.float32)
+    return rows, faces, voices
+
+
+def time_queries(query_fn, queries, batch):
+    """Per-query latencies for single queries, and the per-query cost of batches of `batch`."""
+    single = []
+    answers = []
+    for query in queries:
+        start = time.perf_counter()
+        answers.append(query_fn(query, 1))
+        single.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for first in range(0, len(queries), batch):
+        query_fn(queries[first:first + batch], 1)
+    batched_ms = (time.perf_counter() - start) * 1000.0 / len(queries)
+    return answers, _percentiles(single), round(batched_ms, 4)
+
+
+def benchmark_size(size, args, rng):
+    face, gaze, voice = synthetic_gallery(size, args.voice_samples, rng)
+    users = [f"user{i}" for i in range(size)]
+    row_of = {user: row for row, user in enumerate(users)}
+    rows, face_queries, voice_queries = make_queries(face, voice, args.queries, args.noise, rng)
+    modes = {"exact": False}
+    if args.approximate:
+        modes["approximate"] = True
+
+    report = {"users": size}
+    for mode, approximate in modes.items():
+        start = time.perf_counter()
+        gallery = Gallery(users, face=face, gaze=gaze, voice=voice, approximate=approximate)
+        entry = {"build_s": round(time.perf_counter() - start, 4)}
+
+        # One user re-enrolls: refresh from the previous gallery
+        changed_face, changed_voice = face.copy(), voice.copy()
+        changed_face[0], changed_voice[0] = face[-1], voice[-1]
+        start = time.perf_counter()
+        Gallery(users, face=changed_face, gaze=gaze, voice=changed_voice, approximate=approximate, previous=gallery)
+        entry["update_s"] = round(time.perf_counter() - start, 4)
+        for modality in args.modality:
+            query_fn, queries = ((gallery.nearest_faces, face_queries) if modality == "face"
+                                 else (gallery.nearest_voices, voice_queries))
+            answers, single, batched_ms = time_queries(query_fn, queries, args.batch)
+            top1 = np.array([row_of[a[0].user] if a else -1 for a in answers])
+            entry[modality] = {"single": single, "batched_ms_per_query": batched_ms,
+                               "top1_accuracy": round(float(np.mean(top1 == rows)), 4),
+                               "top1": top1}
+        report[mode] = entry
+
+    # Recall@1 of the approximate index against the exact scan
+    if "approximate" in report:
+        for modality in args.modality:
+            exact = report["exact"][modality]["top1"]
+            approx = report["approximate"][modality]["top1"]
+            report["approximate"][modality]["recall_at_1"] = round(float(np.mean(exact == approx)), 4)
+    for mode in modes:
+        for modality in args.modality:
+            del report[mode][modality]["top1"]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="1:N identification query-latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000],
+                        help="gallery sizes (enrolled users)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64, help="queries per batched call")
+    parser.add_argument("--modality", choices=["face", "voice"], action="append",
+                        help="repeatable; default: both")
+    parser.add_argument("--voice-samples", type=int, default=3, help="voice embeddings per user")
+    parser.add_argument("--noise", type=float, default=0.1, help="query noise relative to the template spread")
+    parser.add_argument("--no-approximate", dest="approximate", action="store_false",
+                        help="only measure the exact scan")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    args.modality = args.modality or ["face", "voice"]
+
+    rng = np.random.default_rng(args.seed)
+    report = {"galleries": [benchmark_size(size, args, rng) for size in args.sizes]}
+    report.update({
+        "queries": args.queries,
+        "batch": args.batch,
+        "face_approximate_min_users": FACE_APPROXIMATE_MIN_USERS,
+        "voice_approximate_min_users": VOICE_APPROXIMATE_MIN_USERS,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+    })
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Startup-time benchmark for the EyeVox entry points.
+
+Launches each entry point several times with startup probing enabled and
+reports how long it took to reach each milestone (first window, first
+processed and first tracked camera frame) as JSON. The app exits on its own
+once the last milestone is reached. With --frozen the PyInstaller builds
+produced from the .spec files are measured instead of the scripts.
+
+The login front ends (main_gui, eyevox_app, look_to_interact) only start
+gaze tracking after a face and voice login, which cannot be scripted, so by
+default they are measured up to their first window or prompt. With
+--interactive the benchmark waits for you to log in on each run and also
+records their first processed and first tracked frame.
+
+    python benchmark_startup.py
+    python benchmark_startup.py --entry voice_commands --source recordings/session.mp4
+    python benchmark_startup.py --frozen dist --runs 3
+    python benchmark_startup.py --entry eyevox_app --importtime
+    python benchmark_startup.py --entry main_gui --interactive --runs 1 --timeout 120
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import startup
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds an app gets to exit on its own after its last milestone (or the timeout) before it is killed
+EXIT_GRACE = 5.0
+
+# Milestones of the in-process controller, reached only after a login
+TRACKING_EVENTS = ["first_frame", "first_tracked_frame"]
+
+# build: name given to EXE/COLLECT in the entry point's .spec file (None if it has none;
+# main_gui has no .spec, look_to_interact.spec packages look_to_interact.py)
+# after_login: milestones measured with --interactive
+ENTRY_POINTS = {
+    "main_gui": {"script": "main_gui.py", "events": ["imported", "first_window"], "build": None,
+                 "after_login": TRACKING_EVENTS},
+    "eyevox_app": {"script": "eyevox_app.py", "events": ["imported", "first_window"], "build": "eyevox_app",
+                   "after_login": TRACKING_EVENTS},
+    "look_to_interact": {"script": "look_to_interact.py", "events": ["imported", "first_prompt"],
+                         "build": "look_to_interact", "after_login": TRACKING_EVENTS},
+    "voice_commands": {"script": "voice_commands.py", "events": ["imported"] + TRACKING_EVENTS,
+                       "build": "voice_commands", "takes_source": True},
+}
+
+
+def frozen_executable(dist_dir, build):
+    """Finds a one-folder (dist/name/name) or one-file (dist/name) PyInstaller build."""
+    suffix = ".exe" if sys.platform == "win32" else ""
+    for path in (os.path.join(dist_dir, build, build + suffix), os.path.join(dist_dir, build + suffix)):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def read_markers(path):
+    events = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[0] == startup.MARKER:
+                    events[parts[1]] = float(parts[2])
+    except OSError:
+        pass
+    return events
+
+
+def launch_once(command, events, timeout, extra_env=None, capture_stderr=False, interactive=False):
+    """Runs one launch; returns ({event: seconds since launch}, exit code, stderr text).
+
+    interactive keeps the app's output on the console so the user can log in.
+    """
+    fd, marker_path = tempfile.mkstemp(prefix="eyevox_startup_", suffix=".txt")
+    os.close(fd)
+    env = dict(os.environ, **(extra_env or {}))
+    env[startup.PROBE_ENV] = marker_path
+    env[startup.EXIT_ENV] = events[-1]
+
+    launched = time.time()
+    proc = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=None if interactive else subprocess.DEVNULL,
+                            stderr=subprocess.PIPE if capture_stderr else subprocess.DEVNULL,
+                            text=capture_stderr)
+    stderr = ""
+    try:
+        if capture_stderr:
+            _, stderr = proc.communicate(timeout=timeout)
+        else:
+            deadline = launched + timeout
+            while proc.poll() is None and time.time() < deadline:
+                if events[-1] in read_markers(marker_path):
+                    break
+                time.sleep(0.01)
+            # A login front end keeps its window open after the controller stops
+            proc.wait(timeout=EXIT_GRACE)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+    reached = {event: t - launched for event, t in read_markers(marker_path).items()}
+    os.remove(marker_path)
+    return reached, proc.returncode, stderr
+
+
+def summarize(samples, runs):
+    if not samples:
+        return {"runs": runs, "reached": 0}
+    values = np.asarray(samples)
+    return {"runs": runs,
+            "reached": int(values.size),
+            "mean_s": round(float(values.mean()), 4),
+            "p50_s": round(float(np.percentile(values, 50)), 4),
+            "min_s": round(float(values.min()), 4),
+            "max_s": round(float(values.max()), 4)}
+
+
+def top_imports(importtime_log, limit=15):
+    """Slowest top-level imports from a `python -X importtime` log, by cumulative time."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two extra spaces per level
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000.0, 1)} for us, name in rows[:limit]]
+
+
+def benchmark_entry(name, spec, args):
+    if args.frozen:
+        if spec["build"] is None:
+            return {"skipped": "no .spec file for this entry point"}
+        executable = frozen_executable(args.frozen, spec["build"])
+        if executable is None:
+            return {"skipped": f"no build of {spec['build']} under {args.frozen}"}
+        command = [executable]
+    else:
+        command = [sys.executable, spec["script"]]
+    if spec.get("takes_source") and args.source is not None:
+        command.append(args.source)
+
+    events = spec["events"]
+    if args.interactive:
+        events = events + spec.get("after_login", [])
+    samples = {event: [] for event in events}
+    exit_codes = []
+    for run in range(args.runs):
+        if args.interactive and spec.get("after_login"):
+            print(f"⏳ {name} run {run + 1}/{args.runs}: log in to start gaze tracking...", file=sys.stderr)
+        reached, code, _ = launch_once(command, events, args.timeout, interactive=args.interactive)
+        exit_codes.append(code)
+        for event, seconds in reached.items():
+            samples.setdefault(event, []).append(seconds)
+
+    report = {"command": " ".join(command),
+              "events": {event: summarize(values, args.runs) for event, values in samples.items()},
+              "exit_codes": exit_codes}
+    if args.importtime and not args.frozen:
+        _, _, log = launch_once([sys.executable, "-X", "importtime", spec["script"]] + command[2:],
+                                spec["events"], args.timeout, capture_stderr=True)
+        report["slowest_imports"] = top_imports(log)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EyeVox startup-time benchmark")
+    parser.add_argument("--entry", choices=sorted(ENTRY_POINTS), action="append",
+                        help="entry point to measure (repeatable; default: all)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each launch")
+    parser.add_argument("--source", default=None,
+                        help="frame source for voice_commands: video file, image directory, camera index "
+                             "or 'synthetic' (default: camera)")
+    parser.add_argument("--frozen", metavar="DIST_DIR", help="measure the PyInstaller builds in this directory")
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest imports of each script")
+    parser.add_argument("--interactive", action="store_true",
+                        help="log in by hand on each run to also time the login front ends' first tracked frame")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {"entries": {}}
+    for name in args.entry or sorted(ENTRY_POINTS):
+        report["entries"][name] = benchmark_entry(name, ENTRY_POINTS[name], args)
+
+    report.update({
+        "runs": args.runs,
+        "frozen": bool(args.frozen),
+        "interactive": args.interactive,
+        "source": args.source,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    })
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
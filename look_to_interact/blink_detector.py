@@ -0,0 +1,95 @@
+import time
+import numpy as np
+from face_landmarks import MEDIAPIPE_EYE_INDICES, NUM_LANDMARKS, eye_aspect_ratios, to_pixels
+
+# Six points per eye in EAR order: outer corner, two upper lid, inner corner, two lower lid
+DLIB_EYE_INDICES = np.array([
+    [36, 37, 38, 39, 40, 41],
+    [42, 43, 44, 45, 46, 47],
+])
+
+# Eye indices for each landmark source, keyed by its number of points
+EYE_INDICES = {
+    68: DLIB_EYE_INDICES,
+    NUM_LANDMARKS: MEDIAPIPE_EYE_INDICES,
+}
+
+
+def eye_indices_for(points):
+    """The EAR indices matching a dlib (68) or MediaPipe (478) point array."""
+    try:
+        return EYE_INDICES[len(points)]
+    except KeyError:
+        raise ValueError(f"No eye indices for {len(points)} landmarks; pass eye_indices explicitly")
+
+
+def dlib_points(shape):
+    """(68, 2) pixel array from a dlib full_object_detection."""
+    return np.array([(p.x, p.y) for p in shape.parts()], dtype=np.float32)
+
+
+def mediapipe_points(points, frame_width, frame_height):
+    """Pixel points from a face_landmarks array, ready for update()."""
+    return to_pixels(points, frame_width, frame_height)
+
+
+class BlinkDetector:
+    """Timestamp-driven blink state machine.
+
+    A click fires when both eyes reopen after staying closed for between
+    `min_closed` and `max_closed` seconds. Shorter closures are natural
+    blinks; longer ones are the user resting their eyes. Timing does not
+    depend on the camera frame rate, and update() never sleeps.
+    """
+
+    OPEN, CLOSED = "open", "closed"
+
+    def __init__(self, ear_threshold=0.25, min_closed=0.4, max_closed=2.0,
+                 refractory=0.5, on_click=None):
+        self.ear_threshold = ear_threshold
+        self.min_closed = min_closed
+        self.max_closed = max_closed
+        self.refractory = refractory
+        self.on_click = on_click
+        self.state = self.OPEN
+        self.closed_since = None
+        self.last_click = -float("inf")
+        self.last_ears = None
+        self.clicks = 0
+
+    def update(self, points, eye_indices=None, now=None):
+        """Feeds one frame's landmarks; returns "click" when a click fires, else None.
+
+        eye_indices defaults to the set for the point source (see eye_indices_for).
+        """
+        now = time.perf_counter() if now is None else now
+        if eye_indices is None:
+            eye_indices = eye_indices_for(points)
+        ears = eye_aspect_ratios(points, eye_indices)
+        self.last_ears = ears
+        if np.isnan(ears).any():
+            return None
+        return self.update_ears(ears, now)
+
+    def update_ears(self, ears, now):
+        closed = bool(np.all(ears < self.ear_threshold))
+
+        if self.state == self.OPEN:
+            if closed:
+                self.state = self.CLOSED
+                self.closed_since = now
+            return None
+
+        if closed:
+            return None
+
+        duration = now - self.closed_since
+        self.state = self.OPEN
+        self.closed_since = None
+        if self.min_closed <= duration <= self.max_closed and now - self.last_click >= self.refractory:
+            self.last_click = now
+            self.clicks += 1
+            if self.on_click is not None:
+                self.on_click()
+            return "click"
+        return None
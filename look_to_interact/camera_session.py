@@ -0,0 +1,238 @@
+import threading
+import time
+import cv2
+from frame_sources import CameraSource, FrameSource
+
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+CAMERA_FPS = 30
+CAMERA_BUFFER_SIZE = 1     # keep at most one stale frame in the driver queue
+IDLE_TIMEOUT = 10.0        # seconds the device stays open after the last view is released
+SETTLE_SECONDS = 2.0       # auto-exposure warm-up after the device opens
+READ_TIMEOUT = 1.0         # a view's read() gives up after this long without a new frame
+
+# Properties owned by the session; views can't change them for everyone else
+_SESSION_PROPS = (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT,
+                  cv2.CAP_PROP_FPS, cv2.CAP_PROP_BUFFERSIZE)
+
+
+class CameraSession:
+    """One camera device shared by every consumer in the process.
+
+    The device is opened once with explicit resolution, FPS and buffer
+    size, and a single capture thread keeps the newest frame. acquire()
+    hands out a CameraView per consumer (health check, authentication,
+    enrollment, live tracking); the device is closed IDLE_TIMEOUT seconds
+    after the last view is released, unless a new one is acquired first.
+    """
+
+    def __init__(self, index=0, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS,
+                 buffer_size=CAMERA_BUFFER_SIZE, idle_timeout=IDLE_TIMEOUT):
+        self.index = index
+        self.width, self.height, self.fps = width, height, fps
+        self.buffer_size = buffer_size
+        self.idle_timeout = idle_timeout
+        self.opens = 0
+        self.frames = 0
+        self.opened_at = None
+        self._source = None
+        self._thread = None
+        self._running = False
+        self._refs = 0
+        self._close_timer = None
+        self._closing = False
+        self._frame = None
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            self._refs += 1
+            if self._close_timer is not None:
+                self._close_timer.cancel()
+                self._close_timer = None
+            while self._closing:
+                self._cond.wait()
+            if self._source is not None and not self._source.isOpened():
+                # A failed open would otherwise be handed out until the idle timeout
+                self._close()
+            if self._source is None:
+                self._open()
+            return CameraView(self, self._seq)
+
+    def _open(self):
+        source = CameraSource(self.index, self.width, self.height, self.fps)
+        source.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        self._source = source
+        self.opens += 1
+        self.opened_at = time.perf_counter()
+        if source.isOpened():
+            self._running = True
+            self._thread = threading.Thread(target=self._capture, args=(source,),
+                                            name=f"camera-{self.index}", daemon=True)
+            self._thread.start()
+
+    def _capture(self, source):
+        while self._running:
+            ret, frame = source.read()
+            with self._cond:
+                if ret:
+                    self._frame = frame
+                    self._seq += 1
+                    self.frames += 1
+                    self._cond.notify_all()
+            if not ret:
+                time.sleep(0.01)
+
+    def _release_view(self):
+        with self._cond:
+            self._refs -= 1
+            if self._refs > 0 or self._source is None:
+                return
+            if self.idle_timeout <= 0:
+                self._close()
+                return
+            self._close_timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+            self._close_timer.daemon = True
+            self._close_timer.start()
+
+    def _close_if_idle(self):
+        with self._cond:
+            if self._refs == 0:
+                self._close()
+
+    def _close(self):
+        # Called with the lock held; drops it while the capture thread winds down
+        self._running = False
+        self._closing = True
+        thread, source = self._thread, self._source
+        self._thread = self._source = None
+        self._frame = None
+        self._close_timer = None
+        self._cond.notify_all()
+        self._cond.release()
+        try:
+            if thread is not None:
+                thread.join()
+            source.release()
+        finally:
+            self._cond.acquire()
+            self._closing = False
+            self._cond.notify_all()
+
+    def close(self):
+        """Closes the device now, regardless of open views."""
+        with self._cond:
+            if self._close_timer is not None:
+                self._close_timer.cancel()
+            if self._source is not None and not self._closing:
+                self._close()
+
+    def next_frame(self, after_seq, timeout=READ_TIMEOUT):
+        """Waits for a frame newer than `after_seq`; returns (frame, seq) or (None, after_seq)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq or not self._running, timeout)
+            if self._seq <= after_seq or self._frame is None:
+                return None, after_seq
+            return self._frame, self._seq
+
+    def is_opened(self):
+        source = self._source
+        return source is not None and source.isOpened()
+
+    def get(self, prop):
+        source = self._source
+        return source.get(prop) if source is not None else 0.0
+
+    def set(self, prop, value):
+        if prop in _SESSION_PROPS:
+            return False
+        source = self._source
+        return source.set(prop, value) if source is not None else False
+
+    def stats(self):
+        with self._cond:
+            return {"index": self.index, "open": self._source is not None, "views": self._refs,
+                    "opens": self.opens, "frames": self.frames}
+
+
+class CameraView(FrameSource):
+    """One consumer's handle on a CameraSession; behaves like a CameraSource.
+
+    read() returns each new frame at most once per view, as the view's own
+    copy, so consumers can draw on it. Session-wide properties (size, FPS,
+    buffer size) can't be changed through a view. release() only gives the
+    view back; the session decides when the device closes.
+    """
+
+    live = True
+
+    def __init__(self, session, seq):
+        super().__init__(fps=session.fps, realtime=False)
+        self.session = session
+        self.opened_at = session.opened_at
+        self._seq = seq
+        self._released = False
+
+    def read(self, image=None):
+        if self._released:
+            return False, None
+        frame, self._seq = self.session.next_frame(self._seq)
+        if frame is None:
+            return False, None
+        self.frames_read += 1
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            return True, image
+        return True, frame.copy()
+
+    def isOpened(self):
+        return not self._released and self.session.is_opened()
+
+    def set(self, prop, value):
+        return self.session.set(prop, value)
+
+    def get(self, prop):
+        return self.session.get(prop)
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.session._release_view()
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(index=0):
+    with _sessions_lock:
+        if index not in _sessions:
+            _sessions[index] = CameraSession(index)
+        return _sessions[index]
+
+
+def open_camera(index=0):
+    """A new view on the process-wide session for camera `index`."""
+    return get_session(index).acquire()
+
+
+def wait_until_settled(cap, seconds=SETTLE_SECONDS):
+    """Gives a freshly opened live camera time to settle exposure.
+
+    Returns at once for a shared camera that has already been open that
+    long, e.g. right after the health check or another consumer.
+    """
+    if not getattr(cap, "live", True):
+        return
+    opened_at = getattr(cap, "opened_at", None)
+    remaining = seconds if opened_at is None else seconds - (time.perf_counter() - opened_at)
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+def close_all():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    for session in sessions:
+        session.close()
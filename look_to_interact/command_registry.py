@@ -0,0 +1,203 @@
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+from difflib import SequenceMatcher
+from frame_grabber import LatencyMeter
+
+FUZZY_CUTOFF = 0.85      # per-word similarity needed to accept a misheard word ("scrolls" → "scroll")
+FUZZY_MIN_LENGTH = 5     # shorter words must match exactly ("next" is not "exit")
+
+# Everyday words that sound like commands; none of them may trigger an action
+COMMON_NEAR_MISSES = [
+    "next", "text", "edit", "exact", "exits", "excite", "lick", "kick", "clicked", "clock", "quick",
+    "tape recorder", "typed", "types", "hype", "pen", "often", "opens", "scroll", "scrolling up",
+    "double", "trouble click", "down", "up",
+]
+
+# lane: "input" actions (pointer, keyboard) run in order on one worker;
+# "launch" actions (apps, browser) run on their own worker so they never hold up input
+# fuzzy: whether misheard words may match; only ever for multi-word commands
+Command = namedtuple("Command", ["name", "pattern", "handler", "lane", "debounce", "fuzzy"])
+CommandMatch = namedtuple("CommandMatch", ["command", "args", "score", "text"])
+
+_PLACEHOLDER = re.compile(r"^\{(\w+)\}$")
+
+
+def _normalize(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _word_score(heard, expected, fuzzy):
+    if heard == expected:
+        return 1.0
+    if not fuzzy or min(len(heard), len(expected)) < FUZZY_MIN_LENGTH:
+        return 0.0
+    ratio = SequenceMatcher(None, heard, expected).ratio()
+    return ratio if ratio >= FUZZY_CUTOFF else 0.0
+
+
+class _Node:
+    __slots__ = ("children", "command", "capture", "fuzzy")
+
+    def __init__(self, fuzzy):
+        self.children = {}
+        self.command = None
+        self.capture = None  # (argument name, command) for a trailing {placeholder}
+        self.fuzzy = fuzzy   # may the word leading here be misheard; False once any exact-only command uses it
+
+
+class CommandRegistry:
+    """Voice commands compiled into one word-level prefix trie.
+
+    Patterns are phrases like "scroll up" or "open {app}"; a {placeholder}
+    must be last and captures the rest of the utterance. Words must match
+    exactly unless the command is registered with fuzzy=True and has at
+    least two fixed words; then long words may be slightly misheard
+    (FUZZY_CUTOFF, FUZZY_MIN_LENGTH). One utterance can hold several closed
+    commands in a row, e.g. "scroll down scroll down click".
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self._root = _Node(fuzzy=False)
+
+    def register(self, pattern, handler, name=None, lane="input", debounce=0.0, fuzzy=False):
+        words = pattern.split()
+        name = name or pattern
+        fixed_words = [w for w in words if not _PLACEHOLDER.match(w)]
+        fuzzy = fuzzy and len(fixed_words) >= 2
+        command = self.commands.get(name) or Command(name, pattern, handler, lane, debounce, fuzzy)
+        self.commands[name] = command
+
+        node = self._root
+        for index, word in enumerate(words):
+            placeholder = _PLACEHOLDER.match(word)
+            if placeholder:
+                if index != len(words) - 1:
+                    raise ValueError(f"Placeholder must end the pattern: '{pattern}'")
+                node.capture = (placeholder.group(1), command)
+                return command
+            child = node.children.setdefault(_normalize(word), _Node(fuzzy))
+            child.fuzzy = child.fuzzy and fuzzy
+            node = child
+        node.command = command
+        return command
+
+    def _completions(self, node, heard, original, i, score):
+        """Yields (end, command, args, score) for every command that starts at word i."""
+        if node.command is not None:
+            yield i, node.command, {}, score
+        if i >= len(heard):
+            return
+        if node.capture is not None:
+            arg, command = node.capture
+            yield len(heard), command, {arg: " ".join(original[i:])}, score
+        for word, child in node.children.items():
+            s = _word_score(heard[i], word, child.fuzzy)
+            if s:
+                yield from self._completions(child, heard, original, i + 1, score * s)
+
+    def match(self, text):
+        """Splits `text` into the best-scoring sequence of commands; [] if it isn't one."""
+        original = [w for w in text.split() if _normalize(w)]
+        heard = [_normalize(w) for w in original]
+        n = len(heard)
+        if n == 0:
+            return []
+
+        # best[i]: (score, matches) for the words from i onwards
+        best = [None] * n + [(1.0, [])]
+        for i in range(n - 1, -1, -1):
+            for end, command, args, score in self._completions(self._root, heard, original, i, 1.0):
+                if end == i or best[end] is None:
+                    continue
+                rest_score, rest = best[end]
+                candidate = (score * rest_score,
+                             [CommandMatch(command, args, score, " ".join(original[i:end]))] + rest)
+                if (best[i] is None or candidate[0] > best[i][0]
+                        or (candidate[0] == best[i][0] and len(candidate[1]) < len(best[i][1]))):
+                    best[i] = candidate
+        return best[0][1] if best[0] is not None else []
+
+    def near_misses(self, phrases=COMMON_NEAR_MISSES):
+        """The phrases that would trigger an action; should be empty."""
+        return [phrase for phrase in phrases if self.match(phrase)]
+
+    def check_near_misses(self, phrases=COMMON_NEAR_MISSES):
+        """Raises ValueError if an everyday word would run a command."""
+        misses = self.near_misses(phrases)
+        if misses:
+            raise ValueError(f"Voice commands match ordinary speech: {', '.join(misses)}")
+
+
+class ActionExecutor:
+    """Runs matched commands off the listening thread.
+
+    Each lane has one worker, so actions in a lane keep their spoken order.
+    A command repeated within its `debounce` seconds is dropped. Time spent
+    queued and running is tracked per command.
+    """
+
+    LANES = ("input", "launch")
+
+    def __init__(self):
+        self.run_times = {}
+        self.queue_latency = LatencyMeter()
+        self.executed = self.debounced = self.failed = 0
+        self._last = {}
+        self._lock = threading.Lock()
+        self._queues = {lane: queue.Queue() for lane in self.LANES}
+        self._workers = [threading.Thread(target=self._work, args=(q,), name=f"actions-{lane}", daemon=True)
+                         for lane, q in self._queues.items()]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, match):
+        command = match.command
+        now = time.perf_counter()
+        with self._lock:
+            if now - self._last.get(command.name, float("-inf")) < command.debounce:
+                self.debounced += 1
+                return False
+            self._last[command.name] = now
+        self._queues[command.lane].put((match, now))
+        return True
+
+    def _work(self, actions):
+        while True:
+            item = actions.get()
+            if item is None:
+                return
+            match, queued_at = item
+            start = time.perf_counter()
+            self.queue_latency.add(start - queued_at)
+            try:
+                match.command.handler(**match.args)
+                self.executed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Error running '{match.command.name}': {e}")
+            with self._lock:
+                meter = self.run_times.setdefault(match.command.name, LatencyMeter())
+            meter.add(time.perf_counter() - start)
+
+    def stop(self, timeout=1.0):
+        for actions in self._queues.values():
+            actions.put(None)
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+
+    def report(self):
+        waited = self.queue_latency.summary()
+        line = f"⚙️ Actions {self.executed}, failed {self.failed}, debounced {self.debounced}"
+        if waited:
+            line += f" | queue p95 {waited['p95_ms']:.0f} ms"
+        print(line)
+        with self._lock:
+            meters = list(self.run_times.items())
+        for name, meter in meters:
+            summary = meter.summary()
+            if summary:
+                print(f"   {name}: p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms")
@@ -0,0 +1,126 @@
+import threading
+import time
+
+STOPPED = "stopped"
+STARTING = "starting"
+RUNNING = "running"
+STOPPING = "stopping"
+FAILED = "failed"
+
+
+class ControllerSession:
+    """Runs VoiceGazeController on a thread of the current process.
+
+    The controller reuses everything the process has already loaded: the
+    warm FaceMesh engines, the speech backend and the noise profile. No new
+    interpreter is started, so this also works from a frozen build. Only one
+    controller runs at a time; start() while it is running is a no-op.
+    """
+
+    def __init__(self, factory=None):
+        self.factory = factory
+        self.state = STOPPED
+        self.controller = None
+        self.error = None
+        self.started_at = None
+        self.first_tracked_s = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, source=None, preview=True):
+        with self._lock:
+            if self.state in (STARTING, RUNNING, STOPPING):
+                return self
+            self.state = STARTING
+            self.error = None
+            self.first_tracked_s = None
+            self.started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, args=(source, preview),
+                                            name="gaze-controller", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self, source, preview):
+        controller = None
+        final = STOPPED
+        try:
+            factory = self.factory
+            if factory is None:
+                from voice_commands import VoiceGazeController as factory
+            controller = factory()
+            with self._lock:
+                self.controller = controller
+                if self.state == STOPPING:
+                    controller.running = False
+                else:
+                    self.state = RUNNING
+            controller.run_gaze_control(source, preview=preview)
+        except Exception as e:
+            print(f"❌ Gaze control failed: {e}")
+            self.error = e
+            final = FAILED
+        finally:
+            if controller is not None:
+                controller.running = False  # also ends the voice thread
+                if controller.first_tracked_at is not None:
+                    self.first_tracked_s = controller.first_tracked_at - self.started_at
+            with self._lock:
+                self.state = final
+                self.controller = None
+
+    def stop(self, timeout=5.0):
+        """Asks the controller to finish and waits up to `timeout` seconds; returns the state."""
+        with self._lock:
+            if self.state in (STARTING, RUNNING):
+                self.state = STOPPING
+            if self.controller is not None:
+                self.controller.running = False
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.state
+
+    def wait(self):
+        """Blocks until the controller exits (e.g. after the "exit" voice command)."""
+        thread = self._thread
+        while thread is not None and thread.is_alive():
+            thread.join(0.5)
+
+    def is_active(self):
+        return self.state in (STARTING, RUNNING, STOPPING)
+
+    def status(self):
+        with self._lock:
+            controller = self.controller
+            status = {"state": self.state,
+                      "uptime_s": (time.perf_counter() - self.started_at
+                                   if self.started_at is not None and self.state != STOPPED else 0.0),
+                      "first_tracked_s": self.first_tracked_s,
+                      "error": str(self.error) if self.error else None}
+        if controller is not None and controller.first_tracked_at is not None:
+            status["first_tracked_s"] = controller.first_tracked_at - self.started_at
+        return status
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = ControllerSession()
+        return _session
+
+
+def start_controller(source=None, preview=True):
+    return get_session().start(source, preview)
+
+
+def stop_controller(timeout=5.0):
+    return get_session().stop(timeout)
+
+
+def controller_status():
+    return get_session().status()
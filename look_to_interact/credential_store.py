@@ -0,0 +1,403 @@
+import glob
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import voice_features
+
+# 📁 Path resolution (for .py or .exe)
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CREDENTIALS_DIR = os.path.join(BASE_DIR, "credentials")
+STORE_FILE = os.path.join(CREDENTIALS_DIR, "credential_store.bin")
+
+# Files written by older versions; migrated into the store the first time it is opened
+LEGACY_GAZE_FILE = os.path.join(CREDENTIALS_DIR, "gaze_vector.txt")
+LEGACY_VOICE_GLOBS = (os.path.join(CREDENTIALS_DIR, "voice_sample_*.wav"),
+                      os.path.join(CREDENTIALS_DIR, "voice_reference.wav"))
+LEGACY_FACE_FILE = os.path.join(BASE_DIR, "auth_data", "face_encodings.pkl")
+LEGACY_PASSPHRASE_FILE = os.path.join(BASE_DIR, "auth_data", "voice_passphrase.txt")
+
+DEFAULT_USER = "default"
+
+MAGIC = b"EYEVOXCS"
+STORE_VERSION = 1
+GAZE_DIM = 4                              # face_landmarks.gaze_vector
+VOICE_DIM = 2 * (voice_features.N_MFCC - 1)  # voice_features.compute_embedding
+FACE_DIM = 128                            # face_recognition encodings
+MAX_VOICE_SAMPLES = 8                     # newest samples kept per user
+MAX_USER_BYTES = 64
+MAX_METADATA_BYTES = 256
+INITIAL_CAPACITY = 16                     # records allocated in a new file
+
+ALIVE, HAS_GAZE, HAS_FACE = 1, 2, 4
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("record_size", "<u4"),
+    ("count", "<u4"),          # records written; bumping it commits an append
+    ("capacity", "<u4"),       # records the file has room for
+    ("gaze_dim", "<u4"),
+    ("voice_dim", "<u4"),
+    ("max_voice", "<u4"),
+    ("face_dim", "<u4"),
+    ("embedding_version", "<u4"),
+    ("removed", "<u4"),        # bumped when a record is removed in place
+    ("reserved", "V16"),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+
+def record_dtype(gaze_dim=GAZE_DIM, voice_dim=VOICE_DIM, max_voice=MAX_VOICE_SAMPLES, face_dim=FACE_DIM):
+    return np.dtype([
+        ("user", f"S{MAX_USER_BYTES}"),
+        ("flags", "<u4"),
+        ("voice_count", "<u4"),
+        ("enrolled_at", "<f8"),
+        ("updated_at", "<f8"),
+        ("gaze", "<f4", (gaze_dim,)),
+        ("voice", "<f4", (max_voice, voice_dim)),
+        ("face", "<f4", (face_dim,)),
+        ("metadata", f"S{MAX_METADATA_BYTES}"),
+    ])
+
+
+UserCredentials = namedtuple("UserCredentials",
+                             ["user", "gaze", "voice", "face", "metadata", "enrolled_at", "updated_at"])
+
+
+class CredentialStore:
+    """Every enrolled user's templates in one memory-mapped binary file.
+
+    The file is a fixed header followed by fixed-size records (gaze
+    template, voice embeddings, face encoding, JSON metadata), so a user's
+    templates are read straight from the mapping through an in-memory
+    name → row index. Enrolling appends a record and then bumps the header
+    count, which is what makes it visible; the superseded record is only
+    marked dead afterwards, and the newest record for a name wins. When
+    the file is full it is compacted into a larger one written next to it
+    and swapped in with os.replace. One writer at a time is assumed.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._map = None
+        self._header = None
+        self._records = None
+        self._stamp = None
+        self._count = 0
+        self._index = {}
+
+    # ---------------- Mapping ----------------
+    def _open(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._close_map()
+            self._count, self._index = 0, {}
+            return False
+        stamp = (stat.st_ino, stat.st_size)
+        if stamp == self._stamp:
+            return True
+
+        # Validate a copy of the header before mapping anything
+        header = np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header[0]["magic"] != MAGIC or int(header[0]["version"]) != STORE_VERSION:
+            raise ValueError(f"Unsupported credential store: {self.path}")
+        header = header[0]
+        dtype = record_dtype(int(header["gaze_dim"]), int(header["voice_dim"]),
+                             int(header["max_voice"]), int(header["face_dim"]))
+        if dtype.itemsize != int(header["record_size"]):
+            raise ValueError(f"Corrupt credential store header: {self.path}")
+        end = HEADER_SIZE + int(header["capacity"]) * dtype.itemsize
+
+        self._close_map()
+        with open(self.path, "r+b") as f:
+            self._map = mmap.mmap(f.fileno(), 0)
+        mapped = np.frombuffer(self._map, dtype=np.uint8)
+        self._header = mapped[:HEADER_SIZE].view(HEADER_DTYPE)[0]
+        self._records = mapped[HEADER_SIZE:end].view(dtype)
+        self._stamp = stamp
+        self._count, self._index = 0, {}
+        return True
+
+    def refresh(self):
+        """Picks up records written since the last call (here or by another process)."""
+        with self._lock:
+            if not self._open():
+                return False
+            count = int(self._header["count"])
+            for row in range(self._count, count):
+                record = self._records[row]
+                if record["flags"] & ALIVE:
+                    self._index[record["user"].decode("utf-8")] = row
+            self._count = count
+            return True
+
+    def _flush(self):
+        self._map.flush()
+
+    def _close_map(self):
+        # The NumPy views hold the map open; drop them first (Windows can't
+        # replace or remap a file that is still mapped)
+        mapped = self._map
+        self._map = self._header = self._records = None
+        self._stamp = None
+        if mapped is not None:
+            mapped.flush()
+            mapped.close()
+
+    def revision(self):
+        """Changes whenever users are added, updated or removed (cheap enough to poll)."""
+        with self._lock:
+            if not self.refresh():
+                return None
+            return self._stamp, self._count, int(self._header["removed"])
+
+    def embedding_version(self):
+        with self._lock:
+            if not self.refresh():
+                return voice_features.EMBEDDING_VERSION
+            return int(self._header["embedding_version"])
+
+    # ---------------- Reading ----------------
+    def _live_rows(self):
+        # Another process may have removed a user since the index was built
+        return {user: row for user, row in self._index.items() if self._records[row]["flags"] & ALIVE}
+
+    def users(self):
+        with self._lock:
+            self.refresh()
+            return sorted(self._live_rows())
+
+    def _row(self, user):
+        row = self._index.get(user)
+        if row is None or not self._records[row]["flags"] & ALIVE:
+            return None
+        return row
+
+    def get(self, user=DEFAULT_USER):
+        """The user's templates as a UserCredentials, or None if not enrolled."""
+        with self._lock:
+            self.refresh()
+            row = self._row(user)
+            if row is None:
+                return None
+            return self._unpack(self._records[row])
+
+    def _unpack(self, record):
+        flags = int(record["flags"])
+        voice = record["voice"][:int(record["voice_count"])]
+        if int(self._header["embedding_version"]) != voice_features.EMBEDDING_VERSION:
+            voice = voice[:0]  # made with an older feature recipe; re-enroll to replace
+        return UserCredentials(
+            user=record["user"].decode("utf-8"),
+            gaze=np.array(record["gaze"], dtype=np.float64) if flags & HAS_GAZE else None,
+            voice=np.array(voice),
+            face=np.array(record["face"], dtype=np.float64) if flags & HAS_FACE else None,
+            metadata=json.loads(record["metadata"].decode("utf-8") or "{}"),
+            enrolled_at=float(record["enrolled_at"]),
+            updated_at=float(record["updated_at"]),
+        )
+
+    def arrays(self):
+        """(users, records) for every live user, records stacked in one structured array."""
+        with self._lock:
+            self.refresh()
+            if self._records is None:
+                return [], np.zeros(0, dtype=record_dtype())
+            rows = sorted(self._live_rows().values())
+            return [self._records[row]["user"].decode("utf-8") for row in rows], self._records[rows]
+
+    # ---------------- Writing ----------------
+    def enroll(self, user=DEFAULT_USER, gaze=None, voice=None, face=None, metadata=None, add_voice=False):
+        """Creates or updates a user's record; fields left as None keep their stored value.
+
+        `voice` is one embedding or a list of them. They replace the stored
+        samples unless `add_voice` is True; only the newest MAX_VOICE_SAMPLES
+        are kept.
+        """
+        name = user.encode("utf-8")
+        if not name or len(name) > MAX_USER_BYTES:
+            raise ValueError(f"User name must be 1-{MAX_USER_BYTES} bytes: '{user}'")
+
+        with self._lock:
+            self.refresh()
+            buffer = np.zeros(1, dtype=self._records.dtype if self._records is not None else record_dtype())
+            row = self._row(user) if self._records is not None else None
+            now = time.time()
+            if row is not None:
+                buffer[0] = self._records[row]
+            record = buffer[0]
+            if row is None:
+                record["user"] = name
+                record["enrolled_at"] = now
+            record["flags"] |= ALIVE
+            record["updated_at"] = now
+
+            if gaze is not None:
+                record["gaze"] = np.asarray(gaze, dtype=np.float32).reshape(record["gaze"].shape)
+                record["flags"] |= HAS_GAZE
+            if face is not None:
+                record["face"] = np.asarray(face, dtype=np.float32).reshape(record["face"].shape)
+                record["flags"] |= HAS_FACE
+            if voice is not None:
+                samples = np.asarray(voice, dtype=np.float32).reshape(-1, record["voice"].shape[1])
+                if add_voice:
+                    samples = np.concatenate((record["voice"][:int(record["voice_count"])], samples))
+                samples = samples[-record["voice"].shape[0]:]
+                record["voice"] = 0
+                record["voice"][:len(samples)] = samples
+                record["voice_count"] = len(samples)
+            if metadata is not None:
+                merged = json.loads(record["metadata"].decode("utf-8") or "{}")
+                merged.update(metadata)
+                encoded = json.dumps(merged, separators=(",", ":")).encode("utf-8")
+                if len(encoded) > MAX_METADATA_BYTES:
+                    raise ValueError(f"Metadata for '{user}' exceeds {MAX_METADATA_BYTES} bytes")
+                record["metadata"] = encoded
+
+            self._append(record, replaces=row)
+            return self.get(user)
+
+    def _append(self, record, replaces=None):
+        if self._records is None or self._count >= len(self._records):
+            self._rewrite(extra=record)
+            return
+        row = self._count
+        self._records[row] = record
+        self._flush()
+        self._header["count"] = row + 1  # commit point
+        self._flush()
+        if replaces is not None:
+            self._records["flags"][replaces] = int(self._records["flags"][replaces]) & ~ALIVE
+            self._flush()
+        self.refresh()
+
+    def remove(self, user):
+        with self._lock:
+            self.refresh()
+            row = self._row(user)
+            if row is None:
+                return False
+            self._records["flags"][row] = int(self._records["flags"][row]) & ~ALIVE
+            self._header["removed"] = int(self._header["removed"]) + 1
+            self._flush()
+            del self._index[user]
+            return True
+
+    def _rewrite(self, extra=None, headroom=None):
+        """Writes the live records (plus `extra`) to a new file and swaps it in.
+
+        The new file has room for `headroom` more records (default: as many
+        as it holds, so appends stay amortized O(1)).
+        """
+        # Copies, not views: the map is closed before the swap
+        live = list(np.array(self._records[sorted(self._live_rows().values())])) if self._records is not None else []
+        if extra is not None:
+            name = extra["user"]
+            live = [r for r in live if r["user"] != name] + [extra]
+        dtype = extra.dtype if extra is not None else self._records.dtype
+        capacity = max(INITIAL_CAPACITY, len(live) + (len(live) if headroom is None else headroom))
+
+        header = np.zeros((), dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = STORE_VERSION
+        header["record_size"] = dtype.itemsize
+        header["count"] = len(live)
+        header["capacity"] = capacity
+        header["gaze_dim"] = dtype["gaze"].shape[0]
+        header["voice_dim"] = dtype["voice"].shape[1]
+        header["max_voice"] = dtype["voice"].shape[0]
+        header["face_dim"] = dtype["face"].shape[0]
+        header["embedding_version"] = (self._header["embedding_version"] if self._header is not None
+                                       else voice_features.EMBEDDING_VERSION)
+        records = np.zeros(capacity, dtype=dtype)
+        for row, record in enumerate(live):
+            records[row] = record
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header.tobytes())
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._close_map()
+        os.replace(tmp, self.path)
+        self.refresh()
+
+    def compact(self):
+        """Drops dead records (superseded or removed users) from the file."""
+        with self._lock:
+            if self.refresh():
+                self._rewrite(headroom=INITIAL_CAPACITY)
+
+
+# ---------------- Migration ----------------
+def migrate_legacy(store, user=DEFAULT_USER):
+    """Copies the old per-file credentials into `store` as `user`; returns True if any were found."""
+    gaze = face = None
+    metadata = {}
+    try:
+        with open(LEGACY_GAZE_FILE, "r") as f:
+            values = np.array(f.read().split(), dtype=np.float64)
+        if values.size == GAZE_DIM:
+            gaze = values
+    except (OSError, ValueError):
+        pass
+
+    voice_files = sorted(path for pattern in LEGACY_VOICE_GLOBS for path in glob.glob(pattern))
+    voice = []
+    for path in voice_files:
+        try:
+            voice.append(voice_features.load_embedding(path))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping voice sample {os.path.basename(path)}: {e}")
+
+    if os.path.exists(LEGACY_FACE_FILE):
+        import pickle
+        try:
+            with open(LEGACY_FACE_FILE, "rb") as f:
+                encodings = np.asarray(pickle.load(f), dtype=np.float64)
+            face = encodings.reshape(-1, FACE_DIM)[0]
+        except (OSError, ValueError, pickle.UnpicklingError) as e:
+            print(f"⚠️ Skipping face encodings: {e}")
+
+    try:
+        with open(LEGACY_PASSPHRASE_FILE, "r") as f:
+            metadata["passphrase"] = f.read().strip()
+    except OSError:
+        pass
+
+    if gaze is None and face is None and not voice and not metadata:
+        return False
+    metadata["migrated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    store.enroll(user, gaze=gaze, voice=voice or None, face=face, metadata=metadata)
+    print(f"📦 Migrated legacy credentials into {os.path.basename(store.path)} as '{user}'.")
+    return True
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=STORE_FILE):
+    """The process-wide store for `path`, migrating the legacy files if it doesn't exist yet."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = CredentialStore(path)
+            if not store.refresh() and path == STORE_FILE:
+                migrate_legacy(store)
+            _stores[path] = store
+    return store
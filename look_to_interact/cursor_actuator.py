@@ -0,0 +1,238 @@
+import math
+import queue
+import threading
+import time
+import numpy as np
+import pyautogui
+from frame_grabber import LatencyMeter
+
+
+# ------------------------- Filters -------------------------
+class _LowPass:
+    def __init__(self):
+        self.value = None
+
+    def apply(self, x, alpha):
+        self.value = x if self.value is None else alpha * x + (1 - alpha) * self.value
+        return self.value
+
+
+class OneEuroFilter:
+    """One-Euro filter (Casiez et al.): smooth when still, responsive when moving."""
+
+    extrapolates = False
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = _LowPass()
+        self._dx = _LowPass()
+        self._last_t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self._x = _LowPass()
+        self._dx = _LowPass()
+        self._last_t = None
+
+    def update(self, point, t):
+        point = np.asarray(point, dtype=np.float64)
+        if self._last_t is None:
+            self._last_t = t
+            self._dx.apply(np.zeros_like(point), 1.0)
+            return self._x.apply(point, 1.0)
+
+        dt = max(t - self._last_t, 1e-3)
+        self._last_t = t
+        dx = (point - self._x.value) / dt
+        edx = self._dx.apply(dx, self._alpha(self.d_cutoff, dt))
+        cutoff = self.min_cutoff + self.beta * np.linalg.norm(edx)
+        return self._x.apply(point, self._alpha(cutoff, dt))
+
+    def predict(self, t):
+        return self._x.value
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter over (x, y, vx, vy)."""
+
+    extrapolates = True
+
+    def __init__(self, process_noise=500.0, measurement_noise=400.0):
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        # Unknown initial velocity: start with a wide prior on it
+        self.P = np.diag([self.r, self.r, 1e6, 1e6])
+        self._last_t = None
+
+    def _transition(self, dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        # Piecewise white-acceleration process noise
+        g = np.array([0.5 * dt * dt, 0.5 * dt * dt, dt, dt])
+        Q = np.diag(g * g) * self.q
+        return F, Q
+
+    def update(self, point, t):
+        z = np.asarray(point, dtype=np.float64)
+        if self.state is None:
+            self.state = np.array([z[0], z[1], 0.0, 0.0])
+            self._last_t = t
+            return self.state[:2].copy()
+
+        dt = max(t - self._last_t, 1e-3)
+        self._last_t = t
+        F, Q = self._transition(dt)
+        self.state = F @ self.state
+        self.P = F @ self.P @ F.T + Q
+
+        # Position-only measurement: H = [I 0]
+        S = self.P[:2, :2] + np.eye(2) * self.r
+        K = self.P[:, :2] @ np.linalg.inv(S)
+        self.state = self.state + K @ (z - self.state[:2])
+        self.P = self.P - K @ self.P[:2, :]
+        return self.state[:2].copy()
+
+    def predict(self, t):
+        # Extrapolate between samples so the cursor keeps moving at display rate
+        if self.state is None:
+            return None
+        dt = min(max(t - self._last_t, 0.0), 0.1)
+        return self.state[:2] + self.state[2:] * dt
+
+
+class PassthroughFilter:
+    extrapolates = False
+
+    def __init__(self):
+        self.value = None
+
+    def reset(self):
+        self.value = None
+
+    def update(self, point, t):
+        self.value = np.asarray(point, dtype=np.float64)
+        return self.value
+
+    def predict(self, t):
+        return self.value
+
+
+FILTERS = {
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+    "none": PassthroughFilter,
+}
+
+
+def make_filter(name="one_euro", **params):
+    try:
+        return FILTERS[name](**params)
+    except KeyError:
+        raise ValueError(f"Unknown cursor filter '{name}' (choose from {', '.join(FILTERS)})")
+
+
+# ------------------------- Actuator -------------------------
+class CursorActuator:
+    """Moves the mouse from its own thread so the vision loop never blocks on it.
+
+    Producers call submit() with raw screen coordinates; the actuator drains the
+    queue, filters the samples and pushes at most one cursor update per display
+    refresh.
+    """
+
+    def __init__(self, filter_name="one_euro", rate_hz=60, min_step=1.0,
+                 move_fn=None, **filter_params):
+        self.filter = make_filter(filter_name, **filter_params)
+        self.interval = 1.0 / rate_hz
+        self.min_step = min_step
+        # _pause=False skips pyautogui's global post-call sleep; the actuator paces itself
+        self.move_fn = move_fn or (lambda x, y: pyautogui.moveTo(x, y, _pause=False))
+        self.samples = queue.Queue(maxsize=64)
+        self.running = False
+        self._thread = None
+        self._last_pos = None
+        self._newest_sample_t = None
+        self.latency = LatencyMeter()
+        self.moves = 0
+        self.dropped = 0
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="cursor-actuator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def submit(self, x, y, t=None):
+        """Queues a raw gaze sample; never blocks the caller.
+
+        Pass the frame's capture time as `t` so filtering and latency use it.
+        """
+        sample = (x, y, time.perf_counter() if t is None else t)
+        try:
+            self.samples.put_nowait(sample)
+        except queue.Full:
+            # Consumer fell behind: the oldest sample is the least useful one
+            try:
+                self.samples.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            self.samples.put_nowait(sample)
+
+    def reset(self):
+        self.filter.reset()
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while self.running:
+            got_sample = False
+            while True:
+                try:
+                    x, y, t = self.samples.get_nowait()
+                except queue.Empty:
+                    break
+                self.filter.update((x, y), t)
+                self._newest_sample_t = t
+                got_sample = True
+
+            now = time.perf_counter()
+            target = self.filter.predict(now)
+            if target is not None and (got_sample or self.filter.extrapolates):
+                if self._move(target) and got_sample:
+                    self.latency.add(time.perf_counter() - self._newest_sample_t)
+
+            next_tick += self.interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+
+    def _move(self, target):
+        if self._last_pos is not None and np.hypot(*(target - self._last_pos)) < self.min_step:
+            return False
+        try:
+            self.move_fn(float(target[0]), float(target[1]))
+        except pyautogui.FailSafeException:
+            print("⚠️ Cursor fail-safe triggered; stopping actuator.")
+            self.running = False
+            return False
+        self._last_pos = np.array(target, dtype=np.float64)
+        self.moves += 1
+        return True
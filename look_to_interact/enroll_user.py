@@ -1,22 +1,20 @@
 import os
+import sys
 import numpy as np
 import cv2
-import mediapipe as mp
 import time
 import wavio
-import sounddevice as sd
-
-CREDENTIALS_DIR = "credentials"
-GAZE_VECTOR_FILE = os.path.join(CREDENTIALS_DIR, "gaze_vector.txt")
-VOICE_REFERENCE_FILE = os.path.join(CREDENTIALS_DIR, "voice_reference.wav")
-
-os.makedirs(CREDENTIALS_DIR, exist_ok=True)
+import vad_recorder
+import landmark_engine
+import frame_sources
+import voice_features
+import face_landmarks
+import credential_store
 
 # 🎯 Gaze extractor with visual camera feed
-def extract_gaze_with_preview():
-    cap = cv2.VideoCapture(0)
-    mp_face_mesh = mp.solutions.face_mesh
-    face_mesh = mp_face_mesh.FaceMesh(static_image_mode=False, refine_landmarks=True)
+def extract_gaze_with_preview(source=None, preview=True):
+    cap = frame_sources.open_source(source)
+    face_mesh = landmark_engine.get_engine(static_image_mode=False)
 
     gaze_vector = None
     start_time = time.time()
@@ -25,72 +23,77 @@ def extract_gaze_with_preview():
     while time.time() - start_time < 5:
         ret, frame = cap.read()
         if not ret:
+            if frame_sources.is_exhausted(cap):
+                break
             continue
 
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = face_mesh.process(rgb)
 
-        if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                # Draw facial landmarks
-                for i in [468, 469, 470, 471, 472, 473, 474, 475, 476, 477]:
-                    pt = face_landmarks.landmark[i]
-                    x, y = int(pt.x * frame.shape[1]), int(pt.y * frame.shape[0])
-                    cv2.circle(frame, (x, y), 2, (0, 255, 0), -1)
+        points = face_landmarks.from_results(results)
+        if points is not None:
+            # Draw iris landmarks
+            iris_px = face_landmarks.to_pixels(points[face_landmarks.IRIS_POINTS], frame.shape[1], frame.shape[0])
+            for x, y in iris_px.astype(np.int32):
+                cv2.circle(frame, (int(x), int(y)), 2, (0, 255, 0), -1)
 
-                left_eye = np.mean([[face_landmarks.landmark[i].x, face_landmarks.landmark[i].y] for i in range(468, 473)], axis=0)
-                right_eye = np.mean([[face_landmarks.landmark[i].x, face_landmarks.landmark[i].y] for i in range(473, 478)], axis=0)
-                gaze_vector = np.concatenate((left_eye, right_eye))
+            gaze_vector = face_landmarks.gaze_vector(points)
 
-        cv2.putText(frame, "Look straight - capturing gaze", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.imshow("Gaze Enrollment", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+        if preview:
+            cv2.putText(frame, "Look straight - capturing gaze", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            cv2.imshow("Gaze Enrollment", frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
 
     cap.release()
-    cv2.destroyAllWindows()
+    if preview:
+        cv2.destroyAllWindows()
     return gaze_vector
 
-# 🎤 Voice recorder with countdown animation
-def record_voice_with_animation(output_file, duration=3, samplerate=44100):
+# 🎤 Voice recorder: starts when the user speaks, stops when they finish; returns the voice embedding
+def record_voice_with_animation(output_file=None, duration=3, samplerate=44100):
     width, height = 500, 120
     win_name = "🎙️ Voice Recorder"
     cv2.namedWindow(win_name)
 
-    for i in range(3, 0, -1):
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        cv2.putText(frame, f"Recording in {i}...", (100, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 255), 4)
-        cv2.imshow(win_name, frame)
-        cv2.waitKey(1000)
-
     frame = np.zeros((height, width, 3), dtype=np.uint8)
-    cv2.putText(frame, "Recording...", (130, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 4)
+    cv2.putText(frame, "Speak now...", (120, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 4)
     cv2.imshow(win_name, frame)
-    cv2.waitKey(500)
+    cv2.waitKey(1)
 
-    recording = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='int16')
-    sd.wait()
-    wavio.write(output_file, recording, samplerate, sampwidth=2)
+    utterance = vad_recorder.record_utterance(samplerate, max_duration=duration)
+    print(f"⏱️ Utterance captured in {utterance.elapsed:.2f}s ({utterance.speech_seconds:.2f}s of speech)")
+    if output_file:
+        wavio.write(output_file, utterance.recording, samplerate, sampwidth=2)
+    embedding = voice_features.compute_embedding(utterance.recording, samplerate)
 
     frame = np.zeros((height, width, 3), dtype=np.uint8)
-    cv2.putText(frame, "✅ Voice saved!", (130, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 4)
+    message = "✅ Voice saved!" if utterance.speech_found else "No speech heard"
+    cv2.putText(frame, message, (110, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 4)
     cv2.imshow(win_name, frame)
-    cv2.waitKey(1000)
+    cv2.waitKey(500)
     cv2.destroyAllWindows()
+    return embedding if utterance.speech_found else None
 
 # 📝 Save gaze and voice credentials
-def enroll_user():
+def enroll_user(user=credential_store.DEFAULT_USER):
+    os.makedirs(credential_store.CREDENTIALS_DIR, exist_ok=True)
+    store = credential_store.get_store()
     gaze = extract_gaze_with_preview()
     if gaze is not None:
-        with open(GAZE_VECTOR_FILE, "w") as f:
-            f.write(" ".join(map(str, gaze)))
-        print("✅ Gaze vector saved.")
+        print("✅ Gaze vector captured.")
     else:
         print("❌ Failed to capture gaze vector.")
 
     print("🎤 Get ready to speak your authentication phrase...")
-    record_voice_with_animation(VOICE_REFERENCE_FILE)
-    print("✅ Enrollment complete.")
+    voice = record_voice_with_animation()
+    if voice is None:
+        print("❌ No voice sample captured.")
+
+    if gaze is not None or voice is not None:
+        store.enroll(user, gaze=gaze, voice=voice)
+        print(f"✅ Enrollment complete for '{user}'.")
 
 if __name__ == "__main__":
-    enroll_user()
+    # Optional argument: the user name to enroll (default: credential_store.DEFAULT_USER)
+    enroll_user(sys.argv[1] if len(sys.argv) > 1 else credential_store.DEFAULT_USER)
@@ -1,38 +1,43 @@
 import os
-import numpy as np
 import wavio
-import cv2
-import mediapipe as mp
-import time
-import subprocess
-from scipy.io.wavfile import read as read_wav
-from scipy.spatial.distance import cosine
-import sounddevice as sd
+import controller_session
+import vad_recorder
+import noise_profile
+import startup
 import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime
+import landmark_engine
+import face_landmarks
+import gaze_burst
+import voice_features
+import auth_pipeline
+import credential_store
 
 # ------------------------- File Paths -------------------------
 CREDENTIALS_DIR = "credentials"
 LOGS_DIR = "logs"
-GAZE_VECTOR_FILE = os.path.join(CREDENTIALS_DIR, "gaze_vector.txt")
-VOICE_REFERENCE_FILE = os.path.join(CREDENTIALS_DIR, "voice_reference.wav")
 VOICE_INPUT_FILE = os.path.join(CREDENTIALS_DIR, "voice_input.wav")
 
+# Also write each login recording to VOICE_INPUT_FILE (audit only; scoring stays in memory)
+AUDIT_VOICE_INPUT = False
+
+# Times the passphrase is asked for at registration before giving up on silence
+REGISTER_VOICE_ATTEMPTS = 3
+
 # ------------------------- Initialization -------------------------
 def initialize_system():
     os.makedirs(CREDENTIALS_DIR, exist_ok=True)
     os.makedirs(LOGS_DIR, exist_ok=True)
+    # Migrates gaze_vector.txt / voice_reference.wav from older versions on first run
+    credential_store.get_store()
 
-    if not os.path.exists(GAZE_VECTOR_FILE):
-        with open(GAZE_VECTOR_FILE, "w") as f:
-            f.write("0.5 " * 4)
-
-    if not os.path.exists(VOICE_REFERENCE_FILE):
-        dummy_audio = np.zeros((44100 * 3, 1), dtype='int16')
-        wavio.write(VOICE_REFERENCE_FILE, dummy_audio, 44100, sampwidth=2)
-
-initialize_system()
+def start_background_services():
+    """Warm-ups that would otherwise delay the first authentication."""
+    landmark_engine.warm_up()
+    # Keeps the shared noise floor current so voice capture starts without calibrating
+    noise_profile.get_profile().start_monitor()
+    startup.preload(["cv2", "frame_sources", "scipy.spatial.distance", "scipy.signal", "scipy.fft"])
 
 # ------------------------- Utility Functions -------------------------
 def log_event(message):
@@ -41,111 +46,131 @@ def log_event(message):
         log.write(f"[{timestamp}] {message}\n")
 
 def check_camera():
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        return False
-    ret, _ = cap.read()
-    cap.release()
-    return ret
+    import camera_session
+
+    # Opens the shared camera, which then stays open for the capture that follows
+    cap = camera_session.open_camera(0)
+    try:
+        return cap.isOpened() and cap.read()[0]
+    finally:
+        cap.release()
 
 def extract_gaze(frame):
-    mp_face_mesh = mp.solutions.face_mesh
-    with mp_face_mesh.FaceMesh(static_image_mode=True, refine_landmarks=True) as face_mesh:
-        results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        if results.multi_face_landmarks:
-            landmarks = results.multi_face_landmarks[0].landmark
-            left_eye = np.mean([[landmarks[i].x, landmarks[i].y] for i in range(468, 473)], axis=0)
-            right_eye = np.mean([[landmarks[i].x, landmarks[i].y] for i in range(473, 478)], axis=0)
-            return np.concatenate((left_eye, right_eye))
-    return None
-
-def record_voice(output_file, duration=3, samplerate=44100):
-    recording = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='int16')
-    sd.wait()
-    wavio.write(output_file, recording, samplerate, sampwidth=2)
+    face_mesh = landmark_engine.get_engine(static_image_mode=True)
+    points = face_landmarks.from_results(face_mesh.process_bgr(frame))
+    if points is None:
+        return None
+    return face_landmarks.gaze_vector(points)
+
+def record_voice(output_file=None, duration=3, samplerate=44100, cancel=None):
+    """Returns (recording, samplerate); recording is None when no speech was heard."""
+    utterance = vad_recorder.record_utterance(samplerate, max_duration=duration, cancel=cancel)
+    if output_file:
+        wavio.write(output_file, utterance.recording, samplerate, sampwidth=2)
+    if not utterance.speech_found:
+        log_event(f"VOICE no speech heard in {utterance.elapsed:.2f}s")
+        return None, samplerate
+    log_event(f"VOICE captured in {utterance.elapsed:.2f}s (speech {utterance.speech_seconds:.2f}s)")
+    return utterance.recording, samplerate
 
 def cosine_similarity(vec1, vec2):
     if vec1 is None or vec2 is None:
         return 0.0
+    from scipy.spatial.distance import cosine
     return 1 - cosine(vec1, vec2)
 
-def compare_voice():
+def compare_voice(recording, samplerate, voice_templates):
     try:
-        sr1, ref = read_wav(VOICE_REFERENCE_FILE)
-        sr2, inp = read_wav(VOICE_INPUT_FILE)
-        length = min(len(ref), len(inp))
-        return cosine_similarity(ref[:length].flatten(), inp[:length].flatten())
+        input_embedding = voice_features.compute_embedding(recording, samplerate)
+        scores = voice_features.score_templates(voice_templates, input_embedding)
+        return float(scores.max()) if len(scores) else 0.0
     except:
         return 0.0
 
 # ------------------------- Core Logic -------------------------
-def authenticate():
-    if not check_camera():
-        messagebox.showerror("Error", "Cannot access webcam.")
-        return False, 0.0, 0.0
+def verify_gaze(saved_gaze, source=None, cancel=None):
+    import frame_sources
 
-    cap = cv2.VideoCapture(0)
-    time.sleep(2)
-    ret, frame = cap.read()
-    cap.release()
-    if not ret:
-        return False, 0.0, 0.0
+    cap = frame_sources.open_source(source)
+    try:
+        burst = gaze_burst.stream_gaze_match(cap, extract_gaze, cosine_similarity, saved_gaze, cancel=cancel)
+    finally:
+        cap.release()
+    return burst.matched, burst.score
+
+def verify_voice(voice_templates, cancel=None):
+    recording, samplerate = record_voice(VOICE_INPUT_FILE if AUDIT_VOICE_INPUT else None, cancel=cancel)
+    if recording is None or (cancel is not None and cancel.is_set()):
+        return False, 0.0
+    voice_score = compare_voice(recording, samplerate, voice_templates)
+    return voice_score >= 0.85, voice_score
+
+def authenticate(source=None, user=credential_store.DEFAULT_USER):
+    if source is None and not check_camera():
+        messagebox.showerror("Error", "Cannot access webcam.")
+        return auth_pipeline.rejected("gaze")
 
-    current_gaze = extract_gaze(frame)
     try:
-        with open(GAZE_VECTOR_FILE, "r") as f:
-            saved_gaze = np.array(list(map(float, f.read().strip().split())))
-    except:
-        return False, 0.0, 0.0
-
-    gaze_score = cosine_similarity(current_gaze, saved_gaze)
-    if gaze_score < 0.85:
-        log_event(f"FAILED - Gaze mismatch ({gaze_score:.2f})")
-        return False, gaze_score, 0.0
-
-    record_voice(VOICE_INPUT_FILE)
-    voice_score = compare_voice()
-    if voice_score >= 0.85:
-        log_event(f"SUCCESS - Gaze {gaze_score:.2f}, Voice {voice_score:.2f}")
-        try:
-            subprocess.Popen(["python", "voice_commands.py"])
-        except Exception as e:
-            log_event(f"ERROR launching voice_commands.py: {e}")
-        return True, gaze_score, voice_score
+        credentials = credential_store.get_store().get(user)
+    except (OSError, ValueError):
+        credentials = None
+    if credentials is None or credentials.gaze is None:
+        return auth_pipeline.rejected("gaze")
+
+    # Gaze and voice are captured together; the first failure cancels the other
+    result = auth_pipeline.authenticate_concurrently(
+        lambda cancel: verify_gaze(credentials.gaze, source, cancel),
+        lambda cancel: verify_voice(credentials.voice, cancel),
+    )
+    timing = f"in {result.seconds:.2f}s (gaze {result.gaze_seconds:.2f}s, voice {result.voice_seconds:.2f}s)"
+    if result.success:
+        log_event(f"SUCCESS - Gaze {result.gaze_score:.2f}, Voice {result.voice_score:.2f} {timing}")
+        controller_session.start_controller(source)
     else:
-        log_event(f"FAILED - Voice mismatch ({voice_score:.2f})")
-        return False, gaze_score, voice_score
+        score = result.gaze_score if result.failed_factor == "gaze" else result.voice_score
+        log_event(f"FAILED - {result.failed_factor.capitalize()} mismatch ({score:.2f}) {timing}")
+    return result
 
-def register_credentials():
-    if not check_camera():
+def register_credentials(source=None, user=credential_store.DEFAULT_USER):
+    if source is None and not check_camera():
         messagebox.showerror("Error", "Cannot access webcam.")
         return False
 
-    cap = cv2.VideoCapture(0)
-    time.sleep(2)
+    import frame_sources
+    import camera_session
+
+    cap = frame_sources.open_source(source)
+    camera_session.wait_until_settled(cap)
     ret, frame = cap.read()
     cap.release()
     if not ret:
         return False
 
     gaze = extract_gaze(frame)
-    if gaze is not None:
-        with open(GAZE_VECTOR_FILE, "w") as f:
-            f.write(" ".join(map(str, gaze)))
-    else:
+    if gaze is None:
         return False
 
-    record_voice(VOICE_REFERENCE_FILE)
-    log_event("CREDENTIALS REGISTERED")
+    for attempt in range(1, REGISTER_VOICE_ATTEMPTS + 1):
+        recording, samplerate = record_voice()
+        if recording is not None:
+            break
+        if attempt < REGISTER_VOICE_ATTEMPTS:
+            messagebox.showwarning("No Speech", "🎤 No speech heard. Say your passphrase again.")
+    else:
+        return False
+    credential_store.get_store().enroll(user, gaze=gaze,
+                                        voice=voice_features.compute_embedding(recording, samplerate))
+    log_event(f"CREDENTIALS REGISTERED - {user}")
     return True
 
 # ------------------------- GUI -------------------------
 def on_auth():
-    success, gaze, voice = authenticate()
-    if success:
-        messagebox.showinfo("Access Granted", f"✅ Gaze: {gaze:.2f}\n🎤 Voice: {voice:.2f}")
+    result = authenticate()
+    details = f"Gaze: {result.gaze_score:.2f}\n🎤 Voice: {result.voice_score:.2f}\n⏱️ {result.seconds:.1f}s"
+    if result.success:
+        messagebox.showinfo("Access Granted", f"✅ {details}")
     else:
-        messagebox.showerror("Access Denied", f"❌ Gaze: {gaze:.2f}\n🎤 Voice: {voice:.2f}")
+        messagebox.showerror("Access Denied", f"❌ {details}")
 
 def on_register():
     if register_credentials():
@@ -153,15 +178,26 @@ def on_register():
     else:
         messagebox.showerror("Failed", "❌ Registration failed.")
 
-app = tk.Tk()
-app.title("EyeVox Secure Access")
-app.geometry("320x260")
-app.configure(bg="black")
+def on_first_window():
+    if startup.mark("first_window"):
+        app.destroy()
+        return
+    start_background_services()
+
+if __name__ == "__main__":
+    startup.mark("imported")
+    initialize_system()
+
+    app = tk.Tk()
+    app.title("EyeVox Secure Access")
+    app.geometry("320x260")
+    app.configure(bg="black")
 
-label = tk.Label(app, text="👁️ EyeVox", font=("Arial", 24), fg="cyan", bg="black")
-label.pack(pady=20)
+    label = tk.Label(app, text="👁️ EyeVox", font=("Arial", 24), fg="cyan", bg="black")
+    label.pack(pady=20)
 
-tk.Button(app, text="Authenticate", command=on_auth, bg="blue", fg="white", font=("Arial", 12)).pack(pady=10)
-tk.Button(app, text="Register Credentials", command=on_register, bg="green", fg="white", font=("Arial", 12)).pack(pady=5)
+    tk.Button(app, text="Authenticate", command=on_auth, bg="blue", fg="white", font=("Arial", 12)).pack(pady=10)
+    tk.Button(app, text="Register Credentials", command=on_register, bg="green", fg="white", font=("Arial", 12)).pack(pady=5)
 
-app.mainloop()
+    app.after(0, on_first_window)
+    app.mainloop()
@@ -0,0 +1,97 @@
+import threading
+import numpy as np
+
+# Refined FaceMesh: 468 face points + 10 iris points
+NUM_LANDMARKS = 478
+
+# Iris rings (center first) in MediaPipe's subject-relative naming
+LEFT_IRIS = np.arange(473, 478)
+RIGHT_IRIS = np.arange(468, 473)
+IRIS_POINTS = np.arange(468, 478)
+
+# Order used by the stored gaze templates: 468-472 first, then 473-477
+GAZE_IRIS_GROUPS = np.stack([RIGHT_IRIS, LEFT_IRIS])
+
+# 16-point eye contours
+LEFT_EYE_CONTOUR = np.array([362, 382, 381, 380, 374, 373, 390, 249,
+                             263, 466, 388, 387, 386, 385, 384, 398])
+RIGHT_EYE_CONTOUR = np.array([33, 7, 163, 144, 145, 153, 154, 155,
+                              133, 173, 157, 158, 159, 160, 161, 246])
+
+# Six points per eye in EAR order: outer corner, two upper lid, inner corner, two lower lid
+MEDIAPIPE_EYE_INDICES = np.array([
+    [33, 160, 158, 133, 153, 144],
+    [362, 385, 387, 263, 373, 380],
+])
+
+_local = threading.local()
+
+
+def _thread_buffer(n):
+    buf = getattr(_local, "buffer", None)
+    if buf is None or buf.shape[0] != n:
+        buf = np.empty((n, 3), dtype=np.float32)
+        _local.buffer = buf
+    return buf
+
+
+def from_results(results, face=0, out=None):
+    """Converts one face of a FaceMesh result into an (N, 3) float32 array.
+
+    Without `out`, a per-thread preallocated buffer is filled and returned;
+    it is overwritten by the next call on the same thread, so copy anything
+    that must outlive the frame. Returns None when there is no face.
+    """
+    if not results.multi_face_landmarks or len(results.multi_face_landmarks) <= face:
+        return None
+    landmarks = results.multi_face_landmarks[face].landmark
+    n = len(landmarks)
+    if out is None:
+        out = _thread_buffer(n)
+    # Scalar stores straight into the buffer: no temporary array per frame
+    flat = out.reshape(-1)
+    for i, lm in enumerate(landmarks):
+        j = 3 * i
+        flat[j] = lm.x
+        flat[j + 1] = lm.y
+        flat[j + 2] = lm.z
+    return out
+
+
+def to_pixels(points, frame_width, frame_height):
+    """(N, 2) pixel coordinates from normalized landmarks."""
+    return points[:, :2] * np.array([frame_width, frame_height], dtype=np.float32)
+
+
+def iris_centers(points, groups=GAZE_IRIS_GROUPS):
+    """Mean (x, y) of each index group, one row per group."""
+    return points[groups, :2].mean(axis=1)
+
+
+def gaze_vector(points):
+    """The 4-value gaze feature stored at enrollment: both iris centers, flattened."""
+    return iris_centers(points).reshape(-1).astype(np.float64)
+
+
+def eye_contours(points):
+    """(2, 16, 2) left and right eye outlines."""
+    return points[np.stack([LEFT_EYE_CONTOUR, RIGHT_EYE_CONTOUR]), :2]
+
+
+def eye_aspect_ratios(points, eye_indices):
+    """Eye aspect ratio for every eye in `eye_indices` in one vectorized pass.
+
+    `points` must be in pixels; non-square frames skew ratios of normalized
+    coordinates.
+    """
+    eyes = points[eye_indices]  # (eyes, 6, 2)
+    vertical = (np.linalg.norm(eyes[:, 1] - eyes[:, 5], axis=-1) +
+                np.linalg.norm(eyes[:, 2] - eyes[:, 4], axis=-1))
+    horizontal = np.linalg.norm(eyes[:, 0] - eyes[:, 3], axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ear = vertical / (2.0 * horizontal)
+    return np.where(horizontal > 0, ear, np.nan)
+
+
+def mesh_eye_aspect_ratios(points, frame_width, frame_height):
+    return eye_aspect_ratios(to_pixels(points, frame_width, frame_height), MEDIAPIPE_EYE_INDICES)
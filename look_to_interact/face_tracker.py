@@ -0,0 +1,125 @@
+import numpy as np
+
+
+class FaceTracker:
+    """Detect once, then follow the face box between frames.
+
+    The HOG detector only runs on the first frame, every `redetect_every`
+    frames, or when tracking confidence drops. In between, the box comes from
+    either the previous frame's landmarks ("landmarks" mode) or a dlib
+    correlation tracker ("correlation" mode).
+    """
+
+    def __init__(self, detector, mode="landmarks", redetect_every=15,
+                 min_psr=7.0, max_scale_change=0.35):
+        if mode not in ("landmarks", "correlation"):
+            raise ValueError(f"Unknown tracking mode '{mode}'")
+        import dlib
+
+        self._dlib = dlib
+        self.detector = detector
+        self.mode = mode
+        self.redetect_every = redetect_every
+        self.min_psr = min_psr
+        self.max_scale_change = max_scale_change
+        self.box = None
+        self._box_offsets = None
+        self._last_bounds = None
+        self._correlation = None
+        self._since_detect = 0
+        self._needs_offsets = False
+        self.detections = 0
+        self.tracked = 0
+        self.lost = 0
+
+    def reset(self):
+        self.box = None
+        self._box_offsets = None
+        self._last_bounds = None
+        self._correlation = None
+
+    def locate(self, gray):
+        """Returns a list with the face rectangle to run the shape predictor on."""
+        if self.box is not None and self._since_detect < self.redetect_every:
+            box = self._track(gray)
+            if box is not None:
+                self._since_detect += 1
+                self.tracked += 1
+                self.box = box
+                return [box]
+            self.lost += 1
+
+        return self._detect(gray)
+
+    def observe(self, landmarks):
+        """Feeds back the predictor's landmarks so the next frame can reuse them."""
+        left, top, right, bottom = _landmark_bounds(landmarks)
+        width, height = max(right - left, 1), max(bottom - top, 1)
+        if self._needs_offsets and self.box is not None:
+            # Remember where the detector box sits relative to the landmarks,
+            # so later boxes look like what the shape predictor was trained on
+            self._box_offsets = np.array([
+                (self.box.left() - left) / width,
+                (self.box.top() - top) / height,
+                (self.box.right() - right) / width,
+                (self.box.bottom() - bottom) / height,
+            ])
+            self._needs_offsets = False
+        self._last_bounds = (left, top, width, height)
+
+    def stats(self):
+        total = self.detections + self.tracked
+        return {"detections": self.detections, "tracked": self.tracked, "lost": self.lost,
+                "tracking_ratio": self.tracked / total if total else 0.0}
+
+    def _detect(self, gray):
+        faces = self.detector(gray)
+        self.detections += 1
+        self._since_detect = 0
+        if len(faces) == 0:
+            self.reset()
+            return []
+
+        # Follow the largest face; that is the user sitting at the screen
+        box = max(faces, key=lambda r: r.area())
+        self.box = box
+        self._needs_offsets = True
+        self._last_bounds = None
+        if self.mode == "correlation":
+            self._correlation = self._dlib.correlation_tracker()
+            self._correlation.start_track(gray, box)
+        return [box]
+
+    def _track(self, gray):
+        if self.mode == "correlation":
+            psr = self._correlation.update(gray)
+            if psr < self.min_psr:
+                return None
+            pos = self._correlation.get_position()
+            box = self._dlib.rectangle(int(pos.left()), int(pos.top()), int(pos.right()), int(pos.bottom()))
+        else:
+            if self._box_offsets is None or self._last_bounds is None:
+                return None
+            left, top, width, height = self._last_bounds
+            dl, dt, dr, db = self._box_offsets
+            box = self._dlib.rectangle(int(left + dl * width), int(top + dt * height),
+                                 int(left + width + dr * width), int(top + height + db * height))
+
+        if not self._plausible(box, gray.shape):
+            return None
+        return box
+
+    def _plausible(self, box, shape):
+        frame_h, frame_w = shape[:2]
+        if box.right() <= 0 or box.bottom() <= 0 or box.left() >= frame_w or box.top() >= frame_h:
+            return False
+        # A sudden jump in box size means the landmarks slipped off the face
+        ratio = box.area() / max(self.box.area(), 1)
+        return abs(ratio - 1.0) <= self.max_scale_change
+
+
+def _landmark_bounds(landmarks):
+    points = np.array([(p.x, p.y) for p in landmarks.parts()])
+    left, top = points.min(axis=0)
+    right, bottom = points.max(axis=0)
+    return int(left), int(top), int(right), int(bottom)
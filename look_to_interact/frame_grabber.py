@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class FrameGrabber:
+    """Reads a capture device on its own thread and keeps only the newest frame.
+
+    Frames land in a small ring of preallocated buffers. The consumer always
+    gets the most recent one together with its capture timestamp; anything
+    that was overwritten before being read is counted as dropped.
+    """
+
+    def __init__(self, cap, slots=3):
+        if slots < 3:
+            raise ValueError("FrameGrabber needs at least 3 slots (write, latest, read)")
+        self.cap = cap
+        self.num_slots = slots
+        self._buffers = None
+        self._timestamps = [0.0] * slots
+        self._latest = -1          # slot holding the newest unread frame
+        self._reading = -1         # slot currently lent to the consumer
+        self._write = 0
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+        self.captured = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.read_failures = 0
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _next_write_slot(self):
+        # Caller holds self._cond; never overwrite the newest frame or the consumer's frame
+        for offset in range(1, self.num_slots + 1):
+            slot = (self._write + offset) % self.num_slots
+            if slot != self._latest and slot != self._reading:
+                return slot
+        return self._write
+
+    def _run(self):
+        while self.running:
+            target = None if self._buffers is None else self._buffers[self._write]
+            ret, frame = self.cap.read(target) if target is not None else self.cap.read()
+            captured_at = time.perf_counter()
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.005)
+                continue
+
+            if self._buffers is None or frame.shape != self._buffers[0].shape:
+                # First frame (or a resolution change) sizes the ring
+                self._buffers = [np.empty_like(frame) for _ in range(self.num_slots)]
+                self._buffers[self._write][...] = frame
+            elif frame is not self._buffers[self._write]:
+                self._buffers[self._write][...] = frame
+
+            with self._cond:
+                if self._latest != -1:
+                    self.dropped += 1
+                self._latest = self._write
+                self._timestamps[self._write] = captured_at
+                self._seq += 1
+                self.captured += 1
+                self._write = self._next_write_slot()
+                self._cond.notify()
+
+    def read(self, timeout=1.0):
+        """Returns (frame, captured_at, seq) for the newest frame, or None on timeout.
+
+        The returned frame stays valid until the next call to read().
+        """
+        with self._cond:
+            if self._latest == -1:
+                self._cond.wait_for(lambda: self._latest != -1 or not self.running, timeout)
+            if self._latest == -1:
+                return None
+            slot = self._latest
+            self._reading = slot
+            self._latest = -1
+            self.consumed += 1
+            return self._buffers[slot], self._timestamps[slot], self._seq
+
+    def stats(self):
+        return {"captured": self.captured, "consumed": self.consumed,
+                "dropped": self.dropped, "read_failures": self.read_failures}
+
+
+class DirectReader:
+    """Same interface as FrameGrabber, but reads synchronously on the caller's thread.
+
+    Used for as-fast-as-possible replay, where every recorded frame should
+    be processed rather than dropped.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.running = False
+        self.captured = 0
+        self.read_failures = 0
+
+    def start(self):
+        self.running = True
+        return self
+
+    def stop(self):
+        self.running = False
+
+    def read(self, timeout=1.0):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.read_failures += 1
+            return None
+        self.captured += 1
+        return frame, time.perf_counter(), self.captured
+
+    def stats(self):
+        return {"captured": self.captured, "consumed": self.captured,
+                "dropped": 0, "read_failures": self.read_failures}
+
+
+def open_reader(cap):
+    """Threaded drop-stale grabber for live/paced sources, direct reads for fast replay."""
+    if getattr(cap, "live", True) or getattr(cap, "realtime", False):
+        return FrameGrabber(cap).start()
+    return DirectReader(cap).start()
+
+
+class LatencyMeter:
+    """Rolling window of latency samples in seconds."""
+
+    def __init__(self, window=120):
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def summary(self):
+        if not self.samples:
+            return None
+        values = np.fromiter(self.samples, dtype=np.float64) * 1000.0
+        return {"mean_ms": float(values.mean()),
+                "p50_ms": float(np.percentile(values, 50)),
+                "p95_ms": float(np.percentile(values, 95))}
@@ -0,0 +1,222 @@
+import glob
+import os
+import time
+import numpy as np
+import cv2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """Anything the vision loops can read frames from.
+
+    Sources mimic the parts of cv2.VideoCapture the loops use (read,
+    isOpened, release, set), so a source can be passed wherever a capture
+    was. `live` sources deliver frames at their own pace. Replay sources
+    either sleep to match `fps` (realtime=True) or return frames as fast
+    as they can be decoded (realtime=False) for throughput measurements.
+    `exhausted` turns True once a finite source runs out.
+    """
+
+    live = False
+
+    def __init__(self, fps=30.0, realtime=True, loop=False):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.exhausted = False
+        self.frames_read = 0
+        self._next_due = None
+
+    def read(self, image=None):
+        if self.exhausted:
+            return False, None
+        frame = self._next_frame()
+        if frame is None and self.loop and self.frames_read > 0:
+            self._rewind()
+            frame = self._next_frame()
+        if frame is None:
+            self.exhausted = True
+            return False, None
+
+        self._pace()
+        self.frames_read += 1
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            return True, image
+        return True, frame
+
+    def _pace(self):
+        if not self.realtime or not self.fps:
+            return
+        now = time.perf_counter()
+        if self._next_due is None:
+            self._next_due = now
+        delay = self._next_due - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_due = max(self._next_due, now - 1.0) + 1.0 / self.fps
+
+    def isOpened(self):
+        return not self.exhausted
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def release(self):
+        self.exhausted = True
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def _rewind(self):
+        raise NotImplementedError
+
+
+class CameraSource(FrameSource):
+    """A live camera; properties are applied explicitly at open time."""
+
+    live = True
+
+    def __init__(self, index=0, width=None, height=None, fps=None):
+        super().__init__(fps=fps or 30.0, realtime=False)
+        self.cap = cv2.VideoCapture(index)
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+
+    def read(self, image=None):
+        ret, frame = self.cap.read(image) if image is not None else self.cap.read()
+        if ret:
+            self.frames_read += 1
+        return ret, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=True, loop=False, fps=None):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video file: {path}")
+        super().__init__(fps=fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0,
+                         realtime=realtime, loop=loop)
+
+    def _next_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Replays the images in a directory in file-name order."""
+
+    def __init__(self, path, fps=30.0, realtime=True, loop=False):
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self.paths = sorted(p for p in glob.glob(os.path.join(path, "*"))
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise IOError(f"No images found in {path}")
+        self._index = 0
+
+    def _next_frame(self):
+        while self._index < len(self.paths):
+            frame = cv2.imread(self.paths[self._index])
+            self._index += 1
+            if frame is not None:
+                return frame
+        return None
+
+    def _rewind(self):
+        self._index = 0
+
+
+class SyntheticSource(FrameSource):
+    """Generated frames: two dark "pupils" drifting over a gray background.
+
+    Pass `make_frame(index) -> ndarray` to generate something else.
+    """
+
+    def __init__(self, width=640, height=480, fps=30.0, frames=300,
+                 realtime=False, loop=False, make_frame=None):
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self.width, self.height = width, height
+        self.frames = frames
+        self.make_frame = make_frame or self._default_frame
+        self._index = 0
+
+    def _default_frame(self, index):
+        frame = np.full((self.height, self.width, 3), 170, dtype=np.uint8)
+        phase = 2 * np.pi * index / max(self.fps * 4, 1)
+        cx = int(self.width / 2 + self.width / 8 * np.cos(phase))
+        cy = int(self.height / 2 + self.height / 10 * np.sin(phase))
+        for dx in (-self.width // 10, self.width // 10):
+            cv2.ellipse(frame, (cx + dx, cy), (30, 14), 0, 0, 360, (230, 230, 230), -1)
+            cv2.circle(frame, (cx + dx, cy), 8, (30, 30, 30), -1)
+        return frame
+
+    def _next_frame(self):
+        if self.frames is not None and self._index >= self.frames:
+            return None
+        frame = self.make_frame(self._index)
+        self._index += 1
+        return frame
+
+    def _rewind(self):
+        self._index = 0
+
+
+def open_source(source=None, realtime=True, loop=False):
+    """Opens a frame source from a loose description.
+
+    None or an int opens a view on that camera's shared session (see
+    camera_session); a directory replays its images; any other path is
+    opened as a video file; "synthetic" generates frames. An object that
+    already has read() is returned unchanged.
+    """
+    import camera_session
+
+    if source is None:
+        return camera_session.open_camera(0)
+    if hasattr(source, "read"):
+        return source
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return camera_session.open_camera(int(source))
+    if source == "synthetic":
+        return SyntheticSource(realtime=realtime, loop=loop)
+    if os.path.isdir(source):
+        return ImageDirectorySource(source, realtime=realtime, loop=loop)
+    return VideoFileSource(source, realtime=realtime, loop=loop)
+
+
+def is_live(cap):
+    return getattr(cap, "live", True)
+
+
+def is_exhausted(cap):
+    return getattr(cap, "exhausted", False)
@@ -0,0 +1,53 @@
+import time
+from collections import namedtuple
+
+# matched: enough consecutive frames agreed with the template
+# score: mean similarity of the agreeing streak (best single score on failure)
+GazeBurstResult = namedtuple("GazeBurstResult", ["matched", "score", "frames", "faces", "elapsed"])
+
+# Pause after a failed read so a camera that is not delivering isn't polled in a tight loop
+READ_RETRY_DELAY = 0.01  # seconds
+
+
+def stream_gaze_match(cap, extract_fn, score_fn, template, threshold=0.85,
+                      required_matches=3, timeout=3.0, cancel=None):
+    """Scores frames as they arrive and stops once `required_matches` in a row pass.
+
+    Setting the optional `cancel` event stops the stream early (no match).
+    """
+    # Kept out of module scope so importing this file doesn't load OpenCV
+    from frame_sources import is_exhausted
+
+    start = time.perf_counter()
+    frames = faces = 0
+    streak = []
+    best_score = 0.0
+
+    while time.perf_counter() - start < timeout:
+        if cancel is not None and cancel.is_set():
+            break
+        ret, frame = cap.read()
+        if not ret:
+            if is_exhausted(cap):
+                break
+            time.sleep(READ_RETRY_DELAY)
+            continue
+        frames += 1
+
+        gaze = extract_fn(frame)
+        if gaze is None:
+            # Blink or face lost for a frame: skip it without breaking the streak
+            continue
+        faces += 1
+
+        score = float(score_fn(template, gaze))
+        best_score = max(best_score, score)
+        if score >= threshold:
+            streak.append(score)
+            if len(streak) >= required_matches:
+                elapsed = time.perf_counter() - start
+                return GazeBurstResult(True, sum(streak) / len(streak), frames, faces, elapsed)
+        else:
+            streak = []
+
+    return GazeBurstResult(False, best_score, frames, faces, time.perf_counter() - start)
@@ -1,45 +1,96 @@
 import cv2
-import dlib
 import pyautogui
-import speech_recognition as sr
 import subprocess
 import webbrowser
 import threading
 import numpy as np
+import sys
 import time
+from contextlib import nullcontext
+import frame_sources
+from cursor_actuator import CursorActuator
+from command_registry import CommandRegistry, ActionExecutor
+import blink_detector
 
-# Load the pre-trained shape predictor model
+# Pre-trained shape predictor model
 predictor_path = "shape_predictor_68_face_landmarks.dat"
-predictor = dlib.shape_predictor(predictor_path)
-
-# Load face detector
-detector = dlib.get_frontal_face_detector()
-
-# Get the screen dimensions
-screen_width, screen_height = pyautogui.size()
-
-# Initialize the camera
-cap = cv2.VideoCapture(0)
+_models = None
+
+def load_models():
+    """Loads the dlib face detector and shape predictor on first use and returns both."""
+    global _models
+    if _models is None:
+        import dlib
+        _models = (dlib.get_frontal_face_detector(), dlib.shape_predictor(predictor_path))
+    return _models
+
+# Cursor smoothing: "one_euro", "kalman" or "none"
+CURSOR_FILTER = "one_euro"
+
+# Face tracking between full detections: "landmarks" or "correlation"
+TRACKING_MODE = "landmarks"
+REDETECT_EVERY = 15  # frames
+TRACKING_REPORT_INTERVAL = 150  # frames
+
+def process_frame(frame, captured_at, tracker, predictor, blink, cursor, screen_size, stage=nullcontext):
+    """One gaze-loop step (face, blink, cursor); returns the face boxes used."""
+    screen_width, screen_height = screen_size
+    with stage("cvtColor"):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    with stage("detection"):
+        faces = tracker.locate(gray)
+
+    for face in faces:
+        with stage("landmarks"):
+            landmarks = predictor(gray, face)
+            tracker.observe(landmarks)
+        with stage("features"):
+            points = blink_detector.dlib_points(landmarks)
+            blink.update(points, blink_detector.DLIB_EYE_INDICES, captured_at)
+        if np.isnan(blink.last_ears).any():
+            continue
+
+        with stage("mapping"):
+            eye_center_x = (points[36, 0] + points[45, 0]) // 2
+            eye_center_y = (points[37, 1] + points[44, 1]) // 2
+            cursor_x = min(max(eye_center_x / frame.shape[1], 0), 1) * screen_width
+            cursor_y = min(max(eye_center_y / frame.shape[0], 0), 1) * screen_height
+        with stage("actuation"):
+            cursor.submit(cursor_x, cursor_y, captured_at)
+    return faces
 
 class VoiceGazeController:
     def __init__(self):
-        self.recognizer = sr.Recognizer()
         self.running = True
-        self.blink_count = 0
-        self.blink_threshold = 2  # Number of blinks required to trigger a click
+        self.commands = self.register_commands()
+        self.actions = ActionExecutor()
+        # Click when both eyes close for 0.4-2 s and reopen (time-based, not per frame)
+        self.blink = blink_detector.BlinkDetector(on_click=self.blink_click)
         self.start_voice_thread()
 
+    def blink_click(self):
+        pyautogui.click(_pause=False)
+        print("Mouse clicked!")
+
     def start_voice_thread(self):
         # Start a separate thread for voice commands
         threading.Thread(target=self.listen_commands, daemon=True).start()
 
     def listen_commands(self):
+        import speech_recognition as sr
+        import speech_backends
+        import noise_profile
+
+        self.recognizer = sr.Recognizer()
+        noise = noise_profile.get_profile()
         with sr.Microphone() as source:
+            noise.prepare(self.recognizer, source)
             print("Voice input ready. Speak to open applications or type...")
             while self.running:
                 try:
                     audio = self.recognizer.listen(source)
-                    command = self.recognizer.recognize_google(audio).lower()
+                    noise.update_from(self.recognizer)
+                    command = speech_backends.recognize(audio).lower()
                     print(f"You said: {command}")
                     self.process_command(command)
                 except sr.UnknownValueError:
@@ -49,16 +100,21 @@ class VoiceGazeController:
                 except Exception as e:
                     print(f"Error during voice recognition: {e}")
 
+    def register_commands(self):
+        commands = CommandRegistry()
+        commands.register("open {app_name}", self.open_application, name="open", lane="launch", debounce=1.0)
+        commands.register("type {text}", self.type_text, name="type")
+        commands.register("exit", self.exit)
+        return commands
+
     def process_command(self, command):
-        if command.startswith("open "):
-            app_name = command[5:]
-            self.open_application(app_name)
-        elif command.startswith("type "):
-            text_to_type = command[5:]
-            self.type_text(text_to_type)
-        elif command == "exit":
-            print("Exiting...")
-            self.running = False
+        # Actions run on the executor so slow launches don't stall listening
+        for match in self.commands.match(command):
+            self.actions.submit(match)
+
+    def exit(self):
+        print("Exiting...")
+        self.running = False
 
     def open_application(self, app_name):
         try:
@@ -77,54 +133,43 @@ class VoiceGazeController:
         pyautogui.typewrite(text)
         print(f"Typing: {text}")
 
-    def run_gaze_control(self):
+    def run_gaze_control(self, source=None, preview=True):
+        """Runs the gaze loop on `source` (camera by default; see frame_sources.open_source)."""
+        from face_tracker import FaceTracker
+
+        cap = frame_sources.open_source(source)
+        cursor = CursorActuator(CURSOR_FILTER).start()
+        detector, predictor = load_models()
+        screen_size = pyautogui.size()
+        tracker = FaceTracker(detector, mode=TRACKING_MODE, redetect_every=REDETECT_EVERY)
+        frame_count = 0
         while self.running:
             ret, frame = cap.read()
             if not ret:
-                print("Error: Camera feed not available.")
+                if not frame_sources.is_exhausted(cap):
+                    print("Error: Camera feed not available.")
                 break
+            captured_at = time.perf_counter()
+            process_frame(frame, captured_at, tracker, predictor, self.blink, cursor, screen_size)
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = detector(gray)
-
-            for face in faces:
-                landmarks = predictor(gray, face)
-                
-                left_eye_top = landmarks.part(37).y
-                left_eye_bottom = landmarks.part(41).y
-                right_eye_top = landmarks.part(44).y
-                right_eye_bottom = landmarks.part(38).y
-                
-                left_ear_denominator = landmarks.part(39).x - landmarks.part(36).x
-                right_ear_denominator = landmarks.part(45).x - landmarks.part(42).x
-                
-                if left_ear_denominator != 0 and right_ear_denominator != 0:
-                    left_eye_aspect_ratio = (left_eye_bottom - left_eye_top) / left_ear_denominator
-                    right_eye_aspect_ratio = (right_eye_bottom - right_eye_top) / right_ear_denominator
-
-                    if left_eye_aspect_ratio < 0.25 and right_eye_aspect_ratio < 0.25:
-                        self.blink_count += 1
-                        time.sleep(0.3)
-                    else:
-                        if self.blink_count >= self.blink_threshold:
-                            pyautogui.click()
-                            print("Mouse clicked!")
-                        self.blink_count = 0
-                    
-                    eye_center_x = (landmarks.part(36).x + landmarks.part(45).x) // 2
-                    eye_center_y = (landmarks.part(37).y + landmarks.part(44).y) // 2
-                    cursor_x = min(max(eye_center_x / frame.shape[1], 0), 1) * screen_width
-                    cursor_y = min(max(eye_center_y / frame.shape[0], 0), 1) * screen_height
-                    pyautogui.moveTo(cursor_x, cursor_y)
-
-            cv2.imshow('Gaze Control', frame)
-
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            frame_count += 1
+            if frame_count % TRACKING_REPORT_INTERVAL == 0:
+                stats = tracker.stats()
+                print(f"Face detection/tracking: {stats['detections']}/{stats['tracked']} "
+                      f"({stats['tracking_ratio']:.0%} tracked, {stats['lost']} lost)")
+
+            if preview:
+                cv2.imshow('Gaze Control', frame)
+
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
 
+        cursor.stop()
         cap.release()
-        cv2.destroyAllWindows()
+        if preview:
+            cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     controller = VoiceGazeController()
-    controller.run_gaze_control()
+    # Optional argument: camera index, video file, image directory or "synthetic"
+    controller.run_gaze_control(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,11 +1,11 @@
 import cv2
-import mediapipe as mp
 import numpy as np
-import os
+import landmark_engine
+import face_landmarks
+import credential_store
 
-# Initialize MediaPipe Face Mesh
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(static_image_mode=True, max_num_faces=1, refine_landmarks=True)
+# Shared MediaPipe Face Mesh
+face_mesh = landmark_engine.get_engine(static_image_mode=True, max_num_faces=1)
 
 # Load the image from credentials folder
 img = cv2.imread("credentials/gaze_reference.jpg")
@@ -16,35 +16,23 @@ if img is None:
 rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 results = face_mesh.process(rgb_img)
 
-if not results.multi_face_landmarks:
+# Extract iris and eye landmarks (left and right)
+points = face_landmarks.from_results(results)
+if points is None:
     print("No face detected in the reference image.")
     exit()
 
-# Extract iris and eye landmarks (left and right)
-landmarks = results.multi_face_landmarks[0].landmark
 image_height, image_width = img.shape[:2]
 
-def get_iris_center(landmark_indices):
-    coords = np.array([
-        [landmarks[i].x * image_width, landmarks[i].y * image_height]
-        for i in landmark_indices
-    ])
-    return np.mean(coords, axis=0)
-
-# MediaPipe iris indices
+# MediaPipe iris ring indices (without the center point)
 LEFT_IRIS = [474, 475, 476, 477]
 RIGHT_IRIS = [469, 470, 471, 472]
 
-left_iris_center = get_iris_center(LEFT_IRIS)
-right_iris_center = get_iris_center(RIGHT_IRIS)
-
-# Combine left and right iris centers as the "gaze feature"
-gaze_vector = np.concatenate((left_iris_center, right_iris_center))
-
-# Create credentials folder if it doesn't exist
-os.makedirs("credentials", exist_ok=True)
+# Combine left and right iris centers (in pixels) as the "gaze feature"
+iris_centers = face_landmarks.iris_centers(points, np.array([LEFT_IRIS, RIGHT_IRIS]))
+gaze_vector = (iris_centers * (image_width, image_height)).reshape(-1)
 
-# Save gaze vector to file
-np.savetxt("credentials/gaze_vector.txt", gaze_vector)
+# Save gaze vector as the default user's gaze template
+credential_store.get_store().enroll(credential_store.DEFAULT_USER, gaze=gaze_vector)
 
-print("✅ Gaze vector saved to credentials/gaze_vector.txt")
+print(f"✅ Gaze vector saved to {credential_store.STORE_FILE} for '{credential_store.DEFAULT_USER}'")
@@ -0,0 +1,328 @@
+import threading
+from collections import namedtuple
+import numpy as np
+import credential_store
+import voice_features
+
+TOP_K = 5
+FACE_TOLERANCE = 0.6          # face_recognition.compare_faces default (euclidean distance)
+GAZE_THRESHOLD = 0.85         # same as gaze_burst.stream_gaze_match
+VOICE_THRESHOLD = 0.85        # same as authenticate_user.verify_voice
+# Gallery sizes from which the approximate index beats the exact scan (benchmark_identification.py)
+FACE_APPROXIMATE_MIN_USERS = 50000   # one 128-d matrix product is hard to beat, batched even more so
+VOICE_APPROXIMATE_MIN_USERS = 5000   # several samples per user make the exact scan costlier
+IVF_PROBES = 8                # clusters searched per query by the approximate index
+IVF_ITERATIONS = 10           # k-means iterations when building it
+IVF_RETRAIN_GROWTH = 2.0      # re-run k-means once the indexed set has grown or shrunk this much
+
+# user: enrolled name; score: distance for faces, cosine similarity for gaze and voice
+Match = namedtuple("Match", ["user", "score"])
+# score: mean of the voice and gaze similarities of a user who passed all three factors
+Identification = namedtuple("Identification", ["user", "score", "gaze_score", "voice_score", "face_distance"])
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _as_queries(queries, dim):
+    """(Q, dim) float32 queries and whether a single vector was passed."""
+    queries = np.asarray(queries, dtype=np.float32)
+    return queries.reshape(-1, dim), queries.ndim == 1
+
+
+def top_k(scores, k, largest=True):
+    """Row-wise top-k of a (Q, N) matrix as (indices, values), best first, in one pass."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((len(scores), 0), dtype=np.intp), np.zeros((len(scores), 0), dtype=scores.dtype)
+    keyed = -scores if largest else scores
+    if k < scores.shape[1]:
+        part = np.argpartition(keyed, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(k), (len(scores), k))
+    order = np.take_along_axis(keyed, part, axis=1).argsort(axis=1, kind="stable")
+    indices = np.take_along_axis(part, order, axis=1)
+    return indices, np.take_along_axis(scores, indices, axis=1)
+
+
+class IVFIndex:
+    """Approximate nearest neighbours by squared euclidean distance (inverted file).
+
+    k-means splits the vectors into ~sqrt(N) clusters, stored contiguously;
+    a query scans only the `probes` clusters whose centroids are closest.
+    For unit vectors the ranking equals cosine similarity. reassigned()
+    reuses the trained centroids after the vectors change.
+    """
+
+    def __init__(self, vectors, clusters=None, probes=IVF_PROBES, iterations=IVF_ITERATIONS, seed=0):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        clusters = min(n, clusters or max(1, int(np.sqrt(n))))
+        self.probes = min(probes, clusters)
+        self.trained_on = n
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample; assign every vector once at the end
+        sample = vectors[rng.choice(n, size=min(n, 64 * clusters), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._nearest_centroid(sample, centroids)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=clusters)
+            used = np.nonzero(counts)[0]
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[used]
+            # Empty clusters keep their old centroid
+            centroids[used] = np.add.reduceat(sample[order], starts, axis=0) / counts[used, None]
+
+        self._layout(vectors, centroids, self._nearest_centroid(vectors, centroids))
+
+    def _layout(self, vectors, centroids, assign):
+        self.centroids = centroids
+        self.assign = assign
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(centroids)))))
+        self.vectors = vectors[self.order]
+        self.sq_norms = (self.vectors ** 2).sum(axis=1)
+
+    def reassigned(self, vectors, previous_rows):
+        """A new index over `vectors` with this index's centroids, without re-running k-means.
+
+        previous_rows[i] is the row vectors[i] had here, or -1 if it is new.
+        Vectors that are unchanged keep their cluster; only the rest are
+        compared against the centroids.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        previous_rows = np.asarray(previous_rows, dtype=np.intp)
+        rank = np.empty_like(self.order)
+        rank[self.order] = np.arange(len(self.order))
+        known = np.nonzero(previous_rows >= 0)[0]
+        kept = np.zeros(len(vectors), dtype=bool)
+        kept[known] = np.all(self.vectors[rank[previous_rows[known]]] == vectors[known], axis=1)
+
+        assign = np.empty(len(vectors), dtype=np.intp)
+        assign[kept] = self.assign[previous_rows[kept]]
+        if not kept.all():
+            assign[~kept] = self._nearest_centroid(vectors[~kept], self.centroids)
+        index = object.__new__(IVFIndex)
+        index.probes = self.probes
+        index.trained_on = self.trained_on
+        index._layout(vectors, self.centroids, assign)
+        return index
+
+    @staticmethod
+    def _nearest_centroid(vectors, centroids):
+        distances = (centroids ** 2).sum(axis=1) - 2 * vectors @ centroids.T
+        return distances.argmin(axis=1)
+
+    def search(self, queries, k):
+        """(indices, squared distances), each (Q, k) and nearest first; -1 pads short results."""
+        queries = np.asarray(queries, dtype=np.float32)
+        coarse = (self.centroids ** 2).sum(axis=1) - 2 * queries @ self.centroids.T
+        probed, _ = top_k(coarse, self.probes, largest=False)
+
+        indices = np.full((len(queries), k), -1, dtype=np.intp)
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        for q, clusters in enumerate(probed):
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in clusters])
+            if len(rows) == 0:
+                continue
+            d = self.sq_norms[rows] - 2 * self.vectors[rows] @ queries[q] + queries[q] @ queries[q]
+            best, values = top_k(d[None, :], k, largest=False)
+            indices[q, :best.shape[1]] = self.order[rows[best[0]]]
+            distances[q, :best.shape[1]] = values[0]
+        return indices, distances
+
+
+def _updated_index(vectors, previous=None, previous_rows=None):
+    """An IVFIndex over `vectors`, carried over from `previous` unless it has drifted too far in size."""
+    if previous is None or not 1.0 / IVF_RETRAIN_GROWTH <= len(vectors) / previous.trained_on <= IVF_RETRAIN_GROWTH:
+        return IVFIndex(vectors)
+    return previous.reassigned(vectors, previous_rows)
+
+
+class Gallery:
+    """Every enrolled user's templates stacked into NumPy matrices for 1:N queries.
+
+    Row i of each matrix belongs to users[i]. A batch of Q queries is
+    scored against all N users with one matrix product per modality; users
+    missing a template score +inf (faces) or -1 (gaze, voice). With
+    `approximate` (default: when N reaches FACE_/VOICE_APPROXIMATE_MIN_USERS)
+    face and voice queries go through an IVFIndex instead of a full scan.
+    Passing the `previous` gallery reuses its indexes' clusters, so only
+    new or changed templates have to be placed.
+    """
+
+    def __init__(self, users, face=None, gaze=None, voice=None, voice_counts=None, approximate=None,
+                 previous=None):
+        self.users = list(users)
+        n = len(self.users)
+        self.face = np.asarray(face if face is not None else np.zeros((n, credential_store.FACE_DIM)),
+                               dtype=np.float32)
+        self.has_face = np.any(self.face != 0, axis=1)
+        self.face_sq = (self.face ** 2).sum(axis=1)
+        self.gaze = _unit_rows(np.asarray(gaze if gaze is not None else np.zeros((n, credential_store.GAZE_DIM)),
+                                          dtype=np.float32))
+        voice = np.asarray(voice if voice is not None else np.zeros((n, 1, credential_store.VOICE_DIM)),
+                           dtype=np.float32)
+        if voice_counts is None:
+            voice_counts = np.any(voice != 0, axis=2).sum(axis=1)
+        # (N, samples, dim) with unused sample slots masked out
+        self.voice_mask = np.arange(voice.shape[1])[None, :] < np.asarray(voice_counts)[:, None]
+        self.voice = _unit_rows(voice) * self.voice_mask[:, :, None]
+        # The same samples flattened for the approximate index; voice_owner[j] is sample j's user row
+        self.voice_owner = np.nonzero(self.voice_mask)[0]
+
+        self.face_rows = np.nonzero(self.has_face)[0]
+
+        face_approximate = n >= FACE_APPROXIMATE_MIN_USERS if approximate is None else approximate
+        voice_approximate = n >= VOICE_APPROXIMATE_MIN_USERS if approximate is None else approximate
+        previous_row = None
+        if previous is not None and (previous.face_index is not None or previous.voice_index is not None):
+            # -1 marks a new user; the lookup tables below end in a padding row for it
+            if self.users[:len(previous)] == previous.users:
+                # Only new enrollments, which the store appends
+                previous_row = np.arange(n, dtype=np.intp)
+                previous_row[len(previous):] = -1
+            else:
+                position = {user: row for row, user in enumerate(previous.users)}
+                previous_row = np.array([position.get(user, -1) for user in self.users], dtype=np.intp)
+
+        self.face_index = None
+        if face_approximate and self.has_face.any():
+            carried = None
+            if previous_row is not None and previous.face_index is not None:
+                compact = np.full(len(previous) + 1, -1, dtype=np.intp)
+                compact[previous.face_rows] = np.arange(len(previous.face_rows))
+                carried = compact[previous_row[self.face_rows]]
+            self.face_index = _updated_index(self.face[self.has_face],
+                                             previous.face_index if carried is not None else None, carried)
+
+        self.voice_index = None
+        if voice_approximate and len(self.voice_owner):
+            carried = None
+            if (previous_row is not None and previous.voice_index is not None
+                    and previous.voice_mask.shape[1] == self.voice_mask.shape[1]):
+                samples = np.full((len(previous) + 1, self.voice_mask.shape[1]), -1, dtype=np.intp)
+                samples[:-1][previous.voice_mask] = np.arange(len(previous.voice_owner))
+                owners, slots = np.nonzero(self.voice_mask)
+                carried = samples[previous_row[owners], slots]
+            self.voice_index = _updated_index(self.voice[self.voice_mask],
+                                              previous.voice_index if carried is not None else None, carried)
+
+    @classmethod
+    def from_store(cls, store=None, approximate=None, previous=None):
+        store = store or credential_store.get_store()
+        users, records = store.arrays()
+        flags = records["flags"]
+        voice = records["voice"]
+        if store.embedding_version() != voice_features.EMBEDDING_VERSION:
+            voice = np.zeros_like(voice)  # stale recipe; see CredentialStore.get
+        return cls(users,
+                   face=np.where((flags & credential_store.HAS_FACE)[:, None] > 0, records["face"], 0),
+                   gaze=np.where((flags & credential_store.HAS_GAZE)[:, None] > 0, records["gaze"], 0),
+                   voice=voice, voice_counts=records["voice_count"], approximate=approximate, previous=previous)
+
+    def __len__(self):
+        return len(self.users)
+
+    # ---------------- Exact scores against every user ----------------
+    def face_distances(self, encodings):
+        """Euclidean distance from each encoding to every user's face, (Q, N) or (N,)."""
+        queries, single = _as_queries(encodings, self.face.shape[1])
+        sq = self.face_sq[None, :] - 2 * queries @ self.face.T + (queries ** 2).sum(axis=1, keepdims=True)
+        distances = np.sqrt(np.maximum(sq, 0))
+        distances[:, ~self.has_face] = np.inf
+        return distances[0] if single else distances
+
+    def gaze_scores(self, vectors):
+        """Cosine similarity of each gaze vector to every user's template, (Q, N) or (N,)."""
+        queries, single = _as_queries(vectors, self.gaze.shape[1])
+        scores = _unit_rows(queries) @ self.gaze.T
+        scores[:, ~self.gaze.any(axis=1)] = -1.0
+        return scores[0] if single else scores
+
+    def voice_scores(self, embeddings):
+        """Best cosine similarity of each embedding to every user's voice samples, (Q, N) or (N,)."""
+        n, per_user, dim = self.voice.shape
+        queries, single = _as_queries(embeddings, dim)
+        per_sample = (_unit_rows(queries) @ self.voice.reshape(n * per_user, dim).T).reshape(-1, n, per_user)
+        scores = np.where(self.voice_mask, per_sample, -1.0).max(axis=2, initial=-1.0)
+        return scores[0] if single else scores
+
+    # ---------------- Nearest users ----------------
+    def _matches(self, indices, values):
+        return [[Match(self.users[i], float(v)) for i, v in zip(row, vals) if i >= 0 and np.isfinite(v)]
+                for row, vals in zip(indices, values)]
+
+    def nearest_faces(self, encodings, k=TOP_K):
+        """The k closest faces per encoding as [[Match(user, distance)]], one list per query."""
+        queries, single = _as_queries(encodings, self.face.shape[1])
+        if self.face_index is not None:
+            found, sq = self.face_index.search(queries, k)
+            indices = np.where(found >= 0, self.face_rows[np.maximum(found, 0)], -1)
+            matches = self._matches(indices, np.sqrt(np.maximum(sq, 0)))
+        else:
+            matches = self._matches(*top_k(self.face_distances(queries), k, largest=False))
+        return matches[0] if single else matches
+
+    def nearest_voices(self, embeddings, k=TOP_K):
+        """The k most similar speakers per embedding as [[Match(user, similarity)]]."""
+        queries, single = _as_queries(embeddings, self.voice.shape[2])
+        if self.voice_index is not None:
+            # Search samples, then keep each speaker's best sample
+            found, sq = self.voice_index.search(_unit_rows(queries), k * 4)
+            matches = []
+            for row, dists in zip(found, sq):
+                best = {}
+                for sample, d in zip(row, dists):
+                    if sample >= 0:
+                        owner = self.voice_owner[sample]
+                        best.setdefault(owner, 1.0 - float(d) / 2.0)  # unit vectors: cos = 1 - d²/2
+                ranked = sorted(best.items(), key=lambda item: -item[1])[:k]
+                matches.append([Match(self.users[i], s) for i, s in ranked])
+        else:
+            scores = self.voice_scores(queries)
+            indices, values = top_k(scores, k)
+            matches = [[m for m in row if m.score > -1.0] for row in self._matches(indices, values)]
+        return matches[0] if single else matches
+
+    def nearest_gaze(self, vectors, k=TOP_K):
+        queries, single = _as_queries(vectors, self.gaze.shape[1])
+        indices, values = top_k(self.gaze_scores(queries), k)
+        matches = [[m for m in row if m.score > -1.0] for row in self._matches(indices, values)]
+        return matches[0] if single else matches
+
+    def identify(self, face_distances, gaze_scores, voice_scores, face_tolerance=FACE_TOLERANCE,
+                 gaze_threshold=GAZE_THRESHOLD, voice_threshold=VOICE_THRESHOLD):
+        """The closest face among users who also passed gaze and voice, or None.
+
+        The face decides who it is; the 4-d gaze template can't tell users apart.
+        """
+        face_distances = np.asarray(face_distances)
+        gaze_scores = np.asarray(gaze_scores)
+        voice_scores = np.asarray(voice_scores)
+        passed = ((face_distances <= face_tolerance) & (gaze_scores >= gaze_threshold)
+                  & (voice_scores >= voice_threshold))
+        if not passed.any():
+            return None
+        best = int(np.where(passed, face_distances, np.inf).argmin())
+        return Identification(self.users[best], float((gaze_scores[best] + voice_scores[best]) / 2),
+                              float(gaze_scores[best]), float(voice_scores[best]), float(face_distances[best]))
+
+
+_galleries = {}
+_galleries_lock = threading.Lock()
+
+
+def get_gallery(store=None):
+    """The gallery for `store` (default: the shared credential store), updated after enrollments."""
+    store = store or credential_store.get_store()
+    revision = store.revision()
+    with _galleries_lock:
+        cached = _galleries.get(store.path)
+        if cached is None or cached[0] != revision:
+            cached = (revision, Gallery.from_store(store, previous=cached[1] if cached else None))
+            _galleries[store.path] = cached
+        return cached[1]
@@ -0,0 +1,134 @@
+import numpy as np
+import cv2
+import face_landmarks
+
+# MediaPipe refined-mesh indices: iris centers and the eye contour points bounding each eye
+LEFT_IRIS_CENTER, RIGHT_IRIS_CENTER = 473, 468
+LEFT_EYE_BOUNDS = [362, 263, 386, 374]
+RIGHT_EYE_BOUNDS = [33, 133, 159, 145]
+
+
+class IrisTracker:
+    """Locates both irises, running the full FaceMesh only when it has to.
+
+    After a full-mesh frame the eye regions are remembered. On following
+    frames the iris is found on small downscaled grayscale crops around
+    them (dark-pupil centroid); only the crops are converted, never the
+    whole frame. Each crop spans the eye's own width and height (lid to lid)
+    so the eyebrow stays out of the darkest pixels.
+    The full mesh runs again every `refresh_every` frames or as soon as a
+    crop stops looking like an eye.
+    """
+
+    def __init__(self, engine, refresh_every=10, margin=0.6, downscale=0.5,
+                 dark_level=0.35, min_contrast=25):
+        self.engine = engine
+        self.refresh_every = refresh_every
+        self.margin = margin
+        self.downscale = downscale
+        self.dark_level = dark_level
+        self.min_contrast = min_contrast
+        self._eyes = None       # [(x0, y0, x1, y1), ...] in frame pixels, left then right
+        self._bias = None       # crop-estimate -> mesh-iris-center correction per eye
+        self._since_mesh = 0
+        self.mesh_frames = 0
+        self.crop_frames = 0
+        self.crop_failures = 0
+        self.last_mode = None
+
+    def reset(self):
+        self._eyes = None
+        self._bias = None
+
+    def locate(self, frame):
+        """Returns (left_xy, right_xy) iris centers in pixels, or None if no face."""
+        if self._eyes is not None and self._since_mesh < self.refresh_every:
+            centers = self._locate_in_crops(frame)
+            if centers is not None:
+                self._since_mesh += 1
+                self.crop_frames += 1
+                self.last_mode = "crop"
+                return centers
+            self.crop_failures += 1
+
+        return self._locate_with_mesh(frame)
+
+    def stats(self):
+        total = self.mesh_frames + self.crop_frames
+        return {"mesh_frames": self.mesh_frames, "crop_frames": self.crop_frames,
+                "crop_failures": self.crop_failures,
+                "crop_ratio": self.crop_frames / total if total else 0.0}
+
+    # ------------------------- Full mesh -------------------------
+    def _locate_with_mesh(self, frame):
+        self.mesh_frames += 1
+        self._since_mesh = 0
+        self.last_mode = "mesh"
+        points = face_landmarks.from_results(self.engine.process_bgr(frame))
+        if points is None:
+            self.reset()
+            return None
+
+        h, w = frame.shape[:2]
+        pixels = face_landmarks.to_pixels(points, w, h).astype(np.float64)
+
+        centers = (pixels[LEFT_IRIS_CENTER], pixels[RIGHT_IRIS_CENTER])
+        self._eyes = [self._eye_box(pixels[bounds], w, h)
+                      for bounds in (LEFT_EYE_BOUNDS, RIGHT_EYE_BOUNDS)]
+
+        # Calibrate the crop estimator against the mesh on this same frame
+        self._bias = []
+        for box, center in zip(self._eyes, centers):
+            estimate = self._dark_centroid(frame, box)
+            self._bias.append(np.zeros(2) if estimate is None else center - estimate)
+        return centers
+
+    def _eye_box(self, points, w, h):
+        x0, y0 = points.min(axis=0)
+        x1, y1 = points.max(axis=0)
+        half_w = (x1 - x0) * (1 + self.margin) / 2
+        half_h = (y1 - y0) * (1 + self.margin) / 2
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        return (int(max(cx - half_w, 0)), int(max(cy - half_h, 0)),
+                int(min(cx + half_w, w)), int(min(cy + half_h, h)))
+
+    # ------------------------- Crop fast path -------------------------
+    def _locate_in_crops(self, frame):
+        h, w = frame.shape[:2]
+        centers = []
+        for i, box in enumerate(self._eyes):
+            estimate = self._dark_centroid(frame, box)
+            if estimate is None:
+                return None
+            center = estimate + self._bias[i]
+            centers.append(center)
+            # Re-center the crop on the iris so it follows head motion
+            half_w, half_h = (box[2] - box[0]) / 2, (box[3] - box[1]) / 2
+            self._eyes[i] = (int(max(center[0] - half_w, 0)), int(max(center[1] - half_h, 0)),
+                             int(min(center[0] + half_w, w)), int(min(center[1] + half_h, h)))
+        return tuple(centers)
+
+    def _dark_centroid(self, frame, box):
+        x0, y0, x1, y1 = box
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return None
+        crop = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(crop, None, fx=self.downscale, fy=self.downscale,
+                           interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(small, (3, 3), 0)
+
+        darkest, typical = float(small.min()), float(np.median(small))
+        if typical - darkest < self.min_contrast:
+            return None  # Eye closed or crop drifted onto skin
+        # Pupil/iris pixels: within `dark_level` of the way from darkest to typical
+        mask = (small <= darkest + self.dark_level * (typical - darkest)).astype(np.uint8)
+        m = cv2.moments(mask, binaryImage=True)
+        if m["m00"] == 0:
+            return None
+
+        cx, cy = m["m10"] / m["m00"], m["m01"] / m["m00"]
+        sh, sw = small.shape[:2]
+        border = 0.1
+        if not (border * sw < cx < (1 - border) * sw and border * sh < cy < (1 - border) * sh):
+            return None  # Pupil at the crop edge: the eye is leaving the crop
+        return np.array([x0 + cx / self.downscale, y0 + cy / self.downscale])
@@ -0,0 +1,287 @@
+import glob
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+import numpy as np
+import voice_features
+import noise_profile
+from frame_grabber import LatencyMeter
+from vad_recorder import block_features, is_speech_block, BLOCK_MS
+
+# 📁 Path resolution (for .py or .exe)
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, "keyword_templates")
+
+# Closed commands handled without full recognition; "open …" / "type …" always go to ASR
+KEYWORDS = ["click", "double click", "scroll up", "scroll down", "exit"]
+
+SAMPLERATE = voice_features.FEATURE_SAMPLERATE
+PRE_ROLL_MS = 100
+KEYWORD_SILENCE_MS = 160   # pause after which a short utterance is matched against the templates
+PHRASE_SILENCE_MS = 500    # pause that ends an open-vocabulary phrase
+MIN_WORD_MS = 120
+MAX_KEYWORD_MS = 1200      # longer utterances can't be a closed command
+MAX_PHRASE_MS = 6000
+MATCH_DISTANCE = 0.75      # normalised DTW distance a keyword must beat
+MATCH_MARGIN = 0.9         # ...and best / runner-up (other keyword) must be below this
+MAX_LENGTH_RATIO = 2.0     # templates this much longer or shorter than the utterance are skipped
+N_CEPSTRA = 13
+
+
+# ------------------------- Templates -------------------------
+def keyword_features(signal, samplerate):
+    """Per-frame MFCCs (c1..c12), mean/variance normalised over the utterance."""
+    x, samplerate = voice_features.resample(voice_features._to_float_mono(signal), samplerate)
+    cepstra, _ = voice_features.mfcc(x, samplerate, n_mfcc=N_CEPSTRA)
+    cepstra = cepstra[:, 1:]
+    if len(cepstra) == 0:
+        return cepstra
+    return (cepstra - cepstra.mean(axis=0)) / (cepstra.std(axis=0) + 1e-6)
+
+
+def template_name(keyword, index):
+    return f"{keyword.replace(' ', '_')}.{index}.wav"
+
+
+def load_templates(directory=TEMPLATE_DIR):
+    """Returns {keyword: [feature arrays]} for every recorded template WAV."""
+    from scipy.io.wavfile import read as read_wav
+
+    templates = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        keyword = os.path.basename(path).split(".")[0].replace("_", " ")
+        samplerate, data = read_wav(path)
+        features = keyword_features(data, samplerate)
+        if len(features):
+            templates.setdefault(keyword, []).append(features)
+    return templates
+
+
+def dtw_distance(a, b, bound=np.inf):
+    """Length-normalised DTW cost between two (frames, dims) feature arrays.
+
+    Returns early with a lower bound once that bound is already >= `bound`,
+    so callers looking for a minimum can skip hopeless templates.
+    """
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).mean(axis=2))
+    n, m = cost.shape
+    # Every warping path visits each row and each column at least once
+    lower = max(cost.min(axis=1).sum(), cost.min(axis=0).sum()) / (n + m)
+    if lower >= bound:
+        return lower
+
+    # Sweep anti-diagonals (i + j = d): each cell only needs the previous two
+    # diagonals, so a whole diagonal is one vectorised step. The cost matrix
+    # is skewed so row d holds diagonal d indexed by i; cells that aren't on
+    # the diagonal are infinite.
+    i, j = np.indices(cost.shape)
+    skewed = np.full((n + m + 1, n + 1), np.inf)
+    skewed[i + j + 2, i + 1] = cost
+    before, previous, current = (np.full(n + 1, np.inf) for _ in range(3))
+    before[0] = 0.0
+    step = np.empty(n)
+    for d in range(2, n + m + 1):
+        np.minimum(before[:-1], previous[:-1], out=step)
+        np.minimum(step, previous[1:], out=step)
+        np.add(skewed[d, 1:], step, out=current[1:])
+        current[0] = np.inf
+        before, previous, current = previous, current, before
+    return previous[n] / (n + m)
+
+
+def match_keyword(features, templates):
+    """Best keyword for an utterance, or (None, distance) if nothing is close enough."""
+    best = {}
+    for keyword, references in templates.items():
+        distance = np.inf
+        for ref in references:
+            ratio = len(features) / max(len(ref), 1)
+            if not 1.0 / MAX_LENGTH_RATIO <= ratio <= MAX_LENGTH_RATIO:
+                continue
+            distance = min(distance, dtw_distance(features, ref, bound=distance))
+        best[keyword] = distance
+    if not best:
+        return None, np.inf
+    ranked = sorted(best.items(), key=lambda item: item[1])
+    keyword, distance = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else np.inf
+    if distance <= MATCH_DISTANCE and distance < MATCH_MARGIN * runner_up:
+        return keyword, distance
+    return None, distance
+
+
+# ------------------------- Spotter -------------------------
+class KeywordSpotter:
+    """Listens continuously and fires closed commands straight from audio.
+
+    The microphone stream is split into utterances by block energy. After a
+    short pause (KEYWORD_SILENCE_MS) a short utterance is matched against the
+    enrolled templates with DTW; a match calls on_keyword(keyword) at once.
+    Anything else keeps collecting until a longer pause and is then handed to
+    on_phrase(pcm_int16, samplerate, session) for full recognition. With
+    `open_stream` (e.g. a speech backend's stream) every utterance is also fed
+    to a streaming session as it is spoken, so the phrase arrives decoded and
+    `session` only needs finishing; otherwise session is None.
+    """
+
+    def __init__(self, templates, on_keyword, on_phrase, samplerate=SAMPLERATE, open_stream=None):
+        self.templates = templates
+        self.on_keyword = on_keyword
+        self.on_phrase = on_phrase
+        self.samplerate = samplerate
+        self.open_stream = open_stream
+        self.partial = ""  # latest partial transcript of the utterance in progress
+        self.latency = LatencyMeter()
+        self.keywords = self.phrases = self.rejected = 0
+        self.running = False
+        self._blocks = queue.Queue()
+        self._stream = None
+        self._thread = None
+
+        self._pre_roll = deque(maxlen=PRE_ROLL_MS // BLOCK_MS)
+        self.noise = noise_profile.get_profile()
+        self._floor = noise_profile.FloorTracker(self.noise, BLOCK_MS)
+        self._reset_segment()
+
+    def _reset_segment(self):
+        self._segment = []
+        self._session = None
+        self._speech_blocks = 0
+        self._speech_end = 0
+        self._silent_run = 0
+        self._word_end_time = None
+
+    def start(self):
+        import sounddevice as sd
+
+        def callback(indata, frames, time_info, status):
+            self._blocks.put((indata.copy(), time.perf_counter()))
+
+        self.running = True
+        self._stream = sd.InputStream(samplerate=self.samplerate, channels=1, dtype='int16',
+                                      blocksize=int(self.samplerate * BLOCK_MS / 1000), callback=callback)
+        self._stream.start()
+        self._thread = threading.Thread(target=self._run, name="keyword-spotter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        while self.running:
+            try:
+                block, arrived = self._blocks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.feed(block, arrived)
+
+    def feed(self, block, arrived=None):
+        """Processes one BLOCK_MS block of int16 (n, 1) audio. Public so recordings can be replayed."""
+        arrived = time.perf_counter() if arrived is None else arrived
+        level, zcr = block_features(block)
+        # Every block, speech included: the percentile keeps speech out of the floor
+        self._floor.add(level)
+        floor = self.noise.noise_dbfs if self.noise.calibrated else level
+        is_speech = is_speech_block(level, zcr, floor, self.samplerate)
+
+        if not self._segment:
+            if is_speech:
+                self._segment = list(self._pre_roll) + [block]
+                self._speech_blocks = 1
+                self._speech_end = len(self._segment)
+                self._word_end_time = arrived
+                if self.open_stream is not None:
+                    self._session = self.open_stream()
+                    self._stream_blocks(self._segment)
+            else:
+                self._pre_roll.append(block)
+            return
+
+        self._segment.append(block)
+        if self._session is not None:
+            self._stream_blocks([block])
+        if is_speech:
+            self._speech_blocks += 1
+            self._speech_end = len(self._segment)
+            self._silent_run = 0
+            self._word_end_time = arrived
+            if len(self._segment) * BLOCK_MS >= MAX_PHRASE_MS:
+                self._finish_phrase()
+            return
+
+        self._silent_run += 1
+        if self._speech_blocks * BLOCK_MS < MIN_WORD_MS:
+            if self._silent_run * BLOCK_MS >= KEYWORD_SILENCE_MS:
+                self._reset_segment()  # click or pop, not speech
+            return
+        if (self._silent_run * BLOCK_MS == KEYWORD_SILENCE_MS and self.templates
+                and self._speech_end * BLOCK_MS <= MAX_KEYWORD_MS):
+            if self._try_keyword():
+                return
+        if self._silent_run * BLOCK_MS >= PHRASE_SILENCE_MS:
+            self._finish_phrase()
+
+    def _stream_blocks(self, blocks):
+        self.partial = self._session.accept(np.concatenate(blocks).tobytes())
+
+    def _speech_audio(self):
+        return np.concatenate(self._segment[:self._speech_end + 2])
+
+    def _try_keyword(self):
+        features = keyword_features(self._speech_audio(), self.samplerate)
+        keyword, distance = match_keyword(features, self.templates)
+        if keyword is None:
+            self.rejected += 1
+            return False
+        word_end = self._word_end_time
+        self._reset_segment()
+        self.keywords += 1
+        self.on_keyword(keyword)
+        self.latency.add(time.perf_counter() - word_end)
+        return True
+
+    def _finish_phrase(self):
+        audio = self._speech_audio()
+        session = self._session
+        self._reset_segment()
+        self.phrases += 1
+        self.on_phrase(audio, self.samplerate, session)
+
+
+# ------------------------- Enrollment -------------------------
+def record_templates(directory=TEMPLATE_DIR, keywords=KEYWORDS, repeats=3):
+    """Records each closed command a few times as spotting templates."""
+    from scipy.io.wavfile import write as write_wav
+    from vad_recorder import record_utterance
+
+    os.makedirs(directory, exist_ok=True)
+    for keyword in keywords:
+        for index in range(1, repeats + 1):
+            print(f"🎙 Say \"{keyword}\" ({index}/{repeats})...")
+            utterance = record_utterance(samplerate=SAMPLERATE, max_duration=2.0, trailing_silence=0.3)
+            if not utterance.speech_found:
+                print("❌ No voice detected, skipping.")
+                continue
+            write_wav(os.path.join(directory, template_name(keyword, index)), SAMPLERATE, utterance.recording)
+    print(f"✅ Keyword templates saved to {directory}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "enroll":
+        record_templates()
+    else:
+        print("Usage: python keyword_spotter.py enroll")
@@ -0,0 +1,87 @@
+import threading
+import numpy as np
+
+# Configs warmed at startup: (static_image_mode, refine_landmarks, max_num_faces)
+STATIC_CONFIG = (True, True, 1)
+VIDEO_CONFIG = (False, True, 1)
+DEFAULT_WARM_CONFIGS = (STATIC_CONFIG, VIDEO_CONFIG)
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+class LandmarkEngine:
+    """A long-lived FaceMesh graph that can be shared between threads."""
+
+    def __init__(self, static_image_mode=False, refine_landmarks=True, max_num_faces=1):
+        self.config = (static_image_mode, refine_landmarks, max_num_faces)
+        self._face_mesh = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        # Caller must hold self._lock
+        if self._face_mesh is None:
+            import mediapipe as mp  # Imported on first use; it is the slowest import in the app
+
+            static_image_mode, refine_landmarks, max_num_faces = self.config
+            self._face_mesh = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=static_image_mode,
+                refine_landmarks=refine_landmarks,
+                max_num_faces=max_num_faces,
+            )
+
+    def warm(self):
+        """Loads the graph and pushes one blank frame through it."""
+        with self._lock:
+            self._ensure_loaded()
+            self._face_mesh.process(np.zeros((480, 640, 3), dtype=np.uint8))
+
+    def process(self, rgb):
+        # MediaPipe graphs are not re-entrant, so calls are serialized per engine
+        with self._lock:
+            self._ensure_loaded()
+            return self._face_mesh.process(rgb)
+
+    def process_bgr(self, frame):
+        import cv2
+
+        return self.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def close(self):
+        with self._lock:
+            if self._face_mesh is not None:
+                self._face_mesh.close()
+                self._face_mesh = None
+
+
+def get_engine(static_image_mode=False, refine_landmarks=True, max_num_faces=1):
+    """Returns the shared engine for this config, creating it on first use."""
+    key = (bool(static_image_mode), bool(refine_landmarks), int(max_num_faces))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = LandmarkEngine(*key)
+            _engines[key] = engine
+    return engine
+
+
+def warm_up(configs=DEFAULT_WARM_CONFIGS):
+    """Loads the given engine configs on a background thread and returns it."""
+    def _warm():
+        for config in configs:
+            try:
+                get_engine(*config).warm()
+            except Exception as e:
+                print(f"⚠️ FaceMesh warm-up failed for {config}: {e}")
+
+    thread = threading.Thread(target=_warm, name="landmark-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def close_all():
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.close()
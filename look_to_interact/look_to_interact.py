@@ -1,27 +1,24 @@
-import os
-import pickle
-import time
-import speech_recognition as sr
-import face_recognition
-import cv2
-import subprocess
-
-# Paths for authentication data
-AUTH_DIR = "auth_data"
-FACE_ENCODINGS_FILE = os.path.join(AUTH_DIR, "face_encodings.pkl")
-VOICE_PASSPHRASE_FILE = os.path.join(AUTH_DIR, "voice_passphrase.txt")
-
-# Ensure auth_data directory exists
-os.makedirs(AUTH_DIR, exist_ok=True)
+import sys
+import camera_session
+import controller_session
+import startup
+# Face encodings and the passphrase live in the credential store (migrated from auth_data/)
+import credential_store
+import identification_index
 
 def record_voice():
     """Records a short voice sample and returns the audio data."""
+    import speech_recognition as sr
+    import noise_profile
+
     recognizer = sr.Recognizer()
+    noise = noise_profile.get_profile()
     with sr.Microphone() as source:
         print("🎙 Please say your passphrase clearly...")
-        recognizer.adjust_for_ambient_noise(source)
+        noise.prepare(recognizer, source)
         try:
             audio = recognizer.listen(source, timeout=5)
+            noise.update_from(recognizer)
             print("✅ Voice recorded successfully!")
             return audio
         except sr.WaitTimeoutError:
@@ -30,78 +27,103 @@ def record_voice():
 
 def extract_voice_features(audio):
     """Extracts voice features using speech recognition."""
-    recognizer = sr.Recognizer()
+    import speech_recognition as sr
+    import speech_backends
+
     try:
-        text = recognizer.recognize_google(audio)
+        text = speech_backends.recognize(audio)
         print(f"🗣 Extracted Text: {text}")
         return text
     except sr.UnknownValueError:
         print("❌ Voice not recognized!")
         return None
 
-def authenticate_user():
-    """Authenticates a user based on face and voice data."""
+def authenticate_user(user=credential_store.DEFAULT_USER):
+    """Authenticates a user based on face and voice data; user=None identifies the face among all enrolled users."""
     print("\n🟢 Starting Authentication Process...")
 
     # --- Face Authentication ---
-    if not os.path.exists(FACE_ENCODINGS_FILE):
+    store = credential_store.get_store()
+    if user is None:
+        gallery = identification_index.get_gallery(store)
+        enrolled = gallery.has_face.any()
+    else:
+        credentials = store.get(user)
+        enrolled = credentials is not None and credentials.face is not None
+    if not enrolled:
         print("❌ No face data found! Please enroll first.")
-        return
+        return False
 
-    video_capture = cv2.VideoCapture(0)
+    video_capture = camera_session.open_camera(0)
     print("📷 Capturing face for verification...")
-    time.sleep(2)
+    camera_session.wait_until_settled(video_capture)
     ret, frame = video_capture.read()
     video_capture.release()
 
     if not ret:
         print("❌ Failed to capture face image!")
-        return
+        return False
+
+    import face_recognition  # Loads dlib and its models; only needed once a face is captured
 
-    known_face_encodings = pickle.load(open(FACE_ENCODINGS_FILE, "rb"))
     unknown_face_encodings = face_recognition.face_encodings(frame)
 
     if not unknown_face_encodings:
         print("❌ No face detected! Try again.")
-        return
-
-    match = face_recognition.compare_faces([known_face_encodings], unknown_face_encodings[0])[0]
-    if not match:
-        print("🚫 Face authentication failed!")
-        return
+        return False
+
+    if user is None:
+        # 🔎 Walk-up identification: nearest enrolled face, no user name needed
+        nearest = gallery.nearest_faces(unknown_face_encodings[0], k=1)
+        if not nearest or nearest[0].score > identification_index.FACE_TOLERANCE:
+            print("🚫 Face not recognized!")
+            return False
+        user = nearest[0].user
+        credentials = store.get(user)
+        if credentials is None:
+            print("🚫 Face authentication failed!")
+            return False
+        print(f"👤 Recognized {user} (distance {nearest[0].score:.2f})")
+    else:
+        match = face_recognition.compare_faces([credentials.face], unknown_face_encodings[0])[0]
+        if not match:
+            print("🚫 Face authentication failed!")
+            return False
 
     print("✅ Face authentication passed!")
 
     # --- Voice Authentication ---
-    if not os.path.exists(VOICE_PASSPHRASE_FILE):
+    stored_passphrase = credentials.metadata.get("passphrase")
+    if not stored_passphrase:
         print("❌ No voice passphrase found! Please enroll first.")
-        return
+        return False
 
     audio = record_voice()
     if audio is None:
-        return
+        return False
 
     passphrase = extract_voice_features(audio)
     if not passphrase:
-        return
-
-    with open(VOICE_PASSPHRASE_FILE, "r") as f:
-        stored_passphrase = f.read().strip()
+        return False
 
     if passphrase.lower() == stored_passphrase.lower():
         print("✅ Voice authentication passed! 🎉 Access Granted!")
         
-        # 🚀 Start voice and gaze-based interaction system
+        # 🚀 Same process: the shared camera session and speech models are reused
         print("🚀 Starting EyeVox system...")
-        subprocess.Popen(["python", "voice_commands.py"], shell=True)
-        print("✅ EyeVox system started successfully!")
-    else:
-        print("🚫 Voice authentication failed!")
+        controller_session.start_controller()
+        return True
+    print("🚫 Voice authentication failed!")
+    return False
 
 if __name__ == "__main__":
+    startup.mark("imported")
+    if startup.mark("first_prompt"):
+        sys.exit(0)
     action = input("Enter 'login' to authenticate: ").strip().lower()
 
     if action == "login":
-        authenticate_user()
+        if authenticate_user():
+            controller_session.get_session().wait()
     else:
         print("❌ Invalid input! Use 'login'.")
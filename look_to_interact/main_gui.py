@@ -2,31 +2,44 @@ import tkinter as tk
 from tkinter import messagebox
 import threading
 import subprocess
-import authenticate_user as auth_module
 import time
-import speech_recognition as sr
+import landmark_engine
+import controller_session
+import startup
+
+startup.mark("imported")
 
 # ---------------- GUI Functions ----------------
 def handle_authenticate():
     status_label.config(text="🔍 Authenticating...", fg="yellow")
     app.update()
 
-    success, gaze_score, voice_score = auth_module.authenticate()
+    import authenticate_user as auth_module  # Usually already preloaded in the background
 
-    if success:
+    # Starts gaze control in this process as soon as access is granted, before the dialog
+    result = auth_module.authenticate()
+    details = (f"Gaze Match: {result.gaze_score:.2f} ({result.gaze_seconds:.1f}s)\n"
+               f"Voice Match: {result.voice_score:.2f} ({result.voice_seconds:.1f}s)")
+    if result.user:
+        details = f"User: {result.user}\n" + details
+
+    if result.success:
         status_label.config(text="✅ Access Granted!", fg="lime")
-        messagebox.showinfo("Access Granted", f"Gaze Match: {gaze_score:.2f}\nVoice Match: {voice_score:.2f}")
+        messagebox.showinfo("Access Granted", details)
         time.sleep(1)
         minimize_window()
-        threading.Thread(target=run_voice_gaze_control, daemon=True).start()
     else:
         status_label.config(text="❌ Access Denied!", fg="red")
-        messagebox.showerror("Access Denied", f"Gaze Match: {gaze_score:.2f}\nVoice Match: {voice_score:.2f}")
+        messagebox.showerror("Access Denied", details)
 
 def register_credentials():
     status_label.config(text="📝 Registering credentials...", fg="yellow")
     app.update()
 
+    import camera_session
+
+    # enroll_user.py opens camera 0 itself; on Windows the device is exclusive to one process
+    camera_session.close_all()
     try:
         subprocess.run(["python", "enroll_user.py"], check=True)
         success = True
@@ -40,28 +53,34 @@ def register_credentials():
         status_label.config(text="❌ Registration Failed", fg="red")
         messagebox.showerror("Failed", "Could not register credentials.")
 
-def run_voice_gaze_control():
-    try:
-        subprocess.run(["python", "voice_commands.py"])
-    except Exception as e:
-        print(f"⚠️ Error running voice_commands.py: {e}")
-
 def minimize_window():
     app.iconify()
 
 # ---------------- Voice Activation Before Auth ----------------
 def listen_for_commands():
+    import speech_recognition as sr
+    import speech_backends
+    import noise_profile
+
     recognizer = sr.Recognizer()
     mic = sr.Microphone()
+    noise = noise_profile.get_profile()
 
     with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
+        noise.prepare(recognizer, source)
 
     while True:
+        # The running controller has the microphone; wake phrases resume once it exits
+        if controller_session.get_session().is_active():
+            time.sleep(0.5)
+            continue
         try:
             with mic as source:
-                audio = recognizer.listen(source, timeout=5)
-                command = recognizer.recognize_google(audio).lower()
+                try:
+                    audio = recognizer.listen(source, timeout=5)
+                finally:
+                    noise.update_from(recognizer)
+                command = speech_backends.recognize(audio).lower()
                 print(f"🗣️ Heard: {command}")
 
                 if "sign up" in command:
@@ -103,7 +122,17 @@ exit_button.pack(pady=10)
 status_label = tk.Label(app, text="🎤 Say 'Sign up' or 'Log in'", font=("Arial", 12), fg="white", bg="black")
 status_label.pack(pady=10)
 
-# Start voice command listener
-threading.Thread(target=listen_for_commands, daemon=True).start()
+def on_first_window():
+    if startup.mark("first_window"):
+        app.destroy()
+        return
+    # Load the FaceMesh graphs and the auth stack while the user is still on the start screen
+    landmark_engine.warm_up()
+    startup.preload(["authenticate_user", "scipy.spatial.distance", "scipy.signal", "scipy.fft"])
+
+    # Start voice command listener
+    threading.Thread(target=listen_for_commands, daemon=True).start()
 
+# Heavy work starts only once the window is up
+app.after(0, on_first_window)
 app.mainloop()
@@ -0,0 +1,215 @@
+import atexit
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+# 📁 Path resolution (for .py or .exe)
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_FILE = os.path.join(BASE_DIR, "logs", "noise_profile.json")
+
+DEFAULT_NOISE_DBFS = -60.0
+ENERGY_RATIO = 1.5          # speech_recognition's dynamic_energy_ratio: threshold = noise rms * ratio
+MIN_ENERGY_THRESHOLD = 50   # int16 rms; keeps a silent room from triggering on breath
+SMOOTHING = 0.05            # weight of each new idle observation in the rolling estimate
+SAVE_INTERVAL = 30.0        # seconds between writes of a changed profile
+FIRST_CALIBRATION = 0.5     # seconds of blocking calibration, only when nothing is known yet
+FLOOR_WINDOW = 5.0          # seconds of monitor audio the floor is estimated from
+FLOOR_PERCENTILE = 10       # speech rarely fills 90% of a window; the quiet gaps are the room
+FLOOR_UPDATE = 0.5          # seconds between monitor updates of the rolling estimate
+
+
+def dbfs_to_rms(dbfs):
+    return 32768.0 * 10 ** (dbfs / 20.0)
+
+
+def rms_to_dbfs(rms):
+    return 20.0 * math.log10(max(rms, 1e-3) / 32768.0)
+
+
+class FloorTracker:
+    """Low percentile of recent block levels, folded into `profile` every FLOOR_UPDATE seconds.
+
+    Feed it every block: speech only fills the top of the window, and a
+    room that gets louder is followed within one window.
+    """
+
+    def __init__(self, profile, block_ms, window=FLOOR_WINDOW, percentile=FLOOR_PERCENTILE):
+        self.profile = profile
+        self.levels = deque(maxlen=int(window * 1000 / block_ms))
+        self.percentile = percentile
+        self.update_every = max(1, int(FLOOR_UPDATE * 1000 / block_ms))
+        self.seen = 0
+
+    def add(self, level):
+        self.levels.append(float(level))
+        self.seen += 1
+        if self.seen % self.update_every == 0:
+            self.profile.observe(self.estimate())
+
+    def estimate(self):
+        ordered = sorted(self.levels)
+        return ordered[min(len(ordered) - 1, len(ordered) * self.percentile // 100)] if ordered else None
+
+
+class NoiseProfile:
+    """Rolling estimate of the room's noise floor, shared by every microphone listener.
+
+    Listeners feed it idle (non-speech) audio levels as they run, and the
+    last estimate is saved to disk so the next start needs no calibration.
+    Saving happens on a timer thread, never inside observe().
+    """
+
+    def __init__(self, path=PROFILE_FILE):
+        self.path = path
+        self.noise_dbfs = DEFAULT_NOISE_DBFS
+        self.calibrated = False
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        self._save_timer = None
+        self._monitor = None
+        self._monitor_thread = None
+        self._monitoring = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.noise_dbfs = float(data["noise_dbfs"])
+            self.calibrated = True
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def save(self, force=False):
+        with self._lock:
+            self._save_timer = None
+            if not self._dirty or (not force and time.monotonic() - self._saved_at < SAVE_INTERVAL):
+                return
+            data = {"noise_dbfs": round(self.noise_dbfs, 2), "updated": time.strftime("%Y-%m-%d %H:%M:%S")}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save noise profile: {e}")
+
+    def observe(self, dbfs, weight=SMOOTHING):
+        """Folds one idle-audio level (dBFS) into the rolling estimate."""
+        dbfs = float(dbfs)
+        with self._lock:
+            if not self.calibrated:
+                self.noise_dbfs, self.calibrated = dbfs, True
+            else:
+                self.noise_dbfs += weight * (dbfs - self.noise_dbfs)
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(SAVE_INTERVAL, self.save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    @property
+    def energy_threshold(self):
+        return max(dbfs_to_rms(self.noise_dbfs) * ENERGY_RATIO, MIN_ENERGY_THRESHOLD)
+
+    # ------------------------- speech_recognition listeners -------------------------
+    def prepare(self, recognizer, source=None):
+        """Readies a Recognizer without the usual blocking adjust_for_ambient_noise pass.
+
+        The threshold comes from the shared estimate and keeps adapting while
+        the recognizer waits for speech. Only on the very first run, with no
+        estimate yet, a short calibration is made on `source`.
+        """
+        if not self.calibrated and source is not None:
+            recognizer.adjust_for_ambient_noise(source, duration=FIRST_CALIBRATION)
+            self.update_from(recognizer, weight=1.0)
+        recognizer.energy_threshold = self.energy_threshold
+        recognizer.dynamic_energy_threshold = True
+
+    def update_from(self, recognizer, weight=SMOOTHING):
+        """Takes in the threshold the recognizer adapted to while idle."""
+        self.observe(rms_to_dbfs(recognizer.energy_threshold / ENERGY_RATIO), weight)
+
+    # ------------------------- Background monitor -------------------------
+    def start_monitor(self, samplerate=16000):
+        """Keeps the estimate current from the microphone on a background stream.
+
+        The audio callback only queues blocks; a monitor thread measures them
+        and folds a FloorTracker estimate into the profile every FLOOR_UPDATE
+        seconds.
+        """
+        if self._monitor is not None:
+            return self._monitor
+        try:
+            import sounddevice as sd
+            from vad_recorder import BLOCK_MS
+        except ImportError as e:
+            print(f"⚠️ Noise monitor unavailable: {e}")
+            return None
+
+        blocks = queue.Queue()
+
+        def callback(indata, frames, time_info, status):
+            blocks.put(indata.copy())
+
+        try:
+            self._monitor = sd.InputStream(samplerate=samplerate, channels=1, dtype='int16',
+                                           blocksize=int(samplerate * BLOCK_MS / 1000), callback=callback)
+            self._monitor.start()
+        except Exception as e:
+            print(f"⚠️ Noise monitor unavailable: {e}")
+            self._monitor = None
+            return None
+        self._monitoring = True
+        self._monitor_thread = threading.Thread(target=self._run_monitor, args=(blocks, BLOCK_MS),
+                                                name="noise-monitor", daemon=True)
+        self._monitor_thread.start()
+        return self._monitor
+
+    def _run_monitor(self, blocks, block_ms):
+        from vad_recorder import block_features
+
+        tracker = FloorTracker(self, block_ms)
+        while self._monitoring:
+            try:
+                block = blocks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            level, _ = block_features(block)
+            tracker.add(level)
+
+    def stop_monitor(self):
+        self._monitoring = False
+        if self._monitor is not None:
+            self._monitor.stop()
+            self._monitor.close()
+            self._monitor = None
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(timeout=1.0)
+            self._monitor_thread = None
+        self.save(force=True)
+
+
+_profile = None
+_profile_lock = threading.Lock()
+
+
+def get_profile():
+    global _profile
+    with _profile_lock:
+        if _profile is None:
+            _profile = NoiseProfile()
+            atexit.register(_profile.save, True)
+        return _profile
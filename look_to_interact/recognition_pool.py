@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from frame_grabber import LatencyMeter
+
+# text is None when recognition failed (error holds the exception); recognize_s is
+# None for submit_text entries; latency runs from the end of the utterance to delivery
+UtteranceResult = namedtuple("UtteranceResult", ["seq", "text", "error", "recognize_s", "latency_s"])
+
+
+class RecognitionPool:
+    """Recognizes finished utterances on a bounded pool while capture keeps listening.
+
+    submit() never blocks the capture thread: each utterance gets the next
+    sequence number, and once `max_pending` are queued or running new ones
+    are dropped (and counted) instead. on_result(UtteranceResult) is called
+    strictly in sequence order, whichever worker finishes first.
+    """
+
+    def __init__(self, recognize_fn, on_result, workers=2, max_pending=4):
+        self.recognize_fn = recognize_fn
+        self.on_result = on_result
+        self.max_pending = max_pending
+        self.latency = LatencyMeter()
+        self.recognize_latency = LatencyMeter()
+        self.submitted = self.dropped = self.failed = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asr")
+        self._lock = threading.Lock()
+        self._deliver_lock = threading.Lock()
+        self._next_seq = 0
+        self._next_delivery = 0
+        self._pending = 0
+        self._finished = {}
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return None
+            seq = self._next_seq
+            self._next_seq += 1
+            self._pending += 1
+            self.submitted += 1
+            return seq
+
+    def submit(self, audio, ended_at=None):
+        """Queues `audio` for recognition; returns its sequence number or None if dropped."""
+        ended_at = time.perf_counter() if ended_at is None else ended_at
+        seq = self._reserve()
+        if seq is None:
+            print("⚠️ Recognition backlog full; utterance dropped.")
+            return None
+        self._pool.submit(self._recognize, seq, audio, ended_at)
+        return seq
+
+    def submit_text(self, text, ended_at=None):
+        """Slots an already-known transcript (e.g. a spotted keyword) into the ordered stream."""
+        ended_at = time.perf_counter() if ended_at is None else ended_at
+        seq = self._reserve()
+        if seq is not None:
+            self._finish(seq, text, None, None, ended_at)
+        return seq
+
+    def _recognize(self, seq, audio, ended_at):
+        start = time.perf_counter()
+        try:
+            text, error = self.recognize_fn(audio), None
+        except Exception as e:
+            text, error = None, e
+        self._finish(seq, text, error, time.perf_counter() - start, ended_at)
+
+    def _finish(self, seq, text, error, recognize_s, ended_at):
+        with self._lock:
+            self._finished[seq] = (text, error, recognize_s, ended_at)
+        # One thread delivers at a time so callbacks never interleave or reorder
+        with self._deliver_lock:
+            while True:
+                with self._lock:
+                    item = self._finished.pop(self._next_delivery, None)
+                    if item is None:
+                        return
+                    seq = self._next_delivery
+                    self._next_delivery += 1
+                    self._pending -= 1
+                text, error, recognize_s, ended_at = item
+                result = UtteranceResult(seq, text, error, recognize_s, time.perf_counter() - ended_at)
+                if text is None:
+                    self.failed += 1
+                elif recognize_s is not None:
+                    self.recognize_latency.add(recognize_s)
+                self.latency.add(result.latency_s)
+                try:
+                    self.on_result(result)
+                except Exception as e:
+                    print(f"❌ Error handling voice command: {e}")
+
+    def close(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def report(self):
+        summary = self.latency.summary()
+        asr = self.recognize_latency.summary()
+        line = f"🎙️ Utterances {self.submitted}, failed {self.failed}, dropped {self.dropped}"
+        if summary:
+            line += f" | end→command p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms"
+        if asr:
+            line += f" | recognize p50 {asr['p50_ms']:.0f} ms"
+        print(line)
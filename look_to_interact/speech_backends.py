@@ -0,0 +1,232 @@
+import json
+import os
+import sys
+import threading
+
+# 📁 Path resolution (for .py or .exe)
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Backend selection: EYEVOX_ASR_BACKEND=vosk|google|scripted (default: vosk if installed, else google)
+ASR_BACKEND_ENV = "EYEVOX_ASR_BACKEND"
+VOSK_MODEL_ENV = "EYEVOX_VOSK_MODEL"
+DEFAULT_VOSK_MODEL = os.path.join(BASE_DIR, "models", "vosk-model-small-en-us")
+ASR_SAMPLERATE = 16000
+
+
+class RecognizerBackend:
+    """Turns speech into text.
+
+    recognize() takes a speech_recognition.AudioData for a finished phrase.
+    stream() returns a session that accepts raw 16-bit mono PCM as it is
+    captured and reports partial transcripts along the way. Unintelligible
+    audio raises sr.UnknownValueError, like recognize_google does.
+    """
+
+    name = "base"
+    local = False
+
+    def recognize(self, audio):
+        session = self.stream()
+        session.accept(audio.get_raw_data(convert_rate=ASR_SAMPLERATE, convert_width=2))
+        return finish(session)
+
+    def stream(self, grammar=None):
+        raise NotImplementedError
+
+
+class StreamSession:
+    def accept(self, pcm):
+        """Feeds PCM bytes; returns the current partial transcript (may be "")."""
+        raise NotImplementedError
+
+    def final(self):
+        """Flushes the stream and returns the full transcript."""
+        raise NotImplementedError
+
+
+def _require_text(text):
+    text = (text or "").strip()
+    if not text:
+        import speech_recognition as sr
+        raise sr.UnknownValueError()
+    return text
+
+
+def finish(session):
+    """Final transcript of a stream that has been fed the whole utterance."""
+    return _require_text(session.final())
+
+
+# ------------------------- Google (network) -------------------------
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+
+    def __init__(self):
+        import speech_recognition as sr
+
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+    def stream(self, grammar=None):
+        # The web API has no streaming mode: buffer the audio and send it once at the end
+        return _BufferedSession(self)
+
+
+class _BufferedSession(StreamSession):
+    def __init__(self, backend):
+        self.backend = backend
+        self.chunks = []
+
+    def accept(self, pcm):
+        self.chunks.append(pcm)
+        return ""
+
+    def final(self):
+        import speech_recognition as sr
+
+        audio = sr.AudioData(b"".join(self.chunks), ASR_SAMPLERATE, 2)
+        try:
+            return self.backend.recognize(audio)
+        except sr.UnknownValueError:
+            return ""
+
+
+# ------------------------- Vosk (local, streaming) -------------------------
+class VoskBackend(RecognizerBackend):
+    """On-CPU Kaldi decoding. Pass `grammar` to restrict output to a phrase list."""
+
+    name = "vosk"
+    local = True
+
+    def __init__(self, model_path=None):
+        try:
+            import vosk
+        except ImportError:
+            raise RuntimeError("The vosk package is not installed (pip install vosk)")
+        model_path = model_path or os.environ.get(VOSK_MODEL_ENV, DEFAULT_VOSK_MODEL)
+        if not os.path.isdir(model_path):
+            raise RuntimeError(f"Vosk model not found at {model_path}")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def stream(self, grammar=None):
+        if grammar:
+            recognizer = self._vosk.KaldiRecognizer(self.model, ASR_SAMPLERATE, json.dumps(list(grammar) + ["[unk]"]))
+        else:
+            recognizer = self._vosk.KaldiRecognizer(self.model, ASR_SAMPLERATE)
+        return _VoskSession(recognizer)
+
+
+class _VoskSession(StreamSession):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.segments = []
+
+    def accept(self, pcm):
+        if self.recognizer.AcceptWaveform(pcm):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            if text:
+                self.segments.append(text)
+            return " ".join(self.segments)
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(self.segments + ([partial] if partial else []))
+
+    def final(self):
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        if text:
+            self.segments.append(text)
+        return " ".join(self.segments).replace("[unk]", "").strip()
+
+
+# ------------------------- Scripted (deterministic) -------------------------
+class ScriptedBackend(RecognizerBackend):
+    """Deterministic stand-in: returns the given transcripts in order.
+
+    Streaming sessions reveal one more word per accept() call, so partial
+    result handling can be exercised without a microphone or a model.
+    Set EYEVOX_ASR_SCRIPT="click;scroll up;exit" to use it from the env.
+    """
+
+    name = "scripted"
+    local = True
+
+    def __init__(self, transcripts=None):
+        if transcripts is None:
+            transcripts = [t.strip() for t in os.environ.get("EYEVOX_ASR_SCRIPT", "").split(";") if t.strip()]
+        self.transcripts = list(transcripts)
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            return self.transcripts.pop(0) if self.transcripts else ""
+
+    def recognize(self, audio):
+        return _require_text(self._next())
+
+    def stream(self, grammar=None):
+        return _ScriptedSession(self._next())
+
+
+class _ScriptedSession(StreamSession):
+    def __init__(self, text):
+        self.words = text.split()
+        self.revealed = 0
+
+    def accept(self, pcm):
+        self.revealed = min(self.revealed + 1, len(self.words))
+        return " ".join(self.words[:self.revealed])
+
+    def final(self):
+        return " ".join(self.words)
+
+
+# ------------------------- Selection -------------------------
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "scripted": ScriptedBackend,
+}
+
+_default_backend = None
+_default_lock = threading.Lock()
+
+
+def create_backend(name=None):
+    name = name or os.environ.get(ASR_BACKEND_ENV)
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown ASR backend '{name}' (choose from {', '.join(BACKENDS)})")
+        return BACKENDS[name]()
+    try:
+        return VoskBackend()
+    except RuntimeError as e:
+        print(f"⚠️ Local speech recognition unavailable ({e}); using Google.")
+        return GoogleBackend()
+
+
+def get_backend():
+    """The process-wide backend; models are loaded once and shared."""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            _default_backend = create_backend()
+        return _default_backend
+
+
+def set_backend(backend):
+    global _default_backend
+    with _default_lock:
+        _default_backend = backend
+
+
+def recognize(audio):
+    """Transcribes an AudioData, or finishes a StreamSession fed while the phrase was spoken."""
+    if isinstance(audio, StreamSession):
+        return finish(audio)
+    return get_backend().recognize(audio)
@@ -0,0 +1,47 @@
+import importlib
+import os
+import threading
+import time
+
+# Set by benchmark_startup.py to a file path: entry points append "EYEVOX_STARTUP <event> <unix time>"
+# lines to it (a file rather than stdout, so windowed PyInstaller builds can be measured too)
+PROBE_ENV = "EYEVOX_STARTUP_PROBE"
+# ...and exit once this event has been reached
+EXIT_ENV = "EYEVOX_STARTUP_EXIT"
+MARKER = "EYEVOX_STARTUP"
+
+_seen = set()
+_seen_lock = threading.Lock()
+
+
+def probing():
+    return bool(os.environ.get(PROBE_ENV))
+
+
+def mark(event):
+    """Records a startup milestone (once per process); returns True if the app should now exit."""
+    if not probing():
+        return False
+    now = time.time()
+    with _seen_lock:
+        if event in _seen:
+            return False
+        _seen.add(event)
+        with open(os.environ[PROBE_ENV], "a") as f:
+            f.write(f"{MARKER} {event} {now:.6f}\n")
+    return os.environ.get(EXIT_ENV) == event
+
+
+def preload(module_names):
+    """Imports heavy modules on a background thread so the first click doesn't pay for them."""
+    def _load():
+        for name in module_names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"⚠️ Preloading {name} failed: {e}")
+        mark("preloaded")
+
+    thread = threading.Thread(target=_load, name="preload", daemon=True)
+    thread.start()
+    return thread
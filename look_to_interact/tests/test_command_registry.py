@@ -0,0 +1,92 @@
+from unittest import mock
+import pytest
+import command_registry
+from command_registry import CommandRegistry, ActionExecutor
+
+
+def _commands(ran):
+    commands = CommandRegistry()
+
+    def record(name):
+        return lambda **args: ran.append((name, args))
+
+    commands.register("open {app}", record("open"), name="open", lane="launch", debounce=1.0)
+    commands.register("type {text}", record("type"), name="type")
+    commands.register("click", record("click"), debounce=0.3)
+    commands.register("double click", record("double click"), debounce=0.3)
+    commands.register("scroll up", record("scroll up"), fuzzy=True)
+    commands.register("scroll down", record("scroll down"), fuzzy=True)
+    commands.register("exit", record("exit"))
+    return commands
+
+
+def _names(matches):
+    return [match.command.name for match in matches]
+
+
+def test_closed_commands_in_a_row():
+    commands = _commands([])
+    assert _names(commands.match("scroll down scroll down click")) == ["scroll down", "scroll down", "click"]
+    assert _names(commands.match("Double click!")) == ["double click"]
+    assert _names(commands.match("click double click")) == ["click", "double click"]
+
+
+def test_placeholder_captures_the_rest():
+    commands = _commands([])
+    (match,) = commands.match("open Visual Studio")
+    assert match.command.name == "open" and match.args == {"app": "Visual Studio"}
+    (match,) = commands.match("type click here")
+    assert match.args == {"text": "click here"}
+    assert commands.match("open") == []
+
+
+def test_fuzzy_only_for_long_words_of_multi_word_commands():
+    commands = _commands([])
+    (match,) = commands.match("scrolls up")
+    assert match.command.name == "scroll up" and match.score < 1.0
+    assert commands.match("clicks") == []
+    assert commands.match("exits") == []
+    assert commands.match("hello world") == []
+
+
+def test_placeholder_must_end_the_pattern():
+    with pytest.raises(ValueError):
+        CommandRegistry().register("open {app} now", lambda app: None)
+
+
+def test_no_near_misses():
+    commands = _commands([])
+    assert commands.near_misses() == []
+    commands.register("scroll", lambda: None)
+    with pytest.raises(ValueError):
+        commands.check_near_misses()
+
+
+@pytest.mark.parametrize("module", ["voice_commands", "gaze_controller"])
+def test_controller_commands_have_no_near_misses(module):
+    pytest.importorskip("pyautogui")
+    controller = pytest.importorskip(module).VoiceGazeController
+    commands = controller.register_commands(mock.Mock())
+    commands.check_near_misses()
+
+
+def test_debounce_drops_quick_repeats(monkeypatch):
+    ran = []
+    commands = _commands(ran)
+    now = [100.0]
+    monkeypatch.setattr(command_registry.time, "perf_counter", lambda: now[0])
+    actions = ActionExecutor()
+    try:
+        (click,) = commands.match("click")
+        (scroll,) = commands.match("scroll up")
+        assert actions.submit(click)
+        now[0] += 0.1
+        assert not actions.submit(click)      # echo within the debounce window
+        assert actions.submit(scroll)         # other commands are unaffected
+        assert actions.submit(scroll)         # no debounce on scrolling
+        now[0] += 0.3
+        assert actions.submit(click)
+    finally:
+        actions.stop()
+    assert actions.debounced == 1
+    assert [name for name, _ in ran] == ["click", "scroll up", "scroll up", "click"]
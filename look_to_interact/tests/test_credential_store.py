@@ -0,0 +1,126 @@
+import pickle
+import numpy as np
+import pytest
+from scipy.io.wavfile import write as write_wav
+import credential_store
+import voice_features
+
+
+@pytest.fixture
+def store(tmp_path):
+    return credential_store.CredentialStore(str(tmp_path / "store.bin"))
+
+
+def _voice(seed):
+    return np.random.default_rng(seed).normal(size=credential_store.VOICE_DIM).astype(np.float32)
+
+
+def test_round_trip(store, tmp_path):
+    face = np.linspace(-1, 1, credential_store.FACE_DIM)
+    store.enroll("ann", gaze=[0.1, 0.2, 0.3, 0.4], voice=[_voice(0), _voice(1)], face=face,
+                 metadata={"passphrase": "open sesame"})
+
+    reopened = credential_store.CredentialStore(store.path)
+    credentials = reopened.get("ann")
+    assert credentials.user == "ann"
+    np.testing.assert_allclose(credentials.gaze, [0.1, 0.2, 0.3, 0.4], rtol=1e-6)
+    np.testing.assert_allclose(credentials.face, face, rtol=1e-6, atol=1e-7)
+    np.testing.assert_array_equal(credentials.voice, [_voice(0), _voice(1)])
+    assert credentials.metadata == {"passphrase": "open sesame"}
+    assert reopened.get("nobody") is None
+
+
+def test_partial_update_keeps_other_fields(store):
+    store.enroll("ann", gaze=[1, 0, 0, 0], voice=_voice(0))
+    store.enroll("ann", voice=_voice(1), add_voice=True)
+    credentials = store.get("ann")
+    np.testing.assert_array_equal(credentials.gaze, [1, 0, 0, 0])
+    np.testing.assert_array_equal(credentials.voice, [_voice(0), _voice(1)])
+    assert credentials.face is None
+    assert store.users() == ["ann"]
+
+
+def test_voice_samples_are_capped(store):
+    samples = [_voice(i) for i in range(credential_store.MAX_VOICE_SAMPLES + 3)]
+    store.enroll("ann", voice=samples)
+    np.testing.assert_array_equal(store.get("ann").voice, samples[-credential_store.MAX_VOICE_SAMPLES:])
+
+
+def test_rewrite_when_full(store):
+    users = [f"user{i}" for i in range(credential_store.INITIAL_CAPACITY * 3)]
+    for i, user in enumerate(users):
+        store.enroll(user, gaze=[i, 0, 0, 0])
+    assert store.users() == sorted(users)
+    for i, user in enumerate(users):
+        assert store.get(user).gaze[0] == i
+
+    reopened = credential_store.CredentialStore(store.path)
+    assert reopened.users() == sorted(users)
+
+
+def test_remove_and_compact(store):
+    for user in ("ann", "ben", "cat"):
+        store.enroll(user, gaze=[1, 2, 3, 4])
+    store.enroll("ben", gaze=[4, 3, 2, 1])  # supersedes ben's first record
+    revision = store.revision()
+    assert store.remove("ann")
+    assert not store.remove("ann")
+    assert store.revision() != revision
+    assert store.users() == ["ben", "cat"]
+
+    store.compact()
+    users, records = store.arrays()
+    assert sorted(users) == ["ben", "cat"]
+    assert len(records) == 2
+    np.testing.assert_array_equal(store.get("ben").gaze, [4, 3, 2, 1])
+    assert credential_store.CredentialStore(store.path).users() == ["ben", "cat"]
+
+
+def test_rejects_bad_names_and_files(store, tmp_path):
+    with pytest.raises(ValueError):
+        store.enroll("", gaze=[1, 2, 3, 4])
+    with pytest.raises(ValueError):
+        store.enroll("x" * (credential_store.MAX_USER_BYTES + 1), gaze=[1, 2, 3, 4])
+
+    junk = tmp_path / "junk.bin"
+    junk.write_bytes(b"not a credential store" * 10)
+    with pytest.raises(ValueError):
+        credential_store.CredentialStore(str(junk)).refresh()
+
+
+def test_migrate_legacy(store, tmp_path, monkeypatch):
+    credentials_dir = tmp_path / "credentials"
+    auth_dir = tmp_path / "auth_data"
+    credentials_dir.mkdir()
+    auth_dir.mkdir()
+    (credentials_dir / "gaze_vector.txt").write_text("0.5 0.25 0.125 1.0")
+    samplerate = 16000
+    t = np.arange(samplerate) / samplerate
+    tone = (np.sin(2 * np.pi * 220 * t) * (1 + t) * 8000).astype(np.int16)
+    write_wav(str(credentials_dir / "voice_sample_1.wav"), samplerate, tone)
+    face = np.arange(credential_store.FACE_DIM) / credential_store.FACE_DIM
+    with open(auth_dir / "face_encodings.pkl", "wb") as f:
+        pickle.dump([face], f)
+    (auth_dir / "voice_passphrase.txt").write_text("open sesame\n")
+
+    monkeypatch.setattr(credential_store, "LEGACY_GAZE_FILE", str(credentials_dir / "gaze_vector.txt"))
+    monkeypatch.setattr(credential_store, "LEGACY_VOICE_GLOBS", (str(credentials_dir / "voice_sample_*.wav"),))
+    monkeypatch.setattr(credential_store, "LEGACY_FACE_FILE", str(auth_dir / "face_encodings.pkl"))
+    monkeypatch.setattr(credential_store, "LEGACY_PASSPHRASE_FILE", str(auth_dir / "voice_passphrase.txt"))
+
+    assert credential_store.migrate_legacy(store)
+    credentials = store.get(credential_store.DEFAULT_USER)
+    np.testing.assert_allclose(credentials.gaze, [0.5, 0.25, 0.125, 1.0])
+    np.testing.assert_allclose(credentials.face, face, rtol=1e-6)
+    assert credentials.metadata["passphrase"] == "open sesame"
+    assert len(credentials.voice) == 1
+    expected = voice_features.compute_embedding(tone, samplerate)
+    assert voice_features.score_templates(credentials.voice, expected)[0] > 0.999
+
+
+def test_migrate_legacy_without_files(store, tmp_path, monkeypatch):
+    for name in ("LEGACY_GAZE_FILE", "LEGACY_FACE_FILE", "LEGACY_PASSPHRASE_FILE"):
+        monkeypatch.setattr(credential_store, name, str(tmp_path / "missing"))
+    monkeypatch.setattr(credential_store, "LEGACY_VOICE_GLOBS", (str(tmp_path / "missing*.wav"),))
+    assert not credential_store.migrate_legacy(store)
+    assert store.users() == []
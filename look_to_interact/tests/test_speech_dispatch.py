@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+import keyword_spotter
+import noise_profile
+import speech_backends
+from command_registry import CommandRegistry, ActionExecutor
+from recognition_pool import RecognitionPool
+
+BLOCK = keyword_spotter.SAMPLERATE * keyword_spotter.BLOCK_MS // 1000
+
+
+def _blocks(duration_ms, amplitude, seed):
+    rng = np.random.default_rng(seed)
+    n = duration_ms // keyword_spotter.BLOCK_MS
+    t = np.arange(BLOCK * n) / keyword_spotter.SAMPLERATE
+    if amplitude > 0.01:
+        signal = amplitude * np.sin(2 * np.pi * 220 * t)
+    else:
+        signal = amplitude * rng.normal(size=len(t))
+    pcm = (signal * 32767).astype(np.int16).reshape(n, BLOCK, 1)
+    return list(pcm)
+
+
+def _utterance(seed):
+    return _blocks(400, 0.3, seed) + _blocks(keyword_spotter.PHRASE_SILENCE_MS + 100, 0.001, seed)
+
+
+@pytest.fixture
+def noise(tmp_path, monkeypatch):
+    profile = noise_profile.NoiseProfile(str(tmp_path / "noise_profile.json"))
+    monkeypatch.setattr(noise_profile, "get_profile", lambda: profile)
+    return profile
+
+
+def test_scripted_stream_reveals_one_word_per_chunk():
+    backend = speech_backends.ScriptedBackend(["scroll down click"])
+    session = backend.stream()
+    assert [session.accept(b"\0\0") for _ in range(4)] == ["scroll", "scroll down", "scroll down click",
+                                                           "scroll down click"]
+    assert speech_backends.finish(session) == "scroll down click"
+
+
+def test_recognize_finishes_stream_sessions(monkeypatch):
+    monkeypatch.setattr(speech_backends, "_default_backend", speech_backends.ScriptedBackend(["exit"]))
+    session = speech_backends.ScriptedBackend(["open notepad"]).stream()
+    assert speech_backends.recognize(session) == "open notepad"
+    assert speech_backends.recognize(object()) == "exit"
+
+
+def test_unintelligible_audio_raises():
+    sr = pytest.importorskip("speech_recognition")
+    with pytest.raises(sr.UnknownValueError):
+        speech_backends.ScriptedBackend([]).recognize(None)
+
+
+def test_spoken_phrases_dispatch_commands(noise, monkeypatch):
+    backend = speech_backends.ScriptedBackend(["Scroll up click", "open notepad"])
+    monkeypatch.setattr(speech_backends, "_default_backend", backend)
+    ran = []
+    commands = CommandRegistry()
+    commands.register("open {app}", lambda app: ran.append(f"open {app}"), name="open", lane="launch")
+    commands.register("click", lambda: ran.append("click"))
+    commands.register("scroll up", lambda: ran.append("scroll up"), fuzzy=True)
+    actions = ActionExecutor()
+
+    def on_result(result):
+        for match in commands.match(result.text):
+            actions.submit(match)
+
+    pool = RecognitionPool(lambda audio: speech_backends.recognize(audio).lower(), on_result)
+    phrases = []
+
+    def on_phrase(pcm, samplerate, session):
+        phrases.append(session)
+        pool.submit(session)
+
+    spotter = keyword_spotter.KeywordSpotter({}, on_keyword=None, on_phrase=on_phrase, open_stream=backend.stream)
+    partials = []
+    for block in _blocks(1000, 0.001, 0):
+        spotter.feed(block)
+    assert noise.calibrated
+    for seed in (1, 2):
+        for block in _utterance(seed):
+            spotter.feed(block)
+            partials.append(spotter.partial)
+
+    pool.close()
+    actions.stop()
+    assert len(phrases) == 2 and all(session is not None for session in phrases)
+    assert "Scroll" in partials and "open notepad" in partials
+    # Input actions keep their spoken order; launches run on their own lane
+    assert [action for action in ran if action != "open notepad"] == ["scroll up", "click"]
+    assert "open notepad" in ran
@@ -0,0 +1,111 @@
+import queue
+import time
+from collections import namedtuple
+import numpy as np
+import noise_profile
+
+BLOCK_MS = 20
+PRE_ROLL_MS = 200          # audio kept from before speech onset
+CALIBRATION_MS = 200       # initial blocks used to estimate the room's noise floor
+ONSET_MARGIN_DB = 10.0     # speech must be this much louder than the noise floor
+MIN_SPEECH_DB = -50.0      # ...and never quieter than this (dBFS)
+HISS_MARGIN_DB = 16.0      # blocks less than this far above the floor may be hiss...
+MAX_SPEECH_CROSSINGS = 15000  # ...if they cross zero more often than this per second (0.35/sample at 44.1 kHz)
+
+# recording: int16 (n, 1) array like sd.rec; speech_found: False if onset never came
+Utterance = namedtuple("Utterance", ["recording", "samplerate", "speech_found", "speech_seconds", "elapsed"])
+
+
+def block_features(block):
+    x = block[:, 0].astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(x * x)) + 1e-9
+    zcr = np.count_nonzero(np.diff(np.signbit(x))) / max(len(x) - 1, 1)
+    return 20 * np.log10(rms), zcr
+
+
+def is_speech_block(level, zcr, floor, samplerate):
+    """Loud enough above the floor; near the floor, also not hiss by zero-crossing rate."""
+    if level <= max(floor + ONSET_MARGIN_DB, MIN_SPEECH_DB):
+        return False
+    # Loud fricatives cross zero as often as hiss does, so only quiet blocks are tested
+    return level >= floor + HISS_MARGIN_DB or zcr * samplerate < MAX_SPEECH_CROSSINGS
+
+
+def record_utterance(samplerate=44100, max_duration=3.0, onset_timeout=5.0,
+                     trailing_silence=0.4, min_speech=0.2, cancel=None):
+    """Records from the default microphone until the speaker stops.
+
+    Capture runs in a sounddevice callback; this thread only classifies
+    20 ms blocks by energy and zero-crossing rate. The utterance starts at
+    speech onset (with a short pre-roll), ends after `trailing_silence`
+    seconds of quiet, and is capped at `max_duration` seconds of audio.
+    Setting the optional `cancel` event stops recording at the next block.
+    """
+    import sounddevice as sd  # Initializes PortAudio, so only when a recording is made
+
+    block_size = int(samplerate * BLOCK_MS / 1000)
+    blocks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata.copy())
+
+    pre_roll = int(PRE_ROLL_MS / BLOCK_MS)
+    calibration_blocks = int(CALIBRATION_MS / BLOCK_MS)
+    trailing_blocks = int(trailing_silence * 1000 / BLOCK_MS)
+    min_speech_blocks = int(min_speech * 1000 / BLOCK_MS)
+    max_blocks = int(max_duration * 1000 / BLOCK_MS)
+    onset_blocks = int(onset_timeout * 1000 / BLOCK_MS)
+
+    noise = noise_profile.get_profile()
+    captured = []
+    noise_levels = []
+    onset = None
+    speech_blocks = silent_run = 0
+    start = time.perf_counter()
+
+    with sd.InputStream(samplerate=samplerate, channels=1, dtype='int16',
+                        blocksize=block_size, callback=callback):
+        while cancel is None or not cancel.is_set():
+            try:
+                block = blocks.get(timeout=1.0)
+            except queue.Empty:
+                break  # Device stalled; return what we have
+            captured.append(block)
+            level, zcr = block_features(block)
+
+            if len(noise_levels) < calibration_blocks and onset is None:
+                noise_levels.append(level)
+            if len(noise_levels) < calibration_blocks and noise.calibrated:
+                floor = noise.noise_dbfs  # Known room: speech may start right away
+            else:
+                floor = np.median(noise_levels) if noise_levels else MIN_SPEECH_DB
+            is_speech = is_speech_block(level, zcr, floor, samplerate)
+
+            if onset is None:
+                if is_speech:
+                    onset = max(len(captured) - 1 - pre_roll, 0)
+                    speech_blocks = 1
+                elif len(captured) >= onset_blocks:
+                    break
+                continue
+
+            if is_speech:
+                speech_blocks += 1
+                silent_run = 0
+            else:
+                silent_run += 1
+            if silent_run >= trailing_blocks and speech_blocks >= min_speech_blocks:
+                break
+            if len(captured) - onset >= max_blocks:
+                break
+
+    elapsed = time.perf_counter() - start
+    if len(noise_levels) >= calibration_blocks:
+        noise.observe(float(np.median(noise_levels)), weight=0.2)
+    if onset is None:
+        recording = np.concatenate(captured) if captured else np.zeros((0, 1), dtype=np.int16)
+        return Utterance(recording, samplerate, False, 0.0, elapsed)
+
+    end = len(captured) - max(silent_run - 2, 0)  # keep ~40 ms of the trailing silence
+    recording = np.concatenate(captured[onset:end])
+    return Utterance(recording, samplerate, True, speech_blocks * BLOCK_MS / 1000, elapsed)
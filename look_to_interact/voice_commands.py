@@ -1,74 +1,187 @@
-import os
-import pickle
 import time
+from contextlib import nullcontext
 import cv2
 import subprocess
 import pyautogui
 import threading
-import speech_recognition as sr
-import mediapipe as mp
+import startup
+from recognition_pool import RecognitionPool
+from command_registry import CommandRegistry, ActionExecutor
+import landmark_engine
+import frame_sources
+import camera_session
+import credential_store
+import identification_index
+from frame_grabber import open_reader
+from cursor_actuator import CursorActuator
+from iris_tracker import IrisTracker
 import webbrowser
 
-# Define the base directory and credentials directory
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-AUTH_DIR = os.path.join(BASE_DIR, "auth_data")
-FACE_ENCODINGS_FILE = os.path.join(AUTH_DIR, "face_encodings.pkl")
-VOICE_PASSPHRASE_FILE = os.path.join(AUTH_DIR, "voice_passphrase.txt")
+# How often (in processed frames) the gaze loop prints its latency report
+LATENCY_REPORT_INTERVAL = 150
 
-# Create the credentials directory if it doesn't exist
-os.makedirs(AUTH_DIR, exist_ok=True)
+# Cursor smoothing: "one_euro", "kalman" or "none"
+CURSOR_FILTER = "one_euro"
 
-# Initialize MediaPipe face mesh
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True)
+# Run the full face mesh at least this often; eye crops are used in between
+MESH_REFRESH_EVERY = 10  # frames
 
-# Get screen size for cursor movement
-screen_width, screen_height = pyautogui.size()
+# Utterances recognized concurrently, and how many may wait before new ones are dropped
+RECOGNITION_WORKERS = 2
+MAX_PENDING_UTTERANCES = 4
+
+# The same click heard twice within this window (echo, double detection) runs once
+COMMAND_DEBOUNCE = 0.3  # seconds
+
+def process_frame(frame, captured_at, irises, cursor, screen_size, stage=nullcontext):
+    """One gaze-loop step (irises, cursor, overlay); returns the iris centers or None."""
+    screen_width, screen_height = screen_size
+    with stage("inference"):
+        # Full mesh on refresh frames, small eye crops otherwise
+        centers = irises.locate(frame)
+    if centers is None:
+        return None
+
+    with stage("mapping"):
+        (left_x, left_y), (right_x, right_y) = [(int(x), int(y)) for x, y in centers]
+        avg_x = (left_x + right_x) // 2
+        avg_y = (left_y + right_y) // 2
+        screen_x = screen_width * (avg_x / frame.shape[1])
+        screen_y = screen_height * (avg_y / frame.shape[0])
+    with stage("actuation"):
+        # Filtered and applied on the actuator thread; never blocks the loop
+        cursor.submit(screen_x, screen_y, captured_at)
+    with stage("overlay"):
+        # Draw rectangles around both irises
+        box_size = 30
+        cv2.rectangle(frame, (left_x - box_size, left_y - box_size),
+                      (left_x + box_size, left_y + box_size), (0, 255, 0), 2)
+        cv2.rectangle(frame, (right_x - box_size, right_y - box_size),
+                      (right_x + box_size, right_y + box_size), (0, 255, 0), 2)
+    return centers
 
 class VoiceGazeController:
     def __init__(self):
-        self.recognizer = sr.Recognizer()
         self.running = True
+        self.first_tracked_at = None  # perf_counter() of the first frame that moved the cursor
+        self.commands = self.register_commands()
+        self.actions = ActionExecutor()
         self.voice_thread = threading.Thread(target=self.listen_commands, daemon=True)
         self.voice_thread.start()
 
     def listen_commands(self):
+        # The speech stack is imported here, on the voice thread, so it never delays the first frame
+        import keyword_spotter
+
+        # Capture keeps segmenting while finished utterances are recognized in the background
+        self.recognition = RecognitionPool(self.recognize_utterance, self.on_utterance,
+                                           workers=RECOGNITION_WORKERS, max_pending=MAX_PENDING_UTTERANCES)
+        templates = keyword_spotter.load_templates()
+        try:
+            if templates:
+                self.spot_commands(templates)
+            else:
+                print("ℹ️ No keyword templates; run 'python keyword_spotter.py enroll' for instant commands.")
+                self.capture_commands()
+        finally:
+            self.recognition.close(wait=False)
+            self.recognition.report()
+            self.actions.report()
+            self.actions.stop()
+
+    def capture_commands(self):
+        import speech_recognition as sr
+        import noise_profile
+
+        self.recognizer = sr.Recognizer()
+        noise = noise_profile.get_profile()
         with sr.Microphone() as source:
+            noise.prepare(self.recognizer, source)
             print("🎤 Voice input ready...")
             while self.running:
                 try:
                     audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                    command = self.recognizer.recognize_google(audio).lower()
-                    print(f"You said: {command}")
-                    self.process_command(command)
-                    time.sleep(1)  # Delay to avoid over-processing
+                    self.recognition.submit(audio)
+                    noise.update_from(self.recognizer)
                 except sr.WaitTimeoutError:
+                    noise.update_from(self.recognizer)
                     continue
                 except Exception as e:
-                    print(f"🤷 Couldn't understand, please try again.")
+                    print(f"❌ Microphone error: {e}")
+
+    def spot_commands(self, templates):
+        """Closed commands fire from the keyword spotter; only open/type phrases go to ASR."""
+        import keyword_spotter
+        import speech_backends
+
+        # Phrases are decoded while they are spoken; the pool only finishes the stream
+        spotter = keyword_spotter.KeywordSpotter(templates, self.on_keyword, self.on_phrase,
+                                                 open_stream=speech_backends.get_backend().stream).start()
+        print(f"🎤 Voice input ready (instant: {', '.join(sorted(templates))})...")
+        while self.running:
+            time.sleep(0.2)
+        spotter.stop()
+
+    def on_keyword(self, keyword):
+        # Goes through the pool only to keep its place behind phrases still being recognized
+        self.recognition.submit_text(keyword)
+
+    def on_phrase(self, pcm, samplerate, session=None):
+        import speech_recognition as sr
+
+        self.recognition.submit(session if session is not None else sr.AudioData(pcm.tobytes(), samplerate, 2))
+
+    def recognize_utterance(self, audio):
+        import speech_backends
+
+        return speech_backends.recognize(audio).lower()
+
+    def on_utterance(self, result):
+        if result.text is None:
+            print(f"🤷 Couldn't understand #{result.seq}, please try again.")
+            return
+        print(f"You said: {result.text} (#{result.seq}, {result.latency_s * 1000:.0f} ms)")
+        if self.running:
+            self.process_command(result.text)
+
+    def register_commands(self):
+        commands = CommandRegistry()
+        commands.register("open {app}", self.open_application, name="open", lane="launch", debounce=1.0)
+        commands.register("type {text}", self.type_text, name="type")
+        commands.register("click", self.click, debounce=COMMAND_DEBOUNCE)
+        commands.register("double click", self.double_click, debounce=COMMAND_DEBOUNCE)
+        commands.register("scroll up", self.scroll_up, fuzzy=True)
+        commands.register("scroll down", self.scroll_down, fuzzy=True)
+        commands.register("exit", self.exit)
+        return commands
 
     def process_command(self, command):
-        if command.startswith("open "):
-            app = command[5:]
-            self.open_application(app)
-        elif command.startswith("type "):
-            text = command[5:]
-            self.type_text(text)
-        elif command == "click":
-            pyautogui.click()
-            print("🖱️ Clicked!")
-        elif command == "double click":
-            pyautogui.doubleClick()
-            print("🖱️ Double Clicked!")
-        elif command == "scroll up":
-            pyautogui.scroll(500)
-            print("⬆️ Scrolled Up!")
-        elif command == "scroll down":
-            pyautogui.scroll(-500)
-            print("⬇️ Scrolled Down!")
-        elif command == "exit":
-            print("👋 Exiting EyeVox...")
-            self.running = False
+        """Matches the utterance and queues its actions; never waits for them to run."""
+        matches = self.commands.match(command)
+        if not matches:
+            print(f"🤷 Unknown command: {command}")
+        for match in matches:
+            self.actions.submit(match)
+
+    def click(self):
+        pyautogui.click()
+        print("🖱️ Clicked!")
+
+    def double_click(self):
+        pyautogui.doubleClick()
+        print("🖱️ Double Clicked!")
+
+    def scroll_up(self):
+        pyautogui.scroll(500)
+        print("⬆️ Scrolled Up!")
+
+    def scroll_down(self):
+        pyautogui.scroll(-500)
+        print("⬇️ Scrolled Down!")
+
+    def exit(self):
+        print("👋 Exiting EyeVox...")
+        self.running = False
 
     def open_application(self, app):
         try:
@@ -86,71 +199,97 @@ class VoiceGazeController:
     def type_text(self, text):
         pyautogui.typewrite(text)
 
-    def run_gaze_control(self):
-        cap = cv2.VideoCapture(0)
+    def run_gaze_control(self, source=None, preview=True):
+        """Runs the gaze loop on `source` (camera by default; see frame_sources.open_source)."""
+        cap = frame_sources.open_source(source)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        grabber = open_reader(cap)
+        cursor = CursorActuator(CURSOR_FILTER).start()
+        # Shared MediaPipe face mesh (loaded once, reused by every caller)
+        face_mesh = landmark_engine.get_engine(static_image_mode=False, max_num_faces=1)
+        irises = IrisTracker(face_mesh, refresh_every=MESH_REFRESH_EVERY)
+        screen_size = pyautogui.size()
+        processed = 0
         print("🧿 Gaze control active. Press 'q' to quit.")
 
         while self.running:
-            success, frame = cap.read()
-            if not success:
+            item = grabber.read(timeout=1.0)
+            if item is None:
+                if frame_sources.is_exhausted(cap):
+                    break
                 continue
+            frame, captured_at, _ = item
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = face_mesh.process(rgb)
-
-            if results.multi_face_landmarks:
-                landmarks = results.multi_face_landmarks[0].landmark
-
-                left_iris = landmarks[474]
-                right_iris = landmarks[469]
-
-                left_x, left_y = int(left_iris.x * frame.shape[1]), int(left_iris.y * frame.shape[0])
-                right_x, right_y = int(right_iris.x * frame.shape[1]), int(right_iris.y * frame.shape[0])
-
-                # Draw rectangles around both irises
-                box_size = 30
-                cv2.rectangle(frame, (left_x - box_size, left_y - box_size),
-                              (left_x + box_size, left_y + box_size), (0, 255, 0), 2)
-                cv2.rectangle(frame, (right_x - box_size, right_y - box_size),
-                              (right_x + box_size, right_y + box_size), (0, 255, 0), 2)
-
-                avg_x = (left_x + right_x) // 2
-                avg_y = (left_y + right_y) // 2
+            centers = process_frame(frame, captured_at, irises, cursor, screen_size)
+            if startup.mark("first_frame") or (centers is not None and startup.mark("first_tracked_frame")):
+                self.running = False
 
-                screen_x = screen_width * (avg_x / frame.shape[1])
-                screen_y = screen_height * (avg_y / frame.shape[0])
+            if centers is not None and self.first_tracked_at is None:
+                self.first_tracked_at = time.perf_counter()
 
-                pyautogui.moveTo(screen_x, screen_y, duration=0.1)  # smooth movement
+            processed += 1
+            if processed % LATENCY_REPORT_INTERVAL == 0:
+                self.report_latency(cursor, grabber, irises)
 
-            cv2.imshow("EyeVox", frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                self.running = False
-                break
+            if preview:
+                cv2.imshow("EyeVox", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.running = False
+                    break
 
+        grabber.stop()
+        cursor.stop()
+        self.report_latency(cursor, grabber, irises)
         cap.release()
-        cv2.destroyAllWindows()
+        if preview:
+            cv2.destroyAllWindows()
         print("🛑 Gaze control stopped.")
 
+    def report_latency(self, cursor, grabber, irises):
+        summary = cursor.latency.summary()
+        stats = grabber.stats()
+        iris_stats = irises.stats()
+        print(f"👁️ Iris: {iris_stats['crop_ratio']:.0%} of frames from eye crops "
+              f"({iris_stats['mesh_frames']} full-mesh, {iris_stats['crop_failures']} crop fallbacks)")
+        if summary:
+            print(f"⏱️ Capture→cursor: p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms | "
+                  f"frames {stats['captured']}, dropped {stats['dropped']}, cursor moves {cursor.moves}")
+        else:
+            print(f"⏱️ Frames {stats['captured']}, dropped {stats['dropped']} (no cursor updates yet)")
+
 def record_voice():
+    import speech_recognition as sr
+    import noise_profile
+
     recognizer = sr.Recognizer()
+    noise = noise_profile.get_profile()
     with sr.Microphone() as source:
         print("🎙 Say your passphrase clearly...")
-        recognizer.adjust_for_ambient_noise(source)
+        noise.prepare(recognizer, source)
         try:
             audio = recognizer.listen(source, timeout=5)
+            noise.update_from(recognizer)
             return audio
         except sr.WaitTimeoutError:
             return None
 
-def authenticate_user():
+def authenticate_user(user=credential_store.DEFAULT_USER):
+    """Face + passphrase check; user=None identifies the face among all enrolled users."""
     print("\n🔐 Starting Authentication...")
 
-    if not os.path.exists(FACE_ENCODINGS_FILE):
+    store = credential_store.get_store()
+    if user is None:
+        gallery = identification_index.get_gallery(store)
+        enrolled = gallery.has_face.any()
+    else:
+        credentials = store.get(user)
+        enrolled = credentials is not None and credentials.face is not None
+    if not enrolled:
         print("❌ Face data not found!")
         return False
 
-    cap = cv2.VideoCapture(0)
-    time.sleep(2)
+    cap = frame_sources.open_source(0)
+    camera_session.wait_until_settled(cap)
     ret, frame = cap.read()
     cap.release()
 
@@ -159,20 +298,27 @@ def authenticate_user():
         return False
 
     import face_recognition
-    known_enc = pickle.load(open(FACE_ENCODINGS_FILE, "rb"))
     unknown_encs = face_recognition.face_encodings(frame)
 
     if not unknown_encs:
         print("❌ No face detected.")
         return False
 
-    if not face_recognition.compare_faces([known_enc], unknown_encs[0])[0]:
+    if user is None:
+        nearest = gallery.nearest_faces(unknown_encs[0], k=1)
+        credentials = store.get(nearest[0].user) if nearest else None
+        if credentials is None or nearest[0].score > identification_index.FACE_TOLERANCE:
+            print("🚫 Face not recognized.")
+            return False
+        print(f"👤 Recognized {credentials.user}")
+    elif not face_recognition.compare_faces([credentials.face], unknown_encs[0])[0]:
         print("🚫 Face authentication failed.")
         return False
 
     print("✅ Face verified!")
 
-    if not os.path.exists(VOICE_PASSPHRASE_FILE):
+    stored_pass = credentials.metadata.get("passphrase")
+    if not stored_pass:
         print("❌ Voice passphrase not found!")
         return False
 
@@ -181,8 +327,6 @@ def authenticate_user():
         return False
 
     spoken_pass = extract_voice_features(audio)
-    with open(VOICE_PASSPHRASE_FILE, "r") as f:
-        stored_pass = f.read().strip()
 
     if spoken_pass and spoken_pass.lower() == stored_pass.lower():
         print("✅ Voice verified! Access granted.")
@@ -192,15 +336,19 @@ def authenticate_user():
         return False
 
 def extract_voice_features(audio):
-    recognizer = sr.Recognizer()
+    import speech_backends
+
     try:
-        return recognizer.recognize_google(audio)
+        return speech_backends.recognize(audio)
     except:
         return None
 
 import sys
 
 if __name__ == "__main__":
+    startup.mark("imported")
     print("🚀 Starting EyeVox controller...")
+    landmark_engine.warm_up([landmark_engine.VIDEO_CONFIG])
     controller = VoiceGazeController()
-    controller.run_gaze_control()
+    # Optional argument: camera index, video file, image directory or "synthetic"
+    controller.run_gaze_control(sys.argv[1] if len(sys.argv) > 1 else None)
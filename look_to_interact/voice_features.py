@@ -0,0 +1,155 @@
+import os
+from functools import lru_cache
+import numpy as np
+from math import gcd
+
+# Bump when the feature recipe changes so stale embeddings get recomputed
+EMBEDDING_VERSION = 2
+EMBEDDING_SUFFIX = ".embedding.npz"
+
+# Audio is resampled to this rate before feature extraction (speech needs < 8 kHz bandwidth)
+FEATURE_SAMPLERATE = 16000
+
+N_MFCC = 20
+N_MELS = 40
+FRAME_MS = 25
+HOP_MS = 10
+VOICED_RANGE_DB = 30.0  # frames quieter than (loudest - this) are treated as silence
+
+
+# ------------------------- Feature extraction -------------------------
+def _to_float_mono(signal):
+    signal = np.asarray(signal)
+    if signal.ndim > 1:
+        signal = signal.mean(axis=1) if signal.shape[1] > 1 else signal[:, 0]
+    if np.issubdtype(signal.dtype, np.integer):
+        return signal.astype(np.float32) / float(np.iinfo(signal.dtype).max)
+    return signal.astype(np.float32, copy=False)
+
+
+def resample(signal, samplerate, target_rate=FEATURE_SAMPLERATE):
+    """Polyphase resampling of a float mono signal; returns (signal, rate)."""
+    if not target_rate or samplerate <= target_rate:
+        return signal, samplerate
+    from scipy.signal import resample_poly
+
+    g = gcd(int(samplerate), int(target_rate))
+    resampled = resample_poly(signal, int(target_rate) // g, int(samplerate) // g)
+    return resampled.astype(np.float32, copy=False), target_rate
+
+
+@lru_cache(maxsize=8)
+def _mel_filterbank(samplerate, n_fft, n_mels):
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(samplerate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / samplerate).astype(int)
+    fbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fbank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fbank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return fbank
+
+
+def mfcc(signal, samplerate, n_mfcc=N_MFCC, n_mels=N_MELS):
+    """Returns (frames, n_mfcc) cepstra and the per-frame log energy."""
+    from scipy.fft import dct
+
+    x = _to_float_mono(signal)
+    frame_len = int(samplerate * FRAME_MS / 1000)
+    hop = int(samplerate * HOP_MS / 1000)
+    if len(x) < frame_len:
+        return np.zeros((0, n_mfcc), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])  # pre-emphasis
+    frames = np.lib.stride_tricks.sliding_window_view(x, frame_len)[::hop]
+    frames = frames * np.hamming(frame_len).astype(np.float32)
+
+    n_fft = 1 << (frame_len - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2 / n_fft
+    energy = np.log(power.sum(axis=1) + 1e-10)
+    mel = np.log(power @ _mel_filterbank(samplerate, n_fft, n_mels).T + 1e-10)
+    cepstra = dct(mel, type=2, norm="ortho", axis=1)[:, :n_mfcc]
+    return cepstra.astype(np.float32), energy.astype(np.float32)
+
+
+def compute_embedding(signal, samplerate, target_rate=FEATURE_SAMPLERATE):
+    """Compact speaker template: mean and spread of the voiced frames' MFCCs.
+
+    `signal` can be the raw recording buffer (int16 or float, mono or (n, 1));
+    it is resampled to `target_rate` first. c0 (overall loudness) is dropped
+    so the template does not depend on how close the user sat to the
+    microphone. Silent input gives a zero vector.
+    """
+    x, samplerate = resample(_to_float_mono(signal), samplerate, target_rate)
+    cepstra, energy = mfcc(x, samplerate)
+    size = 2 * (N_MFCC - 1)
+    if len(cepstra) == 0:
+        return np.zeros(size, dtype=np.float32)
+
+    voiced = energy > energy.max() - VOICED_RANGE_DB / 10 * np.log(10)
+    voiced &= energy > np.log(1e-6)
+    if voiced.sum() < 3:
+        return np.zeros(size, dtype=np.float32)
+
+    c = cepstra[voiced, 1:]
+    return np.concatenate((c.mean(axis=0), c.std(axis=0))).astype(np.float32)
+
+
+# ------------------------- Stored templates -------------------------
+def embedding_path(wav_path):
+    return os.path.splitext(wav_path)[0] + EMBEDDING_SUFFIX
+
+
+def save_embedding(wav_path, signal=None, samplerate=None):
+    """Computes the template for an enrolled WAV and stores it next to the file.
+
+    Pass the in-memory recording as `signal` to skip rereading the WAV.
+    """
+    if signal is None:
+        from scipy.io.wavfile import read as read_wav
+        samplerate, signal = read_wav(wav_path)
+    embedding = compute_embedding(signal, samplerate)
+    stat = os.stat(wav_path)
+    with open(embedding_path(wav_path), "wb") as f:
+        np.savez(f, embedding=embedding, version=EMBEDDING_VERSION,
+                 source_size=stat.st_size, source_mtime=stat.st_mtime)
+    return embedding
+
+
+def load_embedding(wav_path):
+    """Loads the stored template, recomputing it if missing or out of date."""
+    path = embedding_path(wav_path)
+    try:
+        stat = os.stat(wav_path)
+        with np.load(path) as stored:
+            if (int(stored["version"]) == EMBEDDING_VERSION
+                    and int(stored["source_size"]) == stat.st_size
+                    and float(stored["source_mtime"]) == stat.st_mtime):
+                return stored["embedding"]
+    except (OSError, KeyError, ValueError):
+        pass
+    return save_embedding(wav_path)
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    # Silent templates stay all-zero and score 0 against everything
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def score_templates(templates, embedding):
+    """Cosine similarity of `embedding` against each row of `templates`, in one mat-vec product."""
+    templates = np.asarray(templates, dtype=np.float32).reshape(-1, 2 * (N_MFCC - 1))
+    query = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm == 0 or len(templates) == 0:
+        return np.zeros(len(templates), dtype=np.float32)
+    return _normalize_rows(templates) @ (query / norm)